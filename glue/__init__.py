@@ -5,26 +5,56 @@ __all__ = ['custom_viewer', 'qglue', 'test']
 import os
 
 import sys
+import types
 
-from pkg_resources import get_distribution, DistributionNotFound
+try:
+    from importlib.metadata import version, PackageNotFoundError
+except ImportError:  # Python < 3.8
+    from importlib_metadata import version, PackageNotFoundError
 
 try:
-    __version__ = get_distribution('glue-core').version
-except DistributionNotFound:
+    __version__ = version('glue-core')
+except PackageNotFoundError:
     __version__ = 'undefined'
 
 from ._mpl_backend import MatplotlibBackendSetter
 sys.meta_path.append(MatplotlibBackendSetter())
 
-from glue.viewers.custom.helper import custom_viewer
+# To keep ``import glue`` (and imports of sub-packages such as glue.core) fast,
+# the following are only imported when first accessed. The user's
+# configuration file is also only loaded when first needed (see
+# ``glue.config.load_user_configuration``).
+_LAZY_ATTRIBUTES = {'custom_viewer': 'glue.viewers.custom.helper',
+                    'qglue': 'glue.qglue',
+                    'load_plugins': 'glue.main'}
+
+
+class _GlueModule(types.ModuleType):
+
+    def __getattr__(self, name):
+        if name == 'env':
+            from .config import load_configuration
+            self.env = load_configuration()
+            return self.env
+        elif name in _LAZY_ATTRIBUTES:
+            from importlib import import_module
+            value = getattr(import_module(_LAZY_ATTRIBUTES[name]), name)
+            setattr(self, name, value)
+            return value
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(self.__name__, name))
 
-# Load user's configuration file
-from .config import load_configuration
-env = load_configuration()
+    def __setattr__(self, name, value):
+        # Importing the glue.qglue sub-module sets glue.qglue to the module,
+        # but it should refer to the qglue function.
+        if name == 'qglue' and isinstance(value, types.ModuleType):
+            value = value.qglue
+        super(_GlueModule, self).__setattr__(name, value)
 
-from .qglue import qglue
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES) | {'env'})
 
-from .main import load_plugins  # noqa
+
+sys.modules[__name__].__class__ = _GlueModule
 
 
 def test(no_optional_skip=False):
@@ -36,10 +66,6 @@ def test(no_optional_skip=False):
     return main(args=args)
 
 
-from glue._settings_helpers import load_settings
-load_settings()
-
-
 # In PyQt 5.5+, PyQt overrides the default exception catching and fatally
 # crashes the Qt application without printing out any details about the error.
 # Below we revert the exception hook to the original Python one. Note that we
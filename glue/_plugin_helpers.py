@@ -7,12 +7,156 @@
 # wouldn't be used.
 
 import os
-from collections import defaultdict
+import sys
+import json
+from collections import defaultdict, namedtuple
+
+from glue.logger import logger
+
+# The entry points returned by iter_plugin_entry_points have the same
+# attributes as the ones returned by pkg_resources (which was previously used
+# to find them) for compatibility.
+PluginDistribution = namedtuple('PluginDistribution', 'project_name version')
+PluginEntryPoint = namedtuple('PluginEntryPoint', 'name module_name attrs dist')
+
+PLUGIN_CACHE_VERSION = 1
+
+_entry_points_cache = None
+_deferred_plugins = []
+
+
+def _entry_points_fingerprint(paths):
+    """
+    Return a value that changes when packages are installed in or removed from
+    the Python environment.
+
+    Installing or removing a distribution changes the modification time of
+    the directory it is installed in, so we use the modification times of the
+    entries in sys.path, as well as of the metadata directories of the
+    distributions providing plugins (in case these are updated in-place, e.g.
+    for development installs).
+    """
+    fingerprint = []
+    for path in list(sys.path) + sorted(paths):
+        try:
+            fingerprint.append([path, os.stat(path or '.').st_mtime])
+        except OSError:
+            pass
+    return fingerprint
+
+
+def _metadata_path(dist):
+    """
+    Return the path to the metadata directory of a distribution, or if this
+    can't be determined, to the directory the distribution is installed in.
+    """
+    for path in dist.files or ():
+        if path.name == 'entry_points.txt':
+            return str(dist.locate_file(path).parent)
+    return str(dist.locate_file(''))
+
+
+def _find_entry_points():
+    """
+    Find the plugin entry points in the installed distributions.
+
+    Returns a list of (entry point, metadata path) tuples.
+    """
+
+    try:
+        from importlib.metadata import distributions
+    except ImportError:  # Python < 3.8
+        from importlib_metadata import distributions
+
+    entry_points = []
+    for dist in distributions():
+        for entry_point in dist.entry_points:
+            if entry_point.group != 'glue.plugins':
+                continue
+            module_name, _, attrs = entry_point.value.partition(':')
+            attrs = attrs.split('[')[0]
+            entry_points.append((PluginEntryPoint(entry_point.name, module_name.strip(),
+                                                  tuple(attrs.strip().split('.')),
+                                                  PluginDistribution(dist.metadata['Name'],
+                                                                     dist.version)),
+                                 _metadata_path(dist)))
+    return entry_points
+
+
+def _plugin_cache_file():
+    from glue import config
+    return os.path.join(config.CFG_DIR, 'plugins_cache.json')
 
 
 def iter_plugin_entry_points():
-    from pkg_resources import iter_entry_points
-    return iter_entry_points(group='glue.plugins', name=None)
+    """
+    Return the entry points for the installed glue plugins.
+
+    Looking through the metadata of all installed distributions can be slow,
+    so the entry points are cached on disk and only found again if the Python
+    environment changes.
+    """
+
+    global _entry_points_cache
+
+    if _entry_points_cache is not None:
+        fingerprint = _entry_points_fingerprint(_entry_points_cache[1])
+        if fingerprint == _entry_points_cache[0]:
+            return iter(_entry_points_cache[2])
+
+    cache_file = _plugin_cache_file()
+
+    try:
+        with open(cache_file) as f:
+            cache = json.load(f)
+        if cache['version'] != PLUGIN_CACHE_VERSION:
+            raise ValueError('Plugin cache version has changed')
+        fingerprint = _entry_points_fingerprint(cache['paths'])
+        if fingerprint != cache['fingerprint']:
+            raise ValueError('Python environment has changed')
+        paths = cache['paths']
+        entry_points = [PluginEntryPoint(name, module_name, tuple(attrs),
+                                         PluginDistribution(*dist))
+                        for name, module_name, attrs, dist in cache['entry_points']]
+    except Exception:
+        found = _find_entry_points()
+        paths = sorted(set(path for _, path in found if path))
+        entry_points = [entry_point for entry_point, _ in found]
+        fingerprint = _entry_points_fingerprint(paths)
+        try:
+            if not os.path.exists(os.path.dirname(cache_file)):
+                os.mkdir(os.path.dirname(cache_file))
+            with open(cache_file, 'w') as f:
+                json.dump({'version': PLUGIN_CACHE_VERSION,
+                           'fingerprint': fingerprint,
+                           'paths': paths,
+                           'entry_points': entry_points}, f)
+        except Exception:
+            logger.info("Failed to save plugin cache to {0}".format(cache_file))
+
+    _entry_points_cache = fingerprint, paths, entry_points
+
+    return iter(entry_points)
+
+
+def defer_plugin(function):
+    """
+    Defer the setup of a plugin until a registry is first needed.
+    """
+    _deferred_plugins.append(function)
+
+
+def load_deferred_plugins():
+    """
+    Set up any plugins for which the setup was deferred by `defer_plugin`.
+    """
+    if not _deferred_plugins:
+        return
+    while _deferred_plugins:
+        _deferred_plugins.pop(0)()
+    # Some plugins may have added settings
+    from glue._settings_helpers import load_settings
+    load_settings()
 
 
 class PluginConfig(object):
@@ -1035,7 +1035,8 @@ class GlueApplication(Application, QtWidgets.QMainWindow):
             parent=self, basedir=getattr(self, '_last_session_name', 'session.glu'),
             filters=("Glue Session with absolute paths to data (*.glu);; "
                      "Glue Session with relative paths to data (*.glu);; "
-                     "Glue Session including data (*.glu)"),
+                     "Glue Session including data (*.glu);; "
+                     "Glue Session archive including data (*.glu)"),
             selectedfilter=getattr(self, '_last_session_filter',
                                    'Glue Session with relative paths to data (*.glu)'))
 
@@ -1053,7 +1054,8 @@ class GlueApplication(Application, QtWidgets.QMainWindow):
         with set_cursor_cm(Qt.WaitCursor):
             self.save_session(outfile,
                               include_data="including data" in file_filter,
-                              absolute_paths="absolute" in file_filter)
+                              absolute_paths="absolute" in file_filter,
+                              archive="archive" in file_filter)
         self._on_session_changed(outfile)
 
     @messagebox_on_error("Failed to restore session")
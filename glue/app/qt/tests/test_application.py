@@ -46,7 +46,8 @@ class TestGlueApplication(object):
             with patch('qtpy.compat.getsavefilename') as fd:
                 fd.return_value = '/tmp/junk', 'jnk'
                 self.app._choose_save_session()
-                save.assert_called_once_with('/tmp/junk.glu', include_data=False, absolute_paths=False)
+                save.assert_called_once_with('/tmp/junk.glu', include_data=False, absolute_paths=False,
+                                             archive=False)
                 fd.reset_mock()
             save.reset_mock()
 
@@ -30,6 +30,26 @@ __all__ = ['Registry', 'SettingRegistry', 'ExporterRegistry',
 
 CFG_DIR = os.path.join(os.path.expanduser('~'), '.glue')
 
+_USER_CONFIGURATION_LOADED = False
+
+
+def load_user_configuration():
+    """
+    Load the user's configuration file and saved settings, if this has not
+    already been done.
+
+    Importing glue does not do this, to keep imports fast, so this is called
+    the first time the contents of a registry or a setting are needed.
+    """
+    global _USER_CONFIGURATION_LOADED
+    if _USER_CONFIGURATION_LOADED:
+        return
+    _USER_CONFIGURATION_LOADED = True
+    import glue
+    glue.env  # noqa - this loads the configuration file
+    from glue._settings_helpers import load_settings
+    load_settings()
+
 
 class Registry(object):
 
@@ -56,6 +76,7 @@ class Registry(object):
         """ A list of the members in the registry.
         The return value is a list. The contents of the list
         are specified in each subclass"""
+        load_user_configuration()
         self._load_lazy_members()
         if not self._loaded:
             self._members = self.default_members() + self._members
@@ -82,6 +103,8 @@ class Registry(object):
 
     def _load_lazy_members(self):
         from glue.plugins import load_plugin
+        from glue._plugin_helpers import load_deferred_plugins
+        load_deferred_plugins()
         while self._lazy_members:
             plugin = self._lazy_members.pop()
             load_plugin(plugin)
@@ -116,6 +139,7 @@ class DictRegistry(Registry):
 
     @property
     def members(self):
+        load_user_configuration()
         self._load_lazy_members()
         if not self._loaded:
             defaults = self.default_members()
@@ -160,11 +184,17 @@ class SettingRegistry(DictRegistry):
         if attr.startswith('_'):
             raise AttributeError("No such setting: {0}".format(attr))
         else:
+            load_user_configuration()
             if attr in self._members:
                 return self._members[attr]
             elif attr in self._defaults:
                 return self._defaults[attr]
             else:
+                # The setting may be defined by a plugin not yet loaded
+                from glue._plugin_helpers import load_deferred_plugins
+                load_deferred_plugins()
+                if attr in self._defaults:
+                    return getattr(self, attr)
                 raise AttributeError("No such setting: {0}".format(attr))
 
     def __setattr__(self, attr, value):
@@ -182,6 +212,7 @@ class SettingRegistry(DictRegistry):
         return setting in self._defaults
 
     def __iter__(self):
+        load_user_configuration()
         for key in self._defaults:
             value = self._members.get(key, self._defaults[key])
             yield key, value, self._validators[key]
@@ -484,6 +515,12 @@ class DataFactoryRegistry(Registry):
 
         return adder
 
+    def default_members(self):
+        # The built-in data factories add themselves to the registry when
+        # imported.
+        import glue.core.data_factories  # noqa
+        return []
+
     def __iter__(self):
         for member in sorted(self.members, key=lambda x: (-x.priority, x.label)):
             yield member
@@ -1056,3 +1093,6 @@ settings.add('SHOW_INFO_PROFILE_OPEN', True, validator=bool)
 settings.add('SHOW_WARN_PROFILE_DUPLICATE', True, validator=bool)
 settings.add('FONT_SIZE', -1.0, validator=float)
 settings.add('AUTOLINK', {}, validator=dict)
+settings.add('MASK_CACHE_MAX_BYTES', 512 * 1024 ** 2, validator=int)
+settings.add('COMPUTE_MAX_WORKERS', 4, validator=int)
+settings.add('TYPE_INFERENCE_SAMPLE_SIZE', 10000, validator=int)
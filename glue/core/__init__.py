@@ -1,16 +1,43 @@
-from .command import Command, CommandStack  # noqa
-from .component import Component  # noqa
-from .component_id import ComponentID  # noqa
-from .component_link import ComponentLink  # noqa
-from .coordinates import Coordinates  # noqa  # noqa
-from .data import BaseData, BaseCartesianData, Data  # noqa
-from .data_collection import DataCollection  # noqa
-from .hub import Hub, HubListener  # noqa
-from .link_manager import LinkManager  # noqa
-from .session import Session  # noqa
-from .subset import Subset  # noqa
-from .subset_group import SubsetGroup  # noqa
-from .visual import VisualAttributes  # noqa
-
-# We import this last to avoid circular imports
-from .application_base import Application  # noqa
+import sys
+import types
+
+# The classes below are only imported when first accessed, so that importing
+# glue.core (or any of its sub-modules) doesn't require importing all of them.
+_LAZY_ATTRIBUTES = {'Command': 'command',
+                    'CommandStack': 'command',
+                    'Component': 'component',
+                    'ComponentID': 'component_id',
+                    'ComponentLink': 'component_link',
+                    'Coordinates': 'coordinates',
+                    'BaseData': 'data',
+                    'BaseCartesianData': 'data',
+                    'Data': 'data',
+                    'DataCollection': 'data_collection',
+                    'Hub': 'hub',
+                    'HubListener': 'hub',
+                    'LinkManager': 'link_manager',
+                    'Session': 'session',
+                    'Subset': 'subset',
+                    'SubsetGroup': 'subset_group',
+                    'VisualAttributes': 'visual',
+                    'Application': 'application_base'}
+
+# Star imports only use the lazy __getattr__ below for names in __all__
+__all__ = sorted(_LAZY_ATTRIBUTES)
+
+
+class _CoreModule(types.ModuleType):
+
+    def __getattr__(self, name):
+        if name in _LAZY_ATTRIBUTES:
+            from importlib import import_module
+            value = getattr(import_module('.' + _LAZY_ATTRIBUTES[name], self.__name__), name)
+            setattr(self, name, value)
+            return value
+        raise AttributeError("module {0!r} has no attribute {1!r}".format(self.__name__, name))
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(_LAZY_ATTRIBUTES))
+
+
+sys.modules[__name__].__class__ = _CoreModule
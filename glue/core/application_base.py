@@ -1,4 +1,5 @@
 import os
+import zipfile
 import warnings
 import traceback
 from functools import wraps
@@ -95,13 +96,18 @@ class Application(HubListener):
         return c
 
     @catch_error("Failed to save session")
-    def save_session(self, path, include_data=False, absolute_paths=True):
+    def save_session(self, path, include_data=False, absolute_paths=True, archive=False):
         """ Save the data collection and hub to file.
 
         Can be restored via restore_session
 
         Note: Saving of client is not currently supported. Thus,
         restoring this session will lose all current viz windows
+
+        If ``archive`` is `True`, the session is saved as a zip archive in
+        which arrays are stored in binary form and are memory-mapped when the
+        session is restored. Archives can't be read by older versions of glue,
+        so by default sessions are saved as JSON.
         """
 
         from glue.core.state import GlueSerializer
@@ -115,15 +121,20 @@ class Application(HubListener):
         # are relative to the session file, not the current working directory.
         start_dir = os.path.abspath('.')
         session_dir = os.path.dirname(path) or '.'
+        path = os.path.abspath(path)
 
         try:
             os.chdir(session_dir)
-            state = gs.dumps(indent=2)
+            if archive:
+                gs.dump_archive(path, indent=2)
+            else:
+                state = gs.dumps(indent=2)
         finally:
             os.chdir(start_dir)
 
-        with open(path, 'w') as out:
-            out.write(state)
+        if not archive:
+            with open(path, 'w') as out:
+                out.write(state)
 
     @staticmethod
     def restore_session(path):
@@ -152,8 +163,11 @@ class Application(HubListener):
 
         try:
             os.chdir(session_dir)
-            with open(session_file) as infile:
-                state = GlueUnSerializer.load(infile)
+            if zipfile.is_zipfile(session_file):
+                state = GlueUnSerializer.load_archive(session_file)
+            else:
+                with open(session_file) as infile:
+                    state = GlueUnSerializer.load(infile)
             return state.object('__main__')
         finally:
             os.chdir(start_dir)
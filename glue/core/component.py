@@ -1,20 +1,17 @@
 import logging
+import threading
 
 import numpy as np
 import pandas as pd
 
 from glue.core.coordinate_helpers import dependent_axes, pixel2world_single_axis
-from glue.utils import (shape_to_string, coerce_numeric,
-                        broadcast_to, categorical_ndarray)
-
-try:
-    import dask.array as da
-    DASK_INSTALLED = True
-except ImportError:
-    DASK_INSTALLED = False
+from glue.utils import (shape_to_string, coerce_numeric, broadcast_to,
+                        categorical_ndarray, view_cache_key, is_dask_array)
+from glue.utils.array import _uniform_jitter
 
 __all__ = ['Component', 'DerivedComponent', 'CategoricalComponent',
-           'CoordinateComponent', 'DateTimeComponent']
+           'CoordinateComponent', 'DateTimeComponent', 'LazyComponent',
+           'TypeInference']
 
 
 class Component(object):
@@ -137,7 +134,7 @@ class Component(object):
         :returns: A Component (or subclass)
         """
 
-        if DASK_INSTALLED and isinstance(data, da.Array):
+        if is_dask_array(data):
             return DaskComponent(data, units=units)
 
         data = np.asarray(data)
@@ -148,19 +145,149 @@ class Component(object):
         if data.dtype.kind == 'M':
             return DateTimeComponent(data)
 
-        n = coerce_numeric(data)
+        # For strings, we check whether most values can be converted to
+        # numbers before converting all of them.
+        if np.issubdtype(data.dtype, np.character):
+            inference = TypeInference()
+            inference.update(data)
+            if inference.categorical:
+                return CategoricalComponent(data, units=units)
+
+        return Component(coerce_numeric(data), units=units)
+
+
+class TypeInference(object):
+    """
+    Decide whether values should be stored in a numerical or categorical
+    component, by checking whether values can be converted to numbers.
+
+    Only a random sample of the values is converted. The values can be given
+    in several chunks using :meth:`update`, for example when reading a table
+    in chunks, in which case a sample is taken from each chunk.
+
+    Parameters
+    ----------
+    sample_size : int, optional
+        The maximum number of values to convert in each chunk. If not
+        specified, the ``TYPE_INFERENCE_SAMPLE_SIZE`` setting is used.
+    threshold : float, optional
+        The values are considered to be categorical if the fraction of values
+        that can be converted to finite numbers is at most this.
+    seed : int, optional
+        The seed for the random sampling.
+    """
+
+    def __init__(self, sample_size=None, threshold=0.5, seed=0):
+        if sample_size is None:
+            from glue.config import settings
+            sample_size = settings.TYPE_INFERENCE_SAMPLE_SIZE
+        self.sample_size = sample_size
+        self.threshold = threshold
+        self._random = np.random.RandomState(seed)
+        self._n_values = 0
+        self._n_numerical = 0.
+
+    def update(self, values):
+        """
+        Take into account a new chunk of values.
+        """
+
+        values = np.asarray(values).ravel()
+
+        if values.size == 0:
+            return
+
+        if values.size > self.sample_size:
+            sample = values[self._random.randint(0, values.size, self.sample_size)]
+        else:
+            sample = values
 
-        thresh = 0.5
         try:
-            use_categorical = np.issubdtype(data.dtype, np.character) and \
-                np.isfinite(n).mean() <= thresh
+            fraction = np.isfinite(coerce_numeric(sample)).mean()
         except TypeError:  # isfinite not supported. non-numeric dtype
-            use_categorical = True
+            fraction = 0.
 
-        if use_categorical:
-            return CategoricalComponent(data, units=units)
+        self._n_values += values.size
+        self._n_numerical += fraction * values.size
+
+    @property
+    def categorical(self):
+        """
+        Whether the values should be stored in a categorical component.
+        """
+        if self._n_values == 0:
+            return False
+        return self._n_numerical / self._n_values <= self.threshold
+
+
+class LazyComponent(Component):
+    """
+    A numerical component whose values are only read the first time they are
+    needed.
+
+    Parameters
+    ----------
+    loader : callable
+        A function that takes no arguments and returns the values.
+    shape : tuple
+        The shape of the values.
+    units : str, optional
+        Optional unit label.
+    section : callable, optional
+        A function that takes a view (a tuple of integers and slices) and
+        returns the values in that view. If specified, this is used to read
+        only the values needed when the component is indexed before all the
+        values have been read.
+    """
+
+    def __init__(self, loader, shape, units=None, section=None):
+        self._loader = loader
+        self._section = section
+        self._shape = tuple(shape)
+        self._values = None
+        self._lock = threading.Lock()
+        self.units = units
+
+    @property
+    def _data(self):
+        if self._values is None:
+            with self._lock:
+                if self._values is None:
+                    values = coerce_numeric(np.asarray(self._loader()))
+                    values.setflags(write=False)
+                    self._values = values
+        return self._values
+
+    @_data.setter
+    def _data(self, value):
+        self._values = value
+
+    @property
+    def loaded(self):
+        """
+        Whether the values have been read
+        """
+        return self._values is not None
+
+    @property
+    def shape(self):
+        if self._values is None:
+            return self._shape
         else:
-            return Component(n, units=units)
+            return self._values.shape
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def numeric(self):
+        return True
+
+    def __getitem__(self, key):
+        if self._values is None and self._section is not None and _is_basic_view(key):
+            return coerce_numeric(np.asarray(self._section(key)))
+        return self._data[key]
 
 
 class DerivedComponent(Component):
@@ -308,11 +435,22 @@ class CoordinateComponent(Component):
             # We build the list of N arrays, one for each pixel coordinate
             pix_coords = np.meshgrid(*pix_coords, indexing='ij', copy=False)
 
+            # The pixel coordinates are fully determined by the view and the
+            # dependent axes, so we can use these to cache the world
+            # coordinates on the data. This means that the other world axes
+            # that depend on the same pixel axes can re-use the results.
+            if optimize_view:
+                cache_key = ('component', view_cache_key(tuple(view)), tuple(dep_coords))
+            else:
+                cache_key = ('component', None, tuple(dep_coords))
+
             # Finally we convert these to world coordinates
             axis = self._data.ndim - 1 - self.axis
             world_coords = pixel2world_single_axis(self._data.coords,
                                                    *pix_coords[::-1],
-                                                   world_axis=axis)
+                                                   world_axis=axis,
+                                                   cache=getattr(self._data, '_coordinate_cache', None),
+                                                   cache_key=cache_key)
 
             # We get rid of any dimension for which using the view should get
             # rid of that dimension.
@@ -374,6 +512,10 @@ class CategoricalComponent(Component):
 
     """
     Container for categorical data.
+
+    The values are stored as the categories and the integer code of each
+    value (using the smallest unsigned integer type possible), and the labels
+    are only generated when needed.
     """
 
     def __init__(self, categorical_data, categories=None, jitter=None, units=None):
@@ -385,21 +527,113 @@ class CategoricalComponent(Component):
 
         # TOOD: deal with custom categories
 
-        super(CategoricalComponent, self).__init__(None, units)
+        self.units = units
+
+        self._set_values(categorical_data, categories=categories)
+
+        self.jitter(method=jitter)
 
-        self._data = categorical_ndarray(categorical_data, copy=False, categories=categories)
+    def _set_values(self, values, categories=None):
 
-        if self._data.ndim != 1:
+        values = categorical_ndarray(values, copy=False, categories=categories)
+
+        if values.ndim != 1:
             raise ValueError("Categorical Data must be 1-dimensional")
 
-        self.jitter(method=jitter)
+        self._categories = values.categories
+        self._codes = values.compact_codes
+
+        # If some values are not in the categories, we can't recover them from
+        # the codes, so in this case we need to keep the original values.
+        if np.any(self._codes == len(self._categories)):
+            self._labels = values.view(np.ndarray)
+        else:
+            self._labels = None
+
+        # The floating-point codes are only computed when first needed, and
+        # then cached. The labels are never cached since they take up much
+        # more memory than the codes.
+        self._float_codes = None
+        self._jittered_codes = None
+
+    def _get_values(self, view=None):
+
+        if view is None:
+            return categorical_ndarray.from_codes(self._codes, self._categories,
+                                                  labels=self._labels,
+                                                  jitter_seed=self._jitter_seed,
+                                                  float_codes=self.codes)
+        else:
+            codes = self._codes[view]
+            labels = None if self._labels is None else self._labels[view]
+
+        # Single values are returned as labels
+        if np.ndim(codes) == 0:
+            if labels is None:
+                return self._categories[codes]
+            else:
+                return labels
+
+        # The jitter depends on the position of the values in the array
+        if self._jitter_seed is None:
+            positions = None
+        else:
+            positions = np.arange(self._codes.size)[view]
+
+        return categorical_ndarray.from_codes(codes, self._categories, labels=labels,
+                                              jitter_seed=self._jitter_seed,
+                                              positions=positions)
+
+    @property
+    def _data(self):
+        return self._get_values()
+
+    @_data.setter
+    def _data(self, value):
+        self._set_values(value)
+
+    @property
+    def shape(self):
+        return self._codes.shape
+
+    @property
+    def ndim(self):
+        return self._codes.ndim
+
+    def __getitem__(self, key):
+        return self._get_values(key)
 
     @property
     def codes(self):
         """
         The index of the category for each value in the array.
+
+        This is computed directly from the integer codes without generating
+        the labels.
+        """
+        if self._float_codes is None:
+            codes = self._codes.astype(float)
+            codes[self._codes == len(self._categories)] = np.nan
+            codes.setflags(write=False)
+            self._float_codes = codes
+        if self._jitter_seed is None:
+            return self._float_codes
+        if self._jittered_codes is None or self._jittered_codes[0] != self._jitter_seed:
+            codes = self._float_codes + _uniform_jitter(np.arange(self._codes.size),
+                                                        self._jitter_seed)
+            codes.setflags(write=False)
+            self._jittered_codes = (self._jitter_seed, codes)
+        return self._jittered_codes[1]
+
+    @property
+    def compact_codes(self):
+        """
+        The index of the category for each value in the array, using the
+        smallest unsigned integer type that can hold the number of categories.
+        Values that are not in the categories have a code equal to the number
+        of categories.
         """
-        return self._data.codes
+        return self._codes
 
     @property
     def labels(self):
@@ -413,7 +647,7 @@ class CategoricalComponent(Component):
         """
         The categories.
         """
-        return self._data.categories
+        return self._categories
 
     @property
     def data(self):
@@ -439,7 +673,12 @@ class CategoricalComponent(Component):
             If ``'uniform'``, the codes are randomized by a uniformly
             distributed random variable.
         """
-        self._data.jitter(method=method)
+        if method is None:
+            self._jitter_seed = None
+        elif method == 'uniform':
+            self._jitter_seed = np.random.randint(2 ** 31)
+        else:
+            raise ValueError("method should be None or 'uniform'")
         self.jitter_method = method
 
     def to_series(self, **kwargs):
@@ -529,3 +768,12 @@ class DaskComponent(Component):
     @property
     def datetime(self):
         return False
+
+
+def _is_basic_view(view):
+    """
+    Whether a view only consists of integers and slices.
+    """
+    if not isinstance(view, tuple):
+        view = (view,)
+    return all(isinstance(v, (slice, int, np.integer)) for v in view)
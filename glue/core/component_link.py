@@ -11,7 +11,7 @@ from glue.core.coordinate_helpers import (dependent_axes, default_world_coords,
                                           world2pixel_single_axis)
 from glue.core.subset import InequalitySubsetState
 from glue.core.util import join_component_view
-from glue.utils import unbroadcast, broadcast_to
+from glue.utils import unbroadcast, broadcast_to, view_cache_key
 from glue.logger import logger
 
 __all__ = ['ComponentLink', 'BinaryComponentLink', 'CoordinateComponentLink']
@@ -184,7 +184,7 @@ class ComponentLink(object, metaclass=ContractsMeta):
         args = np.broadcast_arrays(*args)
 
         # We call the actual linking function
-        result = self._using(*args)
+        result = self._call_using(args, data=data, view=view)
 
         # We call asarray since link functions may return Python scalars in some cases
         result = np.asarray(result)
@@ -202,6 +202,13 @@ class ComponentLink(object, metaclass=ContractsMeta):
 
         return result
 
+    def _call_using(self, args, data=None, view=None):
+        """
+        Call the linking function on the values of the 'from' components,
+        which were extracted from ``data`` using ``view``.
+        """
+        return self._using(*args)
+
     def __contains__(self, cid):
         return cid in self._from or cid is self._to
 
@@ -369,7 +376,25 @@ class CoordinateComponentLink(ComponentLink):
         super(CoordinateComponentLink, self).__init__(
             comp_from, comp_to, self.using)
 
-    def using(self, *args):
+    def _call_using(self, args, data=None, view=None):
+
+        # The input values are fully determined by the data, the view and the
+        # 'from' components, so we can use these to cache the results of the
+        # coordinate transformation on the data. The cache is cleared whenever
+        # the values in the data change.
+        cache = getattr(data, '_coordinate_cache', None)
+
+        if cache is not None:
+            try:
+                cache_key = ('link', tuple(id(cid) for cid in self._from), view_cache_key(view))
+            except TypeError:  # unhashable view
+                pass
+            else:
+                return self.using(*args, cache=cache, cache_key=cache_key)
+
+        return self.using(*args)
+
+    def using(self, *args, cache=None, cache_key=None):
 
         # NOTE: in the past, we set any non-specified arguemnts to 0 for the
         # input coordinates, but this caused issues because in astropy.wcs
@@ -387,9 +412,11 @@ class CoordinateComponentLink(ComponentLink):
         args2 = tuple(args2)
 
         if self.pixel2world:
-            return pixel2world_single_axis(self.coords, *args2[::-1], world_axis=self.ndim - 1 - self.index)
+            return pixel2world_single_axis(self.coords, *args2[::-1], world_axis=self.ndim - 1 - self.index,
+                                           cache=cache, cache_key=cache_key)
         else:
-            return world2pixel_single_axis(self.coords, *args2[::-1], pixel_axis=self.ndim - 1 - self.index)
+            return world2pixel_single_axis(self.coords, *args2[::-1], pixel_axis=self.ndim - 1 - self.index,
+                                           cache=cache, cache_key=cache_key)
 
     def __str__(self):
         rep = 'pix2world' if self.pixel2world else 'world2pix'
@@ -0,0 +1,228 @@
+"""
+A shared executor for running expensive computations in the background.
+
+Viewers typically need to compute histograms, profiles or other statistics
+for each of their layers, which can take a long time for large datasets. These
+computations can be submitted to the :data:`compute_executor`, which runs them
+on a pool of threads shared by all viewers.
+
+Each job is submitted with a key (typically the layer artist doing the
+computation). Submitting a new job with the same key supersedes the previous
+one: if the previous job has not started yet it is not run at all, and if it
+is running it is asked to stop. Since Python threads can't be interrupted,
+cancellation is cooperative: long-running functions should regularly call
+:func:`check_cancelled`, which raises :class:`~glue.core.exceptions.ComputationCancelled`
+if the job currently running in the thread has been superseded. Jobs with the
+same key are never run concurrently.
+"""
+
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from glue.core.exceptions import ComputationCancelled
+
+__all__ = ['ComputeJob', 'ComputeExecutor', 'compute_executor',
+           'current_job', 'check_cancelled']
+
+_current = threading.local()
+
+
+class ComputeJob(object):
+    """
+    A job submitted to a :class:`ComputeExecutor`.
+
+    Parameters
+    ----------
+    key : object
+        The key the job was submitted with.
+    previous : `ComputeJob`, optional
+        The job with the same key that this job supersedes, if any. This job
+        will only start once the previous one is done.
+    """
+
+    def __init__(self, key, previous=None):
+        self.key = key
+        self.future = None
+        self._previous = previous
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+
+    @property
+    def cancelled(self):
+        """
+        Whether the job has been cancelled.
+        """
+        return self._cancelled.is_set()
+
+    @property
+    def done(self):
+        """
+        Whether the job has finished running (or will never run).
+        """
+        return self._done.is_set()
+
+    def cancel(self):
+        """
+        Ask the job to stop as soon as possible.
+        """
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self._done.set()
+
+    def wait(self, timeout=None):
+        """
+        Wait until the job is done, and return whether it is done.
+        """
+        return self._done.wait(timeout)
+
+    def _run(self, function, args, kwargs):
+
+        try:
+
+            if self._previous is not None:
+                self._previous.wait()
+                self._previous = None
+
+            if self.cancelled:
+                raise ComputationCancelled()
+
+            _current.job = self
+            try:
+                return function(*args, **kwargs)
+            finally:
+                _current.job = None
+
+        finally:
+            self._done.set()
+
+
+class ComputeExecutor(object):
+    """
+    Run jobs on a pool of threads, with per-key supersession of jobs.
+
+    Parameters
+    ----------
+    max_workers : int, optional
+        The maximum number of threads to use. If not specified, the
+        ``COMPUTE_MAX_WORKERS`` setting is used.
+    """
+
+    def __init__(self, max_workers=None):
+        self._max_workers = max_workers
+        self._executor = None
+        self._jobs = {}
+        self._lock = threading.RLock()
+
+    @property
+    def max_workers(self):
+        """
+        The maximum number of threads used to run jobs.
+        """
+        if self._max_workers is None:
+            from glue.config import settings
+            return settings.COMPUTE_MAX_WORKERS
+        else:
+            return self._max_workers
+
+    def submit(self, key, function, *args, **kwargs):
+        """
+        Run ``function(*args, **kwargs)`` in the background, cancelling any
+        job previously submitted with the same key.
+
+        Parameters
+        ----------
+        key : object
+            The key identifying the job. This should be hashable, and is
+            typically the object on behalf of which the computation is done.
+        function : callable
+            The function to run.
+
+        Returns
+        -------
+        job : `ComputeJob`
+            The job, whose ``future`` attribute gives the result of the
+            function. If the job is cancelled before it completes, the
+            future result will either be cancelled or raise
+            :class:`~glue.core.exceptions.ComputationCancelled`.
+        """
+
+        with self._lock:
+
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers,
+                                                    thread_name_prefix='glue-compute')
+
+            previous = self._jobs.get(key)
+            if previous is not None:
+                previous.cancel()
+
+            # If the previous job never started, the new job still needs to
+            # wait for any job it was itself waiting for.
+            while previous is not None and previous.done:
+                previous = previous._previous
+
+            job = ComputeJob(key, previous=previous)
+            job.future = self._executor.submit(job._run, function, args, kwargs)
+            job.future.add_done_callback(lambda future: self._forget(job))
+            self._jobs[key] = job
+
+        return job
+
+    def _forget(self, job):
+        with self._lock:
+            if self._jobs.get(job.key) is job:
+                self._jobs.pop(job.key)
+
+    def get_job(self, key):
+        """
+        Return the most recent job for a given key if it is not done, and
+        `None` otherwise.
+        """
+        with self._lock:
+            return self._jobs.get(key)
+
+    def cancel(self, key):
+        """
+        Cancel the job for a given key, if any.
+        """
+        with self._lock:
+            job = self._jobs.get(key)
+        if job is not None:
+            job.cancel()
+
+    def shutdown(self, wait=True):
+        """
+        Cancel all jobs and stop the threads. The executor can still be used
+        afterwards, in which case new threads are started.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+            executor, self._executor = self._executor, None
+        for job in jobs:
+            job.cancel()
+        if executor is not None:
+            executor.shutdown(wait=wait)
+
+
+compute_executor = ComputeExecutor()
+
+
+def current_job():
+    """
+    Return the job running in the current thread, or `None` if called outside
+    of a job.
+    """
+    return getattr(_current, 'job', None)
+
+
+def check_cancelled():
+    """
+    Raise :class:`~glue.core.exceptions.ComputationCancelled` if called from
+    a job that has been cancelled.
+
+    This should be called regularly by long-running computations, for example
+    between chunks of data. It does nothing if called outside of a job.
+    """
+    job = current_job()
+    if job is not None and job.cancelled:
+        raise ComputationCancelled()
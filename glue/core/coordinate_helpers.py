@@ -1,3 +1,6 @@
+import threading
+from collections import OrderedDict
+
 import numpy as np
 from astropy.wcs import WCS
 
@@ -5,6 +8,64 @@ from glue.utils import unbroadcast, broadcast_to
 from glue.core.coordinates import LegacyCoordinates
 
 
+class CoordinateCache(object):
+    """
+    A least-recently-used cache for the results of coordinate transformations.
+
+    WCS transformations return the values for all world (or pixel) axes at
+    once, so the full results are cached, without broadcasting. This means
+    that computing e.g. RA and Dec for a dataset only requires a single call
+    to the WCS. The cache is meant to be attached to a dataset and cleared
+    whenever the coordinates or the shape of the dataset change.
+
+    Parameters
+    ----------
+    max_entries : int, optional
+        The maximum number of transformation results to keep.
+    """
+
+    def __init__(self, max_entries=32):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, wcs, key, function):
+        """
+        Return the cached result for ``key`` and the coordinate object
+        ``wcs``, calling ``function`` to compute it if needed.
+        """
+
+        key = (id(wcs),) + key
+
+        with self._lock:
+            if key in self._entries:
+                # Check the coordinates object itself and not only its id,
+                # since ids can be re-used once objects no longer exist.
+                cached_wcs, result = self._entries[key]
+                if cached_wcs is wcs:
+                    self._entries.move_to_end(key)
+                    return result
+
+        result = function()
+
+        with self._lock:
+            self._entries[key] = wcs, result
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+        return result
+
+    def clear(self):
+        """
+        Remove all results from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+
+
 def default_world_coords(wcs):
     if isinstance(wcs, WCS):
         return wcs.wcs.crval
@@ -12,7 +73,7 @@ def default_world_coords(wcs):
         return np.zeros(wcs.world_n_dim, dtype=float)
 
 
-def pixel2world_single_axis(wcs, *pixel, world_axis=None):
+def pixel2world_single_axis(wcs, *pixel, world_axis=None, cache=None, cache_key=None):
     """
     Convert pixel to world coordinates, preserving input type/shape.
 
@@ -26,6 +87,11 @@ def pixel2world_single_axis(wcs, *pixel, world_axis=None):
         The pixel coordinates (0-based) to convert
     world_axis : int, optional
         The index of the world coordinate that is needed.
+    cache : `CoordinateCache`, optional
+        If specified, the world coordinates for all axes are stored in this
+        cache, and re-used if requested again for the same ``cache_key``.
+    cache_key : tuple, optional
+        A hashable key that uniquely identifies the input pixel coordinates.
 
     Returns
     -------
@@ -46,19 +112,25 @@ def pixel2world_single_axis(wcs, *pixel, world_axis=None):
     # world coordinate, using the axis correlation matrix
     pixel_dep = wcs.axis_correlation_matrix[world_axis, :]
 
-    for ip, p in enumerate(pixel):
-        if pixel_dep[ip]:
-            pixel_new.append(unbroadcast(p))
-        else:
-            pixel_new.append(p.flat[0])
-    pixel = np.broadcast_arrays(*pixel_new)
+    def transform():
+        for ip, p in enumerate(pixel):
+            if pixel_dep[ip]:
+                pixel_new.append(unbroadcast(p))
+            else:
+                pixel_new.append(p.flat[0])
+        return wcs.pixel_to_world_values(*np.broadcast_arrays(*pixel_new))
 
-    result = wcs.pixel_to_world_values(*pixel)
+    # All world axes that depend on the same pixel axes get the same input
+    # values, so they can share the same result from the cache.
+    if cache is None or cache_key is None:
+        result = transform()
+    else:
+        result = cache.get(wcs, ('pixel2world', tuple(pixel_dep)) + cache_key, transform)
 
     return broadcast_to(result[world_axis], original_shape)
 
 
-def world2pixel_single_axis(wcs, *world, pixel_axis=None):
+def world2pixel_single_axis(wcs, *world, pixel_axis=None, cache=None, cache_key=None):
     """
     Convert world to pixel coordinates, preserving input type/shape.
 
@@ -72,6 +144,11 @@ def world2pixel_single_axis(wcs, *world, pixel_axis=None):
         The world coordinates to convert
     pixel_axis : int, optional
         The index of the pixel coordinate that is needed.
+    cache : `CoordinateCache`, optional
+        If specified, the pixel coordinates for all axes are stored in this
+        cache, and re-used if requested again for the same ``cache_key``.
+    cache_key : tuple, optional
+        A hashable key that uniquely identifies the input world coordinates.
 
     Returns
     -------
@@ -92,14 +169,18 @@ def world2pixel_single_axis(wcs, *world, pixel_axis=None):
     # world coordinate, using the axis correlation matrix
     world_dep = wcs.axis_correlation_matrix[:, pixel_axis]
 
-    for iw, w in enumerate(world):
-        if world_dep[iw]:
-            world_new.append(unbroadcast(w))
-        else:
-            world_new.append(w.flat[0])
-    world = np.broadcast_arrays(*world_new)
+    def transform():
+        for iw, w in enumerate(world):
+            if world_dep[iw]:
+                world_new.append(unbroadcast(w))
+            else:
+                world_new.append(w.flat[0])
+        return wcs.world_to_pixel_values(*np.broadcast_arrays(*world_new))
 
-    result = wcs.world_to_pixel_values(*world)
+    if cache is None or cache_key is None:
+        result = transform()
+    else:
+        result = cache.get(wcs, ('world2pixel', tuple(world_dep)) + cache_key, transform)
 
     return broadcast_to(result[pixel_axis], original_shape)
 
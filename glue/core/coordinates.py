@@ -9,7 +9,8 @@ from astropy.wcs import WCS
 from astropy.wcs.wcsapi import BaseLowLevelWCS
 
 __all__ = ['Coordinates', 'IdentityCoordinates', 'AffineCoordinates',
-           'coordinates_from_header', 'coordinates_from_wcs', 'header_from_string']
+           'coordinates_from_header', 'coordinates_from_wcs', 'header_from_string',
+           'equivalent_coordinates']
 
 
 def default_world_coords(wcs):
@@ -252,3 +253,20 @@ def header_from_string(string):
     """
     from astropy.io import fits
     return fits.Header.fromstring(string, sep='\n')
+
+
+def equivalent_coordinates(coords1, coords2):
+    """
+    Whether two coordinate objects are known to represent the same
+    transformation. This returns `False` if this can't be determined.
+    """
+    if coords1 is coords2:
+        return True
+    elif type(coords1) is not type(coords2):
+        return False
+    elif isinstance(coords1, WCS):
+        return bool(coords1.wcs.compare(coords2.wcs))
+    elif isinstance(coords1, IdentityCoordinates):
+        return coords1.pixel_n_dim == coords2.pixel_n_dim
+    else:
+        return False
@@ -16,7 +16,7 @@ from glue.core.message import (DataUpdateMessage, DataRemoveComponentMessage,
                                ComponentReplacedMessage, DataReorderComponentMessage,
                                ExternallyDerivableComponentsChangedMessage,
                                PixelAlignedDataChangedMessage)
-from glue.core.decorators import clear_cache
+from glue.core.mask_cache import mask_cache
 from glue.core.util import split_component_view
 from glue.core.hub import Hub
 from glue.core.subset import Subset, SubsetState, SliceSubsetState
@@ -25,12 +25,15 @@ from glue.core.component_link import ComponentLink, CoordinateComponentLink
 from glue.core.exceptions import IncompatibleAttribute
 from glue.core.visual import VisualAttributes
 from glue.core.contracts import contract
-from glue.core.joins import get_mask_with_key_joins
+from glue.core.joins import get_mask_with_key_joins, invalidate_join_indices
 from glue.config import settings, data_translator, subset_state_translator
-from glue.utils import (compute_statistic, unbroadcast, iterate_chunks,
+from glue.utils import (compute_statistics, unbroadcast, iterate_chunks,
                         datetime64_to_mpl, broadcast_to, categorical_ndarray,
-                        format_choices, random_views_for_dask_array)
-from glue.core.coordinate_helpers import axis_label
+                        format_choices, random_views_for_dask_array,
+                        is_dask_array)
+from glue.core.coordinate_helpers import axis_label, CoordinateCache
+from glue.core.coordinates import equivalent_coordinates
+from glue.core.compute import check_cancelled
 
 
 # Note: leave all the following imports for component and component_id since
@@ -39,12 +42,6 @@ from glue.core.coordinate_helpers import axis_label
 from glue.core.component import Component, CoordinateComponent, DerivedComponent
 from glue.core.component_id import ComponentID, ComponentIDDict, PixelComponentID
 
-try:
-    import dask.array as da
-    DASK_INSTALLED = True
-except ImportError:
-    DASK_INSTALLED = False
-
 __all__ = ['Data', 'BaseCartesianData', 'BaseData']
 
 
@@ -496,6 +493,27 @@ class BaseCartesianData(BaseData, metaclass=abc.ABCMeta):
         """
         raise NotImplementedError()
 
+    def compute_statistics(self, statistics, cid, percentile=None, **kwargs):
+        """
+        Compute several statistics for the data at once.
+
+        This takes the same arguments as :meth:`compute_statistic`, except
+        that ``statistics`` should be an iterable of statistics, and
+        ``percentile`` can be an iterable giving the percentiles in the same
+        order as the ``'percentile'`` entries in ``statistics``. The results are
+        returned as a list. Subclasses can override this to compute all the
+        statistics while accessing the data only once.
+        """
+        statistics = list(statistics)
+        if np.isscalar(percentile) or percentile is None:
+            percentiles = iter([percentile] * statistics.count('percentile'))
+        else:
+            percentiles = iter(percentile)
+        return [self.compute_statistic(statistic, cid,
+                                       percentile=next(percentiles) if statistic == 'percentile' else None,
+                                       **kwargs)
+                for statistic in statistics]
+
     @abc.abstractmethod
     def compute_histogram(self, cids, weights=None, range=None, bins=None, log=None, subset_state=None):
         """
@@ -635,6 +653,13 @@ class Data(BaseCartesianData):
 
         self.label = label
 
+        # Counter incremented whenever the values in the data change, which is
+        # used to invalidate cached masks.
+        self._data_version = 0
+
+        # Cache for the results of coordinate transformations
+        self._coordinate_cache = CoordinateCache()
+
         self._shape = ()
 
         # Components
@@ -675,6 +700,7 @@ class Data(BaseCartesianData):
         if (hasattr(self, '_coords') and self._coords != value) or not hasattr(self, '_coords'):
             self._coords = value
             if len(self.components) > 0:
+                self._increment_data_version()
                 self._update_world_components(self.ndim)
 
     @property
@@ -714,6 +740,19 @@ class Data(BaseCartesianData):
                 else:
                     return component.shape == self.shape
 
+    @property
+    def data_version(self):
+        """
+        A counter that is incremented every time the values in the data change.
+        """
+        return self._data_version
+
+    def _increment_data_version(self):
+        self._data_version += 1
+        self._coordinate_cache.clear()
+        mask_cache.invalidate(self)
+        invalidate_join_indices(self)
+
     @contract(cid=ComponentID, returns=np.dtype)
     def dtype(self, cid):
         """Lookup the dtype for the data associated with a ComponentID"""
@@ -734,6 +773,7 @@ class Data(BaseCartesianData):
         # the removal of derived components.
         if component_id in self._components:
             self._components.pop(component_id)
+            self._increment_data_version()
             self._removed_derived_that_depend_on(component_id)
             if self.hub:
                 msg = DataRemoveComponentMessage(self, component_id)
@@ -987,6 +1027,7 @@ class Data(BaseCartesianData):
 
         is_present = component_id in self._components
         self._components[component_id] = component
+        self._increment_data_version()
 
         if self.hub and not is_present:
             msg = DataAddComponentMessage(self, component_id)
@@ -1024,6 +1065,7 @@ class Data(BaseCartesianData):
                 return  # Unchanged!
 
         self._externally_derivable_components = derivable_components
+        self._increment_data_version()
 
         if self.hub:
             msg = ExternallyDerivableComponentsChangedMessage(self)
@@ -1480,14 +1522,13 @@ class Data(BaseCartesianData):
 
             comp._data = data
 
+        self._increment_data_version()
+
         # alert hub of the change
         if self.hub is not None:
             msg = NumericalDataChangedMessage(self)
             self.hub.broadcast(msg)
 
-        for subset in self.subsets:
-            clear_cache(subset.subset_state.to_mask)
-
     def update_values_from_data(self, data):
         """
         Replace numerical values in data to match values from another dataset.
@@ -1504,6 +1545,15 @@ class Data(BaseCartesianData):
         existing plots and selections will be updated to reflect the new
         values. Note that the coordinates are also copied, but the style is
         **not** copied.
+
+        If the new data has the same components and equivalent coordinates,
+        the values are compared to find the region of the data that has
+        changed (for example if items have been appended to a file that is
+        being watched). If nothing has changed, cached masks and statistics
+        are kept and no message is sent. Otherwise, all cached masks and
+        statistics are invalidated as usual, and the region that has changed
+        is included in the
+        :class:`~glue.core.message.NumericalDataChangedMessage` that is sent.
         """
 
         old_labels = [cid.label for cid in self.components]
@@ -1519,6 +1569,17 @@ class Data(BaseCartesianData):
         else:
             raise ValueError("Non-unique component labels in new data")
 
+        same_coords = equivalent_coordinates(self.coords, data.coords)
+
+        if (old_labels == new_labels and same_coords and
+                self.ndim == data.ndim and self.shape[1:] == data.shape[1:]):
+            arrays = [(comp._data, data.get_component(cid.label)._data)
+                      for cid, comp in self._components.items()
+                      if not isinstance(comp, (CoordinateComponent, DerivedComponent))]
+            region = _changed_region(arrays, self.shape, data.shape)
+        else:
+            region = None
+
         # Remove components that don't have a match in new data
         for cname in old_labels - new_labels:
             cid = self.find_component_id(cname)
@@ -1550,16 +1611,19 @@ class Data(BaseCartesianData):
         self.label = data.label
 
         # Update data coordinates
-        self.coords = data.coords
+        if not same_coords:
+            self.coords = data.coords
+
+        if region is not None and region[0].start == region[0].stop:
+            return
+
+        self._increment_data_version()
 
         # alert hub of the change
         if self.hub is not None:
-            msg = NumericalDataChangedMessage(self)
+            msg = NumericalDataChangedMessage(self, region=region)
             self.hub.broadcast(msg)
 
-        for subset in self.subsets:
-            clear_cache(subset.subset_state.to_mask)
-
     # The following are methods for accessing the data in various ways that
     # can be overriden by subclasses that want to improve performance.
 
@@ -1600,6 +1664,64 @@ class Data(BaseCartesianData):
             If there are more elements in the array than this value, operate in
             chunks with at most this size.
         """
+        return self.compute_statistics([statistic], cid, subset_state=subset_state,
+                                       axis=axis, finite=finite, positive=positive,
+                                       percentile=percentile, view=view,
+                                       random_subset=random_subset,
+                                       n_chunk_max=n_chunk_max)[0]
+
+    def compute_statistics(self, statistics, cid, subset_state=None, axis=None,
+                           finite=True, positive=False, percentile=None, view=None,
+                           random_subset=None, n_chunk_max=40000000):
+        """
+        Compute several statistics for the data at once.
+
+        This is equivalent to calling :meth:`compute_statistic` for each
+        statistic, but the data and the subset mask are only accessed once.
+
+        Parameters
+        ----------
+        statistics : iterable of str
+            The statistics to compute - each item should be one of
+            ``'minimum'``, ``'maximum'``, ``'mean'``, ``'median'``, ``'sum'``,
+            or ``'percentile'``.
+        cid : `ComponentID` or str
+            The component ID to compute the statistics on - if given as a string
+            this will be assumed to be for the component belonging to the dataset
+            (not external links).
+        subset_state : `SubsetState`
+            If specified, the statistics will only include the values that are
+            in the subset specified by this subset state.
+        axis : None or int or tuple of int
+            If specified, the axis/axes to compute the statistics over.
+        finite : bool, optional
+            Whether to include only finite values in the statistics. This should
+            be `True` to ignore NaN/Inf values
+        positive : bool, optional
+            Whether to include only (strictly) positive values in the
+            statistics. This is used for example when computing statistics of
+            data shown in log space.
+        percentile : float or iterable of float, optional
+            If ``statistics`` includes ``'percentile'``, the ``percentile``
+            argument should be given and specify the percentile to calculate in
+            the range [0:100]. If several percentiles are requested, this
+            should be an iterable giving the percentiles in the same order as
+            the ``'percentile'`` entries in ``statistics``.
+        random_subset : int, optional
+            If specified, this should be an integer giving the number of values
+            to use for the statistics. This can only be used if ``axis`` is
+            `None`
+        n_chunk_max : int, optional
+            If there are more elements in the array than this value, operate in
+            chunks with at most this size.
+
+        Returns
+        -------
+        results : list
+            The values of the statistics, in the same order as ``statistics``.
+        """
+
+        statistics = list(statistics)
 
         # TODO: generalize chunking to more types of axis
 
@@ -1643,7 +1765,7 @@ class Data(BaseCartesianData):
 
             if not efficient_subset_state:
 
-                result = np.zeros(self.shape[axis_index])
+                results = [np.zeros(self.shape[axis_index]) for statistic in statistics]
 
                 chunk_shape = list(self.shape)
 
@@ -1653,12 +1775,14 @@ class Data(BaseCartesianData):
                 chunk_shape[axis_index] = max(1, int(chunk_shape[axis_index] / n_chunks))
 
                 for chunk_view in iterate_chunks(self.shape, chunk_shape=chunk_shape):
-                    values = self.compute_statistic(statistic, cid, subset_state=subset_state,
-                                                    axis=axis, finite=finite, positive=positive,
-                                                    percentile=percentile, view=chunk_view)
-                    result[chunk_view[axis_index]] = values
+                    check_cancelled()
+                    values = self.compute_statistics(statistics, cid, subset_state=subset_state,
+                                                     axis=axis, finite=finite, positive=positive,
+                                                     percentile=percentile, view=chunk_view)
+                    for result, value in zip(results, values):
+                        result[chunk_view[axis_index]] = value
 
-                return result
+                return results
 
         # We initialize subarray_slices here because if it is set at any point
         # later we will need to pad out the result of compute_statistic.
@@ -1751,12 +1875,12 @@ class Data(BaseCartesianData):
 
                 else:
                     if axis is None:
-                        return np.nan
+                        return [np.nan] * len(statistics)
                     else:
                         if isinstance(axis, int):
                             axis = [axis]
                         final_shape = [mask.shape[i] for i in range(mask.ndim) if i not in axis]
-                        return broadcast_to(np.nan, final_shape)
+                        return [broadcast_to(np.nan, final_shape)] * len(statistics)
         else:
             data = self.get_data(cid, view=view)
             mask = None
@@ -1771,7 +1895,7 @@ class Data(BaseCartesianData):
             data = unbroadcast(data)
 
         if random_subset and data.size > random_subset:
-            if DASK_INSTALLED and isinstance(data, da.Array):
+            if is_dask_array(data):
                 if not hasattr(self, '_random_subset_indices') or self._random_subset_indices[0] != data.size:
                     self._random_subset_indices = (data.size, random_views_for_dask_array(data, random_subset, n_chunks=10))
                 data = np.hstack([data[slices].ravel() for slices in self._random_subset_indices[1]])
@@ -1784,30 +1908,34 @@ class Data(BaseCartesianData):
                 if mask is not None:
                     mask = mask.ravel(order="K")[self._random_subset_indices[1]]
 
-        result = compute_statistic(statistic, data, mask=mask, axis=axis, finite=finite,
-                                   positive=positive, percentile=percentile)
+        results = compute_statistics(statistics, data, mask=mask, axis=axis, finite=finite,
+                                     positive=positive, percentile=percentile)
 
         if subarray_slices is None or axis is None:
-            return result
+            return results
         else:
             # Since subarray_slices was set above, we need to determine the
             # shape of the full results had subarray_slices not been set,
-            # then insert the result into it. If axis is None, then we don't
+            # then insert the results into it. If axis is None, then we don't
             # need to do anything, and this is covered by the first clause
             # of the if statement above.
             if not isinstance(axis, tuple):
                 axis = (axis,)
             full_shape = [self.shape[idim] for idim in range(self.ndim) if idim not in axis]
-            full_result = np.zeros(full_shape) * np.nan
-            result_slices = [subarray_slices[idim] for idim in range(self.ndim) if idim not in axis]
-            full_result[result_slices] = result
-            return full_result
+            result_slices = tuple(subarray_slices[idim] for idim in range(self.ndim) if idim not in axis)
+            full_results = []
+            for result in results:
+                full_result = np.zeros(full_shape) * np.nan
+                full_result[result_slices] = result
+                full_results.append(full_result)
+            return full_results
 
-    def compute_histogram(self, cids, weights=None, range=None, bins=None, log=None, subset_state=None):
+    def compute_histogram(self, cids, weights=None, range=None, bins=None, log=None,
+                          subset_state=None, n_chunk_max=40000000):
         """
         Compute an n-dimensional histogram with regularly spaced bins.
 
-        Currently this only implements 1-D histograms.
+        Currently this only implements 1-D and 2-D histograms.
 
         Parameters
         ----------
@@ -1824,121 +1952,120 @@ class Data(BaseCartesianData):
         subset_state : `SubsetState`, optional
             If specified, the histogram will only take into account values in
             the subset state.
+        n_chunk_max : int, optional
+            If there are more elements in the array than this value, the
+            histogram is accumulated over chunks with at most this size, so
+            that the full arrays and subset mask never need to be loaded into
+            memory at once.
         """
 
         if len(cids) > 2:
             raise NotImplementedError()
 
-        ndim = len(cids)
+        range = [sorted(r) for r in range]
 
-        x = self.get_data(cids[0])
-        if isinstance(x, categorical_ndarray):
-            x = x.codes
+        if log is not None:
+            for (vmin, vmax), use_log in zip(range, log):
+                if use_log and (vmin < 0 or vmax < 0):
+                    return np.zeros(bins)
 
-        if ndim > 1:
-            y = self.get_data(cids[1])
-            if isinstance(y, categorical_ndarray):
-                y = y.codes
+        result = np.zeros(bins)
 
-        if weights is not None:
-            w = self.get_data(weights)
-            if isinstance(w, categorical_ndarray):
-                w = w.codes
+        if self.size > n_chunk_max:
+            views = iterate_chunks(self.shape, n_max=n_chunk_max)
         else:
-            w = None
+            views = [None]
 
-        if subset_state is not None:
-            mask = subset_state.to_mask(self)
-            if DASK_INSTALLED and isinstance(x, da.Array) and not isinstance(mask, da.Array):
-                x = x[da.asarray(mask)]
-            else:
-                x = x[mask]
-            if ndim > 1:
-                if DASK_INSTALLED and isinstance(y, da.Array) and not isinstance(mask, da.Array):
-                    y = y[da.asarray(mask)]
-                else:
-                    y = y[mask]
-            if w is not None:
-                if DASK_INSTALLED and isinstance(w, da.Array) and not isinstance(mask, da.Array):
-                    w = w[da.asarray(mask)]
-                else:
-                    w = w[mask]
+        for view in views:
+            check_cancelled()
+            chunk_result = self._compute_histogram_chunk(cids, weights=weights, range=range,
+                                                         bins=bins, log=log,
+                                                         subset_state=subset_state,
+                                                         view=view)
+            if chunk_result is not None:
+                result += chunk_result
 
-        if ndim == 1:
-            xmin, xmax = range[0]
-            xmin, xmax = sorted((xmin, xmax))
-            keep = (x >= xmin) & (x <= xmax)
-        else:
-            (xmin, xmax), (ymin, ymax) = range
-            xmin, xmax = sorted((xmin, xmax))
-            ymin, ymax = sorted((ymin, ymax))
-            keep = (x >= xmin) & (x <= xmax) & (y >= ymin) & (y <= ymax)
-
-        if x.dtype.kind == 'M':
-            x = datetime64_to_mpl(x)
-            xmin = datetime64_to_mpl(xmin)
-            xmax = datetime64_to_mpl(xmax)
+        return result
+
+    def _compute_histogram_chunk(self, cids, weights=None, range=None, bins=None,
+                                 log=None, subset_state=None, view=None):
+        """
+        Compute the histogram for the values in the region of the data given
+        by ``view``. Returns `None` if there are no values to include.
+        """
+
+        ndim = len(cids)
+
+        arrays = [self.get_data(cid, view=view) for cid in cids]
+
+        if weights is not None:
+            arrays.append(self.get_data(weights, view=view))
+
+        if subset_state is not None:
+            mask = subset_state.to_mask(self, view=view)
         else:
-            keep &= ~np.isnan(x)
+            mask = None
+
+        # For now, compute dask arrays at this point, one chunk at a time. In
+        # future we could delegate the histogram calculation to dask.
+        if is_dask_array(mask):
+            mask = mask.compute()
+        arrays = [array.compute() if is_dask_array(array) else array
+                  for array in arrays]
+
+        arrays = [array.codes if isinstance(array, categorical_ndarray) else array
+                  for array in arrays]
+
+        if mask is not None:
+            arrays = [array[mask] for array in arrays]
+
+        keep = None
+        hist_range = []
+
+        for idim, (vmin, vmax) in enumerate(range):
+
+            values = arrays[idim]
 
-        if ndim > 1:
-            if y.dtype.kind == 'M':
-                y = datetime64_to_mpl(y)
-                ymin = datetime64_to_mpl(ymin)
-                ymax = datetime64_to_mpl(ymax)
+            if keep is None:
+                keep = (values >= vmin) & (values <= vmax)
             else:
-                keep &= ~np.isnan(y)
-
-        x = x[keep]
-        if ndim > 1:
-            y = y[keep]
-        if w is not None:
-            w = w[keep]
-
-        # For now, compute dask arrays at this point. In future we could delegate
-        # the histogram calculation to dask.
-        if DASK_INSTALLED:
-            if isinstance(x, da.Array):
-                x = x.compute()
-            if ndim > 1 and isinstance(y, da.Array):
-                x = x.compute()
-            if isinstance(w, da.Array):
-                w = w.compute()
-
-        if len(x) == 0:
-            return np.zeros(bins)
-
-        if ndim > 1 and len(y) == 0:
-            return np.zeros(bins)
-
-        if log is not None and log[0]:
-            if xmin < 0 or xmax < 0:
-                return np.zeros(bins)
-            xmin = np.log10(xmin)
-            xmax = np.log10(xmax)
-            x = np.log10(x)
-
-        if ndim > 1 and log is not None and log[1]:
-            if ymin < 0 or ymax < 0:
-                return np.zeros(bins)
-            ymin = np.log10(ymin)
-            ymax = np.log10(ymax)
-            y = np.log10(y)
-
-        # By default fast-histogram drops values that are exactly xmax, so we
-        # increase xmax very slightly to make sure that this doesn't happen, to
-        # be consistent with np.histogram.
-        if ndim >= 1:
-            xmax += 10 * np.spacing(xmax)
-        if ndim >= 2:
-            ymax += 10 * np.spacing(ymax)
+                keep &= (values >= vmin) & (values <= vmax)
+
+            if values.dtype.kind == 'M':
+                values = datetime64_to_mpl(values)
+                vmin = datetime64_to_mpl(vmin)
+                vmax = datetime64_to_mpl(vmax)
+            else:
+                keep &= ~np.isnan(values)
+
+            arrays[idim] = values
+            hist_range.append((vmin, vmax))
+
+        arrays = [array[keep] for array in arrays]
+
+        if len(arrays[0]) == 0:
+            return None
+
+        for idim, (vmin, vmax) in enumerate(hist_range):
+
+            if log is not None and log[idim]:
+                vmin = np.log10(vmin)
+                vmax = np.log10(vmax)
+                arrays[idim] = np.log10(arrays[idim])
+
+            # By default fast-histogram drops values that are exactly xmax, so
+            # we increase xmax very slightly to make sure that this doesn't
+            # happen, to be consistent with np.histogram.
+            vmax += 10 * np.spacing(vmax)
+
+            hist_range[idim] = (vmin, vmax)
+
+        w = arrays[ndim] if weights is not None else None
 
         if ndim == 1:
-            range = (xmin, xmax)
-            return histogram1d(x, range=range, bins=bins[0], weights=w)
-        elif ndim > 1:
-            range = [(xmin, xmax), (ymin, ymax)]
-            return histogram2d(x, y, range=range, bins=bins, weights=w)
+            return histogram1d(arrays[0], range=hist_range[0], bins=bins[0], weights=w)
+        else:
+            return histogram2d(arrays[0], arrays[1], range=hist_range, bins=bins, weights=w)
 
     def compute_fixed_resolution_buffer(self, *args, **kwargs):
         from .fixed_resolution_buffer import compute_fixed_resolution_buffer
@@ -1974,3 +2101,73 @@ def pixel_label(i, ndim):
     if 1 <= ndim <= 3:
         label += " [{0}]".format('xyz'[ndim - 1 - i])
     return label
+
+
+def _changed_region(arrays, old_shape, new_shape):
+    """
+    Given pairs of old and new arrays, return the region (as a tuple of
+    slices in the new arrays) outside of which the values are unchanged. The
+    old and new arrays should have shapes ``old_shape`` and ``new_shape``,
+    which can only differ along the first dimension. If items have been
+    removed, `None` is returned since the region doesn't cover the change.
+    """
+
+    n_old, n_new = old_shape[0], new_shape[0]
+
+    if n_new < n_old:
+        return None
+
+    start = min(n_old, n_new)
+    end = 0
+
+    for old, new in arrays:
+        # If the array was modified in-place, we can't tell what changed
+        if np.may_share_memory(old, new):
+            return (slice(0, n_new),) + (slice(None),) * (len(new_shape) - 1)
+        start = min(start, _n_equal_rows(old, new))
+        if n_old == n_new and start < n_new:
+            end = max(end, n_new - _n_equal_rows(old, new, reverse=True))
+
+    if n_old != n_new:
+        end = n_new
+    else:
+        end = max(start, end)
+
+    return (slice(start, end),) + (slice(None),) * (len(new_shape) - 1)
+
+
+def _n_equal_rows(old, new, reverse=False, n_chunk_max=10000000):
+    """
+    Return the number of leading (or trailing, if ``reverse`` is `True`)
+    items along the first axis for which two arrays are identical, comparing
+    at most ``n_chunk_max`` values at a time. The arrays should have the same
+    shape except along the first dimension.
+    """
+
+    n = min(old.shape[0], new.shape[0])
+
+    if n == 0 or old.dtype.kind != new.dtype.kind:
+        return 0
+
+    if reverse:
+        old, new = old[::-1], new[::-1]
+
+    row_size = max(1, int(np.prod(old.shape[1:])))
+    chunk = max(1, n_chunk_max // row_size)
+
+    for start in range(0, n, chunk):
+        stop = min(start + chunk, n)
+        a, b = old[start:stop], new[start:stop]
+        try:
+            equal = np.asarray(a == b)
+            if equal.shape != a.shape:
+                return start
+            if a.dtype.kind in 'fc':
+                equal |= np.isnan(a) & np.isnan(b)
+        except Exception:
+            return start
+        equal = equal.reshape((equal.shape[0], -1)).all(axis=1)
+        if not equal.all():
+            return start + int(np.argmin(equal))
+
+    return n
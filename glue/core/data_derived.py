@@ -188,6 +188,11 @@ class IndexedData(BaseCartesianData, HubListener):
         kwargs['view'] = self._to_original_view(kwargs.get('view'))
         return self._original_data.compute_statistic(statistic, cid, **kwargs)
 
+    def compute_statistics(self, statistics, cid, **kwargs):
+        cid = self._translate_cid(cid)
+        kwargs['view'] = self._to_original_view(kwargs.get('view'))
+        return self._original_data.compute_statistics(statistics, cid, **kwargs)
+
     def compute_histogram(self, *args, **kwargs):
         if kwargs.get('subset_state') is None:
             kwargs['subset_state'] = self._indices_subset_state
@@ -1,9 +1,15 @@
 import gzip
+import time
 import warnings
+import threading
 from os.path import basename
 from collections import OrderedDict
 
+import numpy as np
+
+from glue.logger import logger
 from glue.core.coordinates import coordinates_from_header, WCSCoordinates
+from glue.core.component import LazyComponent
 from glue.core.data import Component, Data
 from glue.config import data_factory, qglue_parser
 
@@ -47,6 +53,11 @@ def fits_reader(source, auto_merge=False, exclude_exts=None, label=None):
     """
     Read in all extensions from a FITS file.
 
+    When reading from a file, only the headers are read initially, and the
+    values for each image and table column are read the first time they are
+    needed (tile-compressed images are decompressed only for the region being
+    accessed until all the values are needed).
+
     Parameters
     ----------
     source: str or HDUList
@@ -64,17 +75,23 @@ def fits_reader(source, auto_merge=False, exclude_exts=None, label=None):
     """
 
     from astropy.io import fits
-    from astropy.table import Table
 
     exclude_exts = exclude_exts or []
 
     if isinstance(source, fits.hdu.hdulist.HDUList):
         hdulist = source
         close_hdulist = False
+        lazy = False
     else:
         hdulist = fits.open(source, ignore_missing_end=True, mode='denywrite')
         hdulist.verify('fix')
-        close_hdulist = True
+        # The values are read from the open file when needed, so in this case
+        # the file is only closed once the data are no longer used. Compressed
+        # files can't be memory-mapped, so we read these straight away.
+        lazy = _is_uncompressed(source)
+        close_hdulist = not lazy
+
+    reader = _HDUReader(lazy=lazy)
 
     groups = OrderedDict()
     extension_by_shape = OrderedDict()
@@ -120,40 +137,47 @@ def fits_reader(source, auto_merge=False, exclude_exts=None, label=None):
         extension_by_shape[shape] = hdu_name
         return data
 
+    n_hdus = len(hdulist)
+
     for extnum, hdu in enumerate(hdulist):
         hdu_name = hdu.name if hdu.name else "HDU{0}".format(extnum)
-        if (hdu.data is not None and
-                hdu.data.size > 0 and
-                hdu_name not in exclude_exts and
-                extnum not in exclude_exts):
-            if is_image_hdu(hdu):
-                shape = hdu.data.shape
-                coords = coordinates_from_header(hdu.header)
-                units = hdu.header.get('BUNIT')
-                if not auto_merge or has_wcs(coords):
-                    data = new_data(suffix=len(hdulist) > 1)
-                else:
-                    try:
-                        data = groups[extension_by_shape[shape]]
-                    except KeyError:
-                        data = new_data(suffix=len(hdulist) > 1)
-                component = Component.autotyped(hdu.data, units=units)
+        if hdu_name in exclude_exts or extnum in exclude_exts:
+            continue
+        start = time.time()
+        # We only look at the headers here to avoid reading in the data
+        if is_image_hdu(hdu):
+            shape = hdu.shape
+            if len(shape) == 0 or np.prod(shape) == 0:
+                continue
+            coords = coordinates_from_header(hdu.header)
+            units = hdu.header.get('BUNIT')
+            if not auto_merge or has_wcs(coords):
+                data = new_data(suffix=n_hdus > 1)
+            else:
+                try:
+                    data = groups[extension_by_shape[shape]]
+                except KeyError:
+                    data = new_data(suffix=n_hdus > 1)
+            component = reader.image_component(hdu, hdu_name, units=units)
+            data.add_component(component=component,
+                               label=hdu_name)
+        elif is_table_hdu(hdu):
+            if hdu.header.get('NAXIS2', 0) == 0 or len(hdu.columns) == 0:
+                continue
+            # Loop through columns and make component list
+            label = '{0}[{1}]'.format(label_base, hdu_name)
+            data = Data(label=label)
+            groups[hdu_name] = data
+            for column in hdu.columns:
+                if column.dtype.shape != ():
+                    warnings.warn("Dropping column '{0}' since it is not 1-dimensional".format(column.name))
+                    continue
+                component = reader.column_component(hdu, hdu_name, column)
                 data.add_component(component=component,
-                                   label=hdu_name)
-            elif is_table_hdu(hdu):
-                # Loop through columns and make component list
-                table = Table.read(hdu, format='fits')
-                label = '{0}[{1}]'.format(label_base, hdu_name)
-                data = Data(label=label)
-                groups[hdu_name] = data
-                for column_name in table.columns:
-                    column = table[column_name]
-                    if column.ndim != 1:
-                        warnings.warn("Dropping column '{0}' since it is not 1-dimensional".format(column_name))
-                        continue
-                    component = Component.autotyped(column, units=column.unit)
-                    data.add_component(component=component,
-                                       label=column_name)
+                                   label=column.name)
+        else:
+            continue
+        logger.info("Read header of HDU {0} in {1:.3f}s".format(hdu_name, time.time() - start))
 
     if close_hdulist:
         hdulist.close()
@@ -161,6 +185,75 @@ def fits_reader(source, auto_merge=False, exclude_exts=None, label=None):
     return [groups[idx] for idx in groups]
 
 
+class _HDUReader(object):
+    """
+    Create the components for the values in HDUs, either reading the values
+    straight away or the first time they are needed if ``lazy`` is `True`.
+    """
+
+    def __init__(self, lazy=False):
+        self.lazy = lazy
+        # All values are read from the same file so we make sure values are
+        # only read from one thread at a time.
+        self._lock = threading.Lock()
+
+    def _timed(self, description, function, *args):
+        with self._lock:
+            start = time.time()
+            values = function(*args)
+            logger.info("Read {0} in {1:.3f}s".format(description, time.time() - start))
+        return values
+
+    def image_component(self, hdu, hdu_name, units=None):
+
+        description = 'values of HDU {0}'.format(hdu_name)
+
+        if not self.lazy:
+            return Component.autotyped(self._timed(description, getattr, hdu, 'data'), units=units)
+
+        def loader():
+            return self._timed(description, getattr, hdu, 'data')
+
+        if is_compressed_image_hdu(hdu) and hasattr(hdu, 'section'):
+            def section(view):
+                return self._timed('section of HDU {0}'.format(hdu_name),
+                                   hdu.section.__getitem__, view)
+        else:
+            section = None
+
+        return LazyComponent(loader, hdu.shape, units=units, section=section)
+
+    def column_component(self, hdu, hdu_name, column):
+
+        from astropy import units as u
+
+        if column.unit:
+            units = u.Unit(column.unit, format='fits', parse_strict='silent')
+        else:
+            units = None
+
+        description = "column '{0}' of HDU {1}".format(column.name, hdu_name)
+
+        def loader():
+            return self._timed(description, _read_column, hdu, column.name)
+
+        # Only purely numerical columns can be read lazily, since for other
+        # columns we need to look at the values to find the component type.
+        if self.lazy and column.dtype.kind in 'iuf':
+            return LazyComponent(loader, (hdu.header['NAXIS2'],), units=units)
+        else:
+            return Component.autotyped(loader(), units=units)
+
+
+def _read_column(hdu, name):
+    return np.array(hdu.data[name])
+
+
+def _is_uncompressed(filename):
+    with open(filename, 'rb') as f:
+        return f.read(9) == b'SIMPLE  ='
+
+
 # Utilities
 
 def is_image_hdu(hdu):
@@ -168,6 +261,11 @@ def is_image_hdu(hdu):
     return isinstance(hdu, (PrimaryHDU, ImageHDU, CompImageHDU))
 
 
+def is_compressed_image_hdu(hdu):
+    from astropy.io.fits.hdu import CompImageHDU
+    return isinstance(hdu, CompImageHDU)
+
+
 def is_table_hdu(hdu):
     from astropy.io.fits.hdu import TableHDU, BinTableHDU
     return isinstance(hdu, (TableHDU, BinTableHDU))
@@ -26,8 +26,8 @@ import os
 import warnings
 
 from glue.core.contracts import contract
-from glue.core.coordinates import IdentityCoordinates
-from glue.core.component import CoordinateComponent
+from glue.core.coordinates import IdentityCoordinates, equivalent_coordinates
+from glue.core.component import CoordinateComponent, LazyComponent
 from glue.core.data import Component, BaseData, Data
 from glue.config import auto_refresh, data_factory
 from glue.backends import get_timer
@@ -140,15 +140,29 @@ class LoadLog(object):
         log = as_list(d)[0]._load_log
 
         for dold, dnew in zip(self.data, as_list(d)):
+
             if dold.shape != dnew.shape:
+
+                # If items have been appended to the file and the components
+                # are the same, we can still update the data, keeping the
+                # label that may have been changed.
+                if (dold.ndim == dnew.ndim and dold.shape[1:] == dnew.shape[1:] and
+                        dnew.shape[0] > dold.shape[0] and
+                        [cid.label for cid in dold.components] ==
+                        [cid.label for cid in dnew.components]):
+                    dnew.label = dold.label
+                    dold.update_values_from_data(dnew)
+                    continue
+
                 warnings.warn("Cannot refresh data -- data shape changed")
                 return
 
             mapping = dict((c, log.component(self.id(c)).data)
                            for c in dold._components.values()
                            if c in self.components and
-                           type(c) == Component)
-            dold.coords = dnew.coords
+                           type(c) in (Component, LazyComponent))
+            if not equivalent_coordinates(dold.coords, dnew.coords):
+                dold.coords = dnew.coords
             dold.update_components(mapping)
 
     def __gluestate__(self, context):
@@ -3,7 +3,7 @@ import numpy as np
 import pandas as pd
 
 from glue.core.data_factories.helpers import has_extension
-from glue.core.component import Component, CategoricalComponent
+from glue.core.component import Component, CategoricalComponent, TypeInference
 from glue.core.data import Data
 from glue.config import data_factory, data_translator
 
@@ -21,13 +21,20 @@ def panda_process(indf):
 
         if (column.dtype == np.object) | (column.dtype == np.bool):
 
-            # try to salvage numerical data
-            try:
-                coerced = pd.to_numeric(column, errors='coerce')
-            except AttributeError:  # pandas < 0.19
-                coerced = column.convert_objects(convert_numeric=True)
+            # try to salvage numerical data - we first check on a sample of
+            # the values whether this is worth converting the whole column.
+            if column.dtype == np.object:
+                inference = TypeInference(threshold=0.6)
+                inference.update(column.values)
+                numerical = not inference.categorical
+            else:
+                numerical = False
 
-            if (coerced.dtype != column.dtype) and coerced.isnull().mean() < 0.4:
+            if numerical:
+                try:
+                    coerced = pd.to_numeric(column, errors='coerce')
+                except AttributeError:  # pandas < 0.19
+                    coerced = column.convert_objects(convert_numeric=True)
                 c = Component(coerced.values)
             else:
                 # pandas has a 'special' nan implementation and this doesn't
@@ -184,6 +184,25 @@ def test_data_reload():
     assert_array_equal(d['b'], [0, 0, 0, 0, 0])
 
 
+def test_data_reload_appended():
+
+    # If rows are appended to a file, the data should be updated in-place
+
+    data = b'#a, b\n0, 1\n2, 3\n3, 4'
+    with make_file(data, '.csv') as fname:
+        d = df.load_data(fname)
+        d.label = 'renamed'
+        a_id = d.id['a']
+        with open(fname, 'w') as f2:
+            f2.write('#a, b\n0, 1\n2, 3\n3, 4\n5, 6\n7, 8')
+        d._load_log.reload()
+
+    assert d.label == 'renamed'
+    assert d.id['a'] is a_id
+    assert_array_equal(d['a'], [0, 2, 3, 5, 7])
+    assert_array_equal(d['b'], [1, 3, 4, 6, 8])
+
+
 @pytest.mark.skipif(sys.platform.startswith('win'), reason='file deletion doesn\'t work on Windows')
 def test_data_reload_no_file():
     data = b'#a, b\n0, 1\n2, 3\n3, 4\n5, 6\n7, 8'
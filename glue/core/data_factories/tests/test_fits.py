@@ -10,6 +10,7 @@ from glue.core import data_factories as df
 
 from glue.tests.helpers import requires_astropy, make_file
 
+from ...component import Component, LazyComponent
 from ..fits import fits_reader
 
 
@@ -205,6 +206,55 @@ def test_fits_vector():
         df.load_data(os.path.join(DATA, 'events.fits'), factory=df.fits_reader)
 
 
+@requires_astropy
+def test_fits_lazy():
+
+    # Values should only be read from the file when they are needed
+
+    d_set = fits_reader(os.path.join(DATA, 'generic.fits'), exclude_exts=['TWOD'])
+
+    assert [d.label for d in d_set] == ['generic[ONED]', 'generic[THREED]', 'generic[ATAB]']
+
+    for data in d_set:
+        for cid in data.main_components:
+            assert isinstance(data.get_component(cid), LazyComponent)
+            assert not data.get_component(cid).loaded
+
+    oned = d_set[0]
+    oned.compute_statistic('maximum', oned.id['ONED'])
+    assert oned.get_component(oned.id['ONED']).loaded
+    assert not d_set[1].get_component(d_set[1].id['THREED']).loaded
+
+
+@requires_astropy
+def test_fits_compressed_section():
+
+    # Compressed images should be decompressed only as needed
+
+    from astropy.io import fits
+
+    with fits.open(os.path.join(DATA, 'compressed_image.fits')) as hdulist:
+        expected = hdulist[1].data
+
+    data = fits_reader(os.path.join(DATA, 'compressed_image.fits'))[0]
+    cid = data.main_components[0]
+
+    assert_array_equal(data.get_data(cid, view=(slice(1, 3), 0)), expected[1:3, 0])
+    assert not data.get_component(cid).loaded
+
+    assert_array_equal(data.get_data(cid), expected)
+    assert data.get_component(cid).loaded
+
+
+@requires_astropy
+def test_fits_lazy_clone():
+    from glue.core.tests.test_state import clone
+    data = fits_reader(os.path.join(DATA, 'generic.fits'))[0]
+    data_new = clone(data)
+    assert type(data_new.get_component('ONED')) is Component
+    assert_array_equal(data_new['ONED'], data['ONED'])
+
+
 @requires_astropy
 def test_save_meta():
     # Regression test for a bug that causes Data.meta to contain non-string
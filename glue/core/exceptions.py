@@ -17,3 +17,7 @@ class InvalidSubscriber(Exception):
 
 class InvalidMessage(Exception):
     pass
+
+
+class ComputationCancelled(Exception):
+    pass
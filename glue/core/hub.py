@@ -1,6 +1,6 @@
 import logging
 from contextlib import contextmanager
-from weakref import WeakKeyDictionary
+from weakref import WeakKeyDictionary, ref
 from inspect import getmro
 from collections import Counter
 
@@ -10,6 +10,8 @@ from glue.core.hub_callback_container import HubCallbackContainer
 
 __all__ = ['Hub', 'HubListener']
 
+logger = logging.getLogger(__name__)
+
 
 class Hub(object):
 
@@ -39,11 +41,18 @@ class Hub(object):
         # Dictionary of subscriptions
         self._subscriptions = WeakKeyDictionary()
 
+        # Routing table giving, for each concrete message type that has been
+        # broadcast, the subscribers interested in it. This is reset whenever
+        # subscriptions change.
+        self._routes = {}
+
         self._paused = False
         self._queue = []
 
         self._ignore = Counter()
 
+        self._coalesced = Counter()
+
         from glue.core.data import BaseData
         from glue.core.subset import Subset
         from glue.core.data_collection import DataCollection
@@ -104,8 +113,7 @@ class Hub(object):
                 not issubclass(message_class, Message):
             raise InvalidMessage("message class must be a subclass of "
                                  "glue.Message: %s" % type(message_class))
-        logging.getLogger(__name__).info("Subscribing %s to %s",
-                                         subscriber, message_class.__name__)
+        logger.info("Subscribing %s to %s", subscriber, message_class.__name__)
 
         if not handler:
             handler = subscriber.notify
@@ -114,6 +122,7 @@ class Hub(object):
             self._subscriptions[subscriber] = HubCallbackContainer()
 
         self._subscriptions[subscriber][message_class] = handler, filter
+        self._routes.clear()
 
     def is_subscribed(self, subscriber, message):
         """
@@ -148,6 +157,7 @@ class Hub(object):
             return
         if message in self._subscriptions[subscriber]:
             self._subscriptions[subscriber].pop(message)
+            self._routes.clear()
 
     def unsubscribe_all(self, subscriber):
         """
@@ -155,27 +165,54 @@ class Hub(object):
         """
         if subscriber in self._subscriptions:
             self._subscriptions.pop(subscriber)
+            self._routes.clear()
 
-    def _find_handlers(self, message):
-        """Yields all (subscriber, handler) pairs that should receive a message
+    def _get_routes(self, message_type):
         """
+        Return a list of (subscriber reference, subscriptions, message class)
+        tuples for all subscribers interested in a given message type, where
+        the message class is the most-specific class subscribed to.
+        """
+        try:
+            return self._routes[message_type]
+        except KeyError:
+            pass
+
         # self._subscriptions:
         # subscriber => { message type => (filter, handler)}
 
-        # loop over subscribed objects
+        routes = []
         for subscriber, subscriptions in list(self._subscriptions.items()):
+            candidate = _most_specific(subscriptions, message_type)
+            if candidate is not None:
+                routes.append((ref(subscriber), subscriptions, candidate))
 
-            # subscriptions to message or its superclasses
-            messages = [msg for msg in subscriptions.keys() if
-                        issubclass(type(message), msg)]
+        self._routes[message_type] = routes
 
-            if len(messages) == 0:
+        return routes
+
+    def _find_handlers(self, message):
+        """Yields all (subscriber, handler) pairs that should receive a message
+        """
+
+        for subscriber, subscriptions, candidate in self._get_routes(type(message)):
+
+            subscriber = subscriber()
+            if subscriber is None:
                 continue
 
-            # narrow to the most-specific message
-            candidate = max(messages, key=_mro_count)
+            try:
+                handler, test = subscriptions[candidate]
+            except KeyError:
+                # The subscription was removed since the routing table was
+                # computed, for example because the handler was garbage
+                # collected, so fall back to any remaining subscription.
+                self._routes.clear()
+                candidate = _most_specific(subscriptions, type(message))
+                if candidate is None:
+                    continue
+                handler, test = subscriptions[candidate]
 
-            handler, test = subscriptions[candidate]
             if test(message):
                 yield subscriber, handler
 
@@ -189,15 +226,62 @@ class Hub(object):
 
     @contextmanager
     def delay_callbacks(self):
+        """
+        Context manager to delay broadcasting messages until the end of the
+        block.
+
+        Queued messages are coalesced before being broadcast: messages with
+        the same :meth:`~glue.core.message.Message.merge_key` are merged into
+        the last one, and messages superseded by a later message (see
+        :meth:`~glue.core.message.Message.supersedes`) are dropped. The number
+        of messages dropped for each message class is recorded in
+        :attr:`coalesced_messages`. Nested calls only broadcast the messages
+        when exiting the outermost block.
+        """
+        paused = self._paused
         self._paused = True
         try:
             yield
         finally:
-            self._paused = False
-            # TODO: could de-duplicate messages here
-            for message in self._queue:
-                self.broadcast(message)
-            self._queue = []
+            self._paused = paused
+            if not paused:
+                queue, self._queue = self._queue, []
+                for message in self._coalesce(queue):
+                    self.broadcast(message)
+
+    @property
+    def coalesced_messages(self):
+        """
+        A :class:`~collections.Counter` giving, for each message class, the
+        number of messages dropped when coalescing delayed messages.
+        """
+        return self._coalesced
+
+    def _coalesce(self, messages):
+
+        kept = []
+        positions = {}
+
+        for message in messages:
+
+            if type(message).supersedes is not Message.supersedes:
+                for index, previous in enumerate(kept):
+                    if previous is not None and message.supersedes(previous):
+                        self._drop(kept, index)
+
+            key = message.merge_key()
+            if key is not None:
+                if key in positions and kept[positions[key]] is not None:
+                    self._drop(kept, positions[key])
+                positions[key] = len(kept)
+
+            kept.append(message)
+
+        return [message for message in kept if message is not None]
+
+    def _drop(self, messages, index):
+        self._coalesced[type(messages[index])] += 1
+        messages[index] = None
 
     def broadcast(self, message):
         """Broadcasts a message to all subscribed objects.
@@ -210,7 +294,8 @@ class Hub(object):
         elif self._paused:
             self._queue.append(message)
         else:
-            logging.getLogger(__name__).info("Broadcasting %s", message)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Broadcasting %s", message)
             for subscriber, handler in self._find_handlers(message):
                 handler(message)
 
@@ -223,6 +308,7 @@ class Hub(object):
         """
         result = self.__dict__.copy()
         result['_subscriptions'] = self._subscriptions.copy()
+        result['_routes'] = {}
         for s in self._subscriptions:
             try:
                 module = s.__module__
@@ -255,3 +341,21 @@ class HubListener(object):
 
 def _mro_count(obj):
     return len(getmro(obj))
+
+
+def _most_specific(subscriptions, message_type):
+    """
+    Given the subscriptions of a subscriber, return the most-specific message
+    class subscribed to that matches the message type, or `None` if there is
+    no such message class.
+    """
+
+    # subscriptions to message or its superclasses
+    messages = [msg for msg in subscriptions.keys() if
+                issubclass(message_type, msg)]
+
+    if len(messages) == 0:
+        return None
+
+    # narrow to the most-specific message
+    return max(messages, key=_mro_count)
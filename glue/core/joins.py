@@ -1,7 +1,14 @@
+from weakref import WeakKeyDictionary
+
 import numpy as np
 from glue.core.exceptions import IncompatibleAttribute
 
-__all__ = ['get_mask_with_key_joins']
+__all__ = ['JoinIndex', 'get_join_index', 'invalidate_join_indices',
+           'get_mask_with_key_joins']
+
+# Join indices for each dataset, along with the version of the data they were
+# built for, keyed by the tuple of key component IDs
+_JOIN_INDICES = WeakKeyDictionary()
 
 
 def concatenate_arrays(*arrays):
@@ -30,6 +37,131 @@ def concatenate_arrays(*arrays):
     return buffer_as_struct.view('S{0}'.format(total_size))
 
 
+def _comparable(dtype1, dtype2):
+    """
+    Whether values with the two dtypes can be compared to each other.
+    """
+    if dtype1.kind in 'biufc' and dtype2.kind in 'biufc':
+        return True
+    return dtype1.kind == dtype2.kind or 'O' in (dtype1.kind, dtype2.kind)
+
+
+class JoinIndex(object):
+    """
+    An index mapping the values of a key to the positions of the items with
+    these values.
+
+    Parameters
+    ----------
+    keys : `~numpy.ndarray`
+        The one-dimensional array of keys to index.
+    """
+
+    def __init__(self, keys):
+        keys = np.asarray(keys)
+        self.size = keys.size
+        try:
+            self._order = np.argsort(keys, kind='stable')
+        except TypeError:  # keys of types that can't be ordered
+            self._order = np.arange(keys.size)
+            self._ordered = False
+        else:
+            self._ordered = True
+        self._sorted = keys[self._order]
+
+    def lookup(self, values):
+        """
+        Return the positions of all items with a key in ``values``.
+
+        This takes a time proportional to the number of values and matches
+        (and logarithmic in the number of keys).
+        """
+
+        values = np.asarray(values).ravel()
+
+        # Values can't match keys of an incompatible type (for example strings
+        # and numbers), and trying to order them would fail or give
+        # meaningless results.
+        if not _comparable(self._sorted.dtype, values.dtype):
+            return self._order[:0]
+
+        if self._ordered:
+            try:
+                return self._lookup_sorted(np.unique(values))
+            except TypeError:
+                pass
+
+        # Objects of different types can't always be ordered, so in this case
+        # we fall back to checking each key against the set of values.
+        values = set(values.tolist())
+        return self._order[np.array([key in values for key in self._sorted.tolist()],
+                                    dtype=bool)]
+
+    def _lookup_sorted(self, values):
+
+        # NaN values are never considered to match
+        if values.dtype.kind in 'fc':
+            values = values[~np.isnan(values)]
+
+        start = np.searchsorted(self._sorted, values, side='left')
+        stop = np.searchsorted(self._sorted, values, side='right')
+        counts = stop - start
+
+        # Expand the [start:stop] ranges into a single array of indices
+        offsets = np.repeat(start - (np.cumsum(counts) - counts), counts)
+        return self._order[np.arange(counts.sum()) + offsets]
+
+    def mask(self, values):
+        """
+        Return a boolean mask of the items with a key in ``values``.
+        """
+        mask = np.zeros(self.size, dtype=bool)
+        mask[self.lookup(values)] = True
+        return mask
+
+
+def get_join_index(data, cids):
+    """
+    Return the :class:`JoinIndex` for the given key components of a dataset.
+
+    The index is built the first time it is needed, and rebuilt if the values
+    in the dataset change. If several components are given, the key for each
+    item is the concatenation of the values in each component.
+    """
+
+    cids = tuple(cids)
+
+    data_version = getattr(data, '_data_version', 0)
+
+    # All the indices for a dataset are dropped when its values change
+    version, indices = _JOIN_INDICES.get(data, (None, None))
+    if version != data_version:
+        indices = {}
+        _JOIN_INDICES[data] = (data_version, indices)
+
+    if cids in indices:
+        return indices[cids]
+
+    keys = [data.get_data(cid).ravel() for cid in cids]
+
+    if len(keys) == 1:
+        index = JoinIndex(keys[0])
+    else:
+        index = JoinIndex(concatenate_arrays(*keys))
+
+    indices[cids] = index
+
+    return index
+
+
+def invalidate_join_indices(data):
+    """
+    Drop the join indices for a dataset, for example when its values change or
+    components are removed.
+    """
+    _JOIN_INDICES.pop(data, None)
+
+
 def get_mask_with_key_joins(data, key_joins, subset_state, view=None):
     """
     Given a dataset and a subset state, check whether the subset state
@@ -52,49 +184,34 @@ def get_mask_with_key_joins(data, key_joins, subset_state, view=None):
         finally:
             data._recursing = False
 
-        if len(cid1) == 1 and len(cid2) == 1:
-
-            key_left = data.get_data(cid1[0], view=view)
-            key_right = other.get_data(cid2[0], view=mask_right)
-            mask = np.in1d(key_left.ravel(), key_right.ravel())
-
-            return mask.reshape(key_left.shape)
-
-        elif len(cid1) == len(cid2):
+        # We look up the keys of the selected items in the other dataset in an
+        # index of the keys of this dataset, which is only built once.
 
-            key_left_all = []
-            key_right_all = []
+        if len(cid1) == len(cid2):
 
-            for cid1_i, cid2_i in zip(cid1, cid2):
-                key_left_all.append(data.get_data(cid1_i, view=view).ravel())
-                key_right_all.append(other.get_data(cid2_i, view=mask_right).ravel())
+            keys_right = [other.get_data(cid2_i, view=mask_right).ravel() for cid2_i in cid2]
 
-            key_left_all = concatenate_arrays(*key_left_all)
-            key_right_all = concatenate_arrays(*key_right_all)
+            if len(keys_right) == 1:
+                keys_right = keys_right[0]
+            else:
+                keys_right = concatenate_arrays(*keys_right)
 
-            mask = np.in1d(key_left_all, key_right_all)
-
-            return mask.reshape(data.get_data(cid1_i, view=view).shape)
+            mask = get_join_index(data, cid1).mask(keys_right)
 
         elif len(cid1) == 1:
 
-            key_left = data.get_data(cid1[0], view=view).ravel()
-            mask = np.zeros_like(key_left, dtype=bool)
-            for cid2_i in cid2:
-                key_right = other.get_data(cid2_i, view=mask_right).ravel()
-                mask |= np.in1d(key_left, key_right)
+            keys_right = np.hstack([other.get_data(cid2_i, view=mask_right).ravel()
+                                    for cid2_i in cid2])
 
-            return mask.reshape(data.get_data(cid1[0], view=view).shape)
+            mask = get_join_index(data, cid1).mask(keys_right)
 
         elif len(cid2) == 1:
 
-            key_right = other.get_data(cid2[0], view=mask_right).ravel()
-            mask = np.zeros_like(data.get_data(cid1[0], view=view).ravel(), dtype=bool)
-            for cid1_i in cid1:
-                key_left = data.get_data(cid1_i, view=view).ravel()
-                mask |= np.in1d(key_left, key_right)
+            keys_right = other.get_data(cid2[0], view=mask_right).ravel()
 
-            return mask.reshape(data.get_data(cid1[0], view=view).shape)
+            mask = np.zeros(data.size, dtype=bool)
+            for cid1_i in cid1:
+                mask |= get_join_index(data, (cid1_i,)).mask(keys_right)
 
         else:
 
@@ -102,4 +219,11 @@ def get_mask_with_key_joins(data, key_joins, subset_state, view=None):
                             "should match, or one of the component sets should ",
                             "contain a single component.")
 
+        mask = mask.reshape(data.shape)
+
+        if view is None:
+            return mask
+        else:
+            return mask[view]
+
     raise IncompatibleAttribute
@@ -15,7 +15,9 @@ The LinkManager autocreates a link from D1.id['x'] to D3.id['z']
 by chaining x2y and y2z.
 """
 
+import weakref
 import logging
+from collections import deque, defaultdict
 
 import numpy as np
 
@@ -32,7 +34,7 @@ from glue.utils import unbroadcast
 from glue.core.coordinate_helpers import dependent_axes
 
 __all__ = ['accessible_links', 'discover_links', 'find_dependents',
-           'LinkManager', 'is_equivalent_cid', 'pixel_cid_to_pixel_cid_matrix']
+           'LinkIndex', 'LinkManager', 'is_equivalent_cid', 'pixel_cid_to_pixel_cid_matrix']
 
 
 def accessible_links(cids, links):
@@ -58,40 +60,96 @@ def discover_links(data, links):
     of ComponentLinks.
 
     :param Data: Data object to discover new components for
-    :param links: Set of ComponentLinks to use
+    :param links: Set of ComponentLinks to use, or a LinkIndex built
+                  from them
 
     :rtype: dict
     A dict of componentID -> componentLink
     The ComponentLink that data can use to generate the componentID.
     """
+    index = links if isinstance(links, LinkIndex) else LinkIndex(links)
+    return index.discover(data.main_components + data.coordinate_components)
 
-    # TODO: try to add shortest paths first -- should
-    # prevent lots of repeated checking
 
-    cids = set(data.main_components + data.coordinate_components)
-    cid_links = {}
-    depth = {}
-    for cid in cids:
-        depth[cid] = 0
+class LinkIndex(object):
+    """
+    An index of a set of links, mapping each component ID to the links that
+    use it as an input.
 
-    while True:
-        for link in accessible_links(cids, links):
+    Building the index once makes it possible to efficiently discover the
+    components that can be derived for many datasets from the same set of
+    links.
+
+    Parameters
+    ----------
+    links : iterable
+        The :class:`~glue.core.component_link.ComponentLink` objects to index
+    """
+
+    def __init__(self, links):
+        self._outgoing = defaultdict(list)
+        self._n_inputs = {}
+        self._sources = []
+        for link in links:
             from_ = set(link.get_from_ids())
-            to_ = link.get_to_id()
-            if len(from_) > 0:
-                cost = max([depth[f] for f in from_]) + 1
+            if len(from_) == 0:
+                self._sources.append(link)
             else:
-                cost = 1
-            if to_ in cids and cost >= depth[to_]:
-                continue
-            depth[to_] = cost
-            cids.add(to_)
-            cid_links[to_] = link
-            break
-        else:
-            # no more links to add
-            break
-    return cid_links
+                self._n_inputs[link] = len(from_)
+                for cid in from_:
+                    self._outgoing[cid].append(link)
+
+    def discover(self, cids):
+        """
+        Find the links to use to derive all the component IDs reachable from
+        a set of component IDs.
+
+        The links are explored breadth-first, so that each component ID is
+        derived using the shortest chain of links.
+
+        Parameters
+        ----------
+        cids : iterable
+            The component IDs that are initially available
+
+        Returns
+        -------
+        cid_links : dict
+            A dict of component ID -> link, giving for each component ID that
+            can be derived the link to use to derive it.
+        """
+
+        depth = dict.fromkeys(cids, 0)
+        queue = deque(depth)
+        cid_links = {}
+
+        # Links without inputs can always be evaluated
+        for link in self._sources:
+            to_ = link.get_to_id()
+            if to_ not in depth:
+                depth[to_] = 1
+                cid_links[to_] = link
+                queue.append(to_)
+
+        # Number of inputs still unavailable for each link
+        remaining = {}
+
+        while queue:
+            cid = queue.popleft()
+            for link in self._outgoing.get(cid, ()):
+                n_remaining = remaining.get(link, self._n_inputs[link]) - 1
+                remaining[link] = n_remaining
+                if n_remaining > 0:
+                    continue
+                # Component IDs are visited in order of increasing depth, so
+                # the current one is the deepest input of the link.
+                to_ = link.get_to_id()
+                if to_ not in depth:
+                    depth[to_] = depth[cid] + 1
+                    cid_links[to_] = link
+                    queue.append(to_)
+
+        return cid_links
 
 
 def find_dependents(data, link):
@@ -138,6 +196,13 @@ class LinkManager(HubListener):
         self.hub = None
         self.trigger = False
         self.data_collection = data_collection
+        # Whether the externally derivable components of all datasets need to
+        # be recomputed, rather than only those of datasets affected by
+        # links being added or removed.
+        self._full_update_needed = True
+        # Cache of the results of equivalent_pixel_cids, indexed by reference
+        # and target dataset.
+        self._pixel_alignment_cache = weakref.WeakKeyDictionary()
 
     def register_to_hub(self, hub):
         self.hub = hub
@@ -167,6 +232,7 @@ class LinkManager(HubListener):
 
     def clear_links(self):
         self._external_links[:] = []
+        self._full_update_needed = True
 
     def add_link(self, link, update_external=True):
         """
@@ -177,29 +243,82 @@ class LinkManager(HubListener):
         link : ComponentLink, LinkCollection, or list thereof
            The link(s) to ingest
         """
+        self._add_link(link)
+        if update_external:
+            self._update_for_added_links(link if isinstance(link, list) else [link])
+        else:
+            self._full_update_needed = True
+
+    def _add_link(self, link):
         if isinstance(link, list):
             for l in link:
-                self.add_link(l, update_external=False)
-            if update_external:
-                self.update_externally_derivable_components()
+                self._add_link(l)
         else:
             if link not in self._external_links and isinstance(link, LinkCollection) or link.inverse not in self._external_links:
                 self._external_links.append(link)
-                if update_external:
-                    self.update_externally_derivable_components()
 
     @contract(link=ComponentLink)
     def remove_link(self, link, update_external=True):
+        self._remove_link(link)
+        if update_external:
+            self._update_for_removed_links(link if isinstance(link, list) else [link])
+        else:
+            self._full_update_needed = True
+
+    def _remove_link(self, link):
         if isinstance(link, list):
             for l in link:
-                self.remove_link(l, update_external=False)
-            if update_external:
-                self.update_externally_derivable_components()
+                self._remove_link(l)
         else:
             logging.getLogger(__name__).debug('removing link %s', link)
             self._external_links.remove(link)
-            if update_external:
-                self.update_externally_derivable_components()
+
+    def _update_for_added_links(self, links):
+        """
+        Update the externally derivable components of only the datasets for
+        which at least one of the added links can be evaluated.
+        """
+        if self._full_update_needed or self.data_collection is None:
+            self.update_externally_derivable_components()
+            return
+        links = _expand_links(links)
+        links.extend([link.inverse for link in links if link.inverse is not None])
+        from_ids = [set(link.get_from_ids()) for link in links]
+        affected = []
+        for data in self._datasets():
+            known = set(data.components) | set(data.externally_derivable_components)
+            if any(from_ <= known for from_ in from_ids):
+                affected.append(data)
+        self._update_datasets(affected)
+
+    def _update_for_removed_links(self, links):
+        """
+        Update the externally derivable components of only the datasets that
+        were using at least one of the removed links.
+        """
+        if self._full_update_needed or self.data_collection is None:
+            self.update_externally_derivable_components()
+            return
+        links = _expand_links(links)
+        links = set(links) | set(link.inverse for link in links if link.inverse is not None)
+        affected = []
+        for data in self._datasets():
+            for comp in data._externally_derivable_components.values():
+                if comp.link in links:
+                    affected.append(data)
+                    break
+        self._update_datasets(affected)
+
+    def _datasets(self, data=None):
+        if self.data_collection is None:
+            if data is None:
+                return []
+            else:
+                data_collection = [data]
+        else:
+            data_collection = self.data_collection
+        # Only keep actual Data instances since only they support links for now
+        return [d for d in data_collection if isinstance(d, Data)]
 
     @contract(data=Data)
     def update_externally_derivable_components(self, data=None):
@@ -222,35 +341,54 @@ class LinkManager(HubListener):
         the data object
         """
 
-        if self.data_collection is None:
-            if data is None:
-                return
-            else:
-                data_collection = [data]
-        else:
-            data_collection = self.data_collection
+        if self.data_collection is None and data is None:
+            return
 
-        # Only keep actual Data instances since only they support links for now
-        data_collection = [d for d in data_collection if isinstance(d, Data)]
+        self._update_datasets(self._datasets(data=data), data=data)
+
+        if self.data_collection is not None:
+            self._full_update_needed = False
 
-        for data in data_collection:
-            links = discover_links(data, self._links | self._inverse_links)
-            comps = {}
-            for cid, link in links.items():
-                d = DerivedComponent(data, link)
-                comps[cid] = d
-            data._set_externally_derivable_components(comps)
+    def _update_datasets(self, datasets, data=None):
 
-        # Now update information about pixel-aligned data
+        if len(datasets) > 0:
+            links = self._links
+            links |= set(link.inverse for link in links if link.inverse is not None)
+            index = LinkIndex(links)
+            for data_ in datasets:
+                links = index.discover(data_.main_components + data_.coordinate_components)
+                comps = {}
+                for cid, link in links.items():
+                    d = DerivedComponent(data_, link)
+                    comps[cid] = d
+                data_._set_externally_derivable_components(comps)
+
+        # Now update information about pixel-aligned data. The results of
+        # equivalent_pixel_cids are cached and only recomputed for datasets
+        # whose components have changed.
+        data_collection = self._datasets(data=data)
         for data1 in data_collection:
             equivalent = {}
             for data2 in data_collection:
                 if data1 is not data2:
-                    order = equivalent_pixel_cids(data2, data1)
+                    order = self._equivalent_pixel_cids(data2, data1)
                     if order is not None:
                         equivalent[data2] = order
             data1._set_pixel_aligned_data(equivalent)
 
+    def _equivalent_pixel_cids(self, reference, target):
+        if reference not in self._pixel_alignment_cache:
+            self._pixel_alignment_cache[reference] = weakref.WeakKeyDictionary()
+        cache = self._pixel_alignment_cache[reference]
+        # The result only depends on the components of the reference dataset
+        # and on the pixel component IDs of the target dataset.
+        key = (reference.data_version, tuple(target.pixel_component_ids))
+        if target in cache and cache[target][0] == key:
+            return cache[target][1]
+        order = equivalent_pixel_cids(reference, target)
+        cache[target] = key, order
+        return order
+
     @property
     def _links(self):
 
@@ -259,16 +397,7 @@ class LinkManager(HubListener):
         else:
             data_links = set(link for data in self.data_collection for link in getattr(data, 'links', []))
 
-        external_links = set()
-
-        for link in self._external_links:
-            if isinstance(link, LinkCollection):
-                for sublink in link:
-                    external_links.add(sublink)
-            else:
-                external_links.add(link)
-
-        return data_links | external_links
+        return data_links | set(_expand_links(self._external_links))
 
     @property
     def _inverse_links(self):
@@ -284,11 +413,27 @@ class LinkManager(HubListener):
 
     def clear(self):
         self._external_links[:] = []
+        self._full_update_needed = True
 
     def __contains__(self, item):
         return item in self._links
 
 
+def _expand_links(links):
+    """
+    Given a list of links and link collections, return a flat list of links.
+    """
+    expanded = []
+    for link in links:
+        if isinstance(link, list):
+            expanded.extend(_expand_links(link))
+        elif isinstance(link, LinkCollection):
+            expanded.extend(link)
+        else:
+            expanded.append(link)
+    return expanded
+
+
 def _find_identical_reference_cid(data, cid):
     """
     Given a dataset and a component ID, return the equivalent component ID that
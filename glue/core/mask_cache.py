@@ -0,0 +1,229 @@
+"""
+A bounded cache for the boolean masks computed by subset states.
+
+Computing the mask for a subset state can be expensive, and the same mask is
+typically requested many times by the different viewers and layer artists, so
+the masks for some subset states are cached. The cache is bounded by a total
+memory budget (given by the ``MASK_CACHE_MAX_BYTES`` setting), and the least
+recently used masks are evicted once this budget is exceeded.
+
+Entries are keyed on the subset state, the dataset, the data version of the
+dataset (which is incremented whenever the values in the dataset change), and
+the view. Only weak references to the subset states and datasets are kept, so
+that masks are dropped from the cache as soon as the subset state or dataset
+they were computed for no longer exists.
+"""
+
+import weakref
+import threading
+from functools import wraps, partial
+from collections import OrderedDict
+
+from glue.utils import view_cache_key
+
+__all__ = ['MaskCache', 'mask_cache', 'cached_mask', 'uncached_mask']
+
+
+class MaskCache(object):
+    """
+    A least-recently-used cache for masks, bounded by a total size in bytes.
+
+    Parameters
+    ----------
+    max_bytes : int, optional
+        The maximum total size of the cached masks, in bytes. If not
+        specified, the ``MASK_CACHE_MAX_BYTES`` setting is used.
+    """
+
+    def __init__(self, max_bytes=None):
+        self._max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._entry_bytes = {}
+        self._tracked = {}
+        self._nbytes = 0
+        self._lock = threading.RLock()
+        self.reset_stats()
+
+    @property
+    def max_bytes(self):
+        """
+        The maximum total size of the cached masks, in bytes.
+        """
+        if self._max_bytes is None:
+            from glue.config import settings
+            return settings.MASK_CACHE_MAX_BYTES
+        else:
+            return self._max_bytes
+
+    @max_bytes.setter
+    def max_bytes(self, value):
+        self._max_bytes = value
+        with self._lock:
+            self._evict()
+
+    @property
+    def nbytes(self):
+        """
+        The total size of the cached masks, in bytes.
+        """
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def stats(self):
+        """
+        A dictionary with the number of hits, misses and evictions since the
+        last call to :meth:`reset_stats`, as well as the number of entries and
+        the total size of the cache.
+        """
+        return {'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'nbytes': self._nbytes,
+                'max_bytes': self.max_bytes}
+
+    def reset_stats(self):
+        """
+        Reset the hit, miss and eviction counters.
+        """
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_mask(self, func, state, data, view=None):
+        """
+        Return the result of ``func(state, data, view=view)``, computing it
+        only if it is not already present in the cache.
+        """
+
+        try:
+            key = (func, id(state), id(data),
+                   getattr(data, '_data_version', 0), view_cache_key(view))
+        except TypeError:  # unhashable view
+            return func(state, data, view=view)
+
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+
+        result = func(state, data, view=view)
+
+        self._store(key, result, state, data)
+
+        return result
+
+    def _store(self, key, result, state, data):
+
+        nbytes = getattr(result, 'nbytes', 0)
+
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+
+            if key in self._entries:
+                return
+
+            try:
+                self._track(state, key)
+                self._track(data, key)
+            except TypeError:  # objects that can't be weakly referenced
+                self._untrack(key)
+                return
+
+            self._entries[key] = result
+            self._entry_bytes[key] = nbytes
+            self._nbytes += nbytes
+
+            self._evict()
+
+    def _track(self, obj, key):
+        oid = id(obj)
+        if oid not in self._tracked:
+            ref = weakref.ref(obj, partial(self._forget, oid))
+            self._tracked[oid] = (ref, set())
+        self._tracked[oid][1].add(key)
+
+    def _untrack(self, key):
+        for oid in key[1:3]:
+            if oid in self._tracked:
+                keys = self._tracked[oid][1]
+                keys.discard(key)
+                if len(keys) == 0:
+                    self._tracked.pop(oid)
+
+    def _forget(self, oid, ref):
+        # Called when a subset state or dataset is garbage-collected
+        with self._lock:
+            if oid in self._tracked and self._tracked[oid][0] is ref:
+                for key in list(self._tracked[oid][1]):
+                    self._remove(key)
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        self._nbytes -= self._entry_bytes.pop(key, 0)
+        self._untrack(key)
+
+    def _evict(self):
+        max_bytes = self.max_bytes
+        while self._nbytes > max_bytes and len(self._entries) > 0:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self.evictions += 1
+
+    def invalidate(self, obj):
+        """
+        Remove all masks computed for a given subset state or dataset.
+        """
+        with self._lock:
+            if id(obj) in self._tracked:
+                for key in list(self._tracked[id(obj)][1]):
+                    self._remove(key)
+
+    def clear(self):
+        """
+        Remove all masks from the cache.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._entry_bytes.clear()
+            self._tracked.clear()
+            self._nbytes = 0
+
+
+mask_cache = MaskCache()
+
+
+def cached_mask(func):
+    """
+    Decorator for ``to_mask`` methods on subset states which caches the
+    resulting masks in the global :data:`mask_cache`.
+
+    This should only be used for subset states that do not change once
+    created.
+    """
+
+    @wraps(func)
+    def wrapper(self, data, view=None):
+        return mask_cache.get_mask(func, self, data, view=view)
+
+    return wrapper
+
+
+def uncached_mask(state, data, view=None):
+    """
+    Compute the mask for a subset state without going through the global
+    :data:`mask_cache`, for views (such as arbitrary sets of positions) that
+    are unlikely to be requested again.
+    """
+    to_mask = getattr(state.to_mask, '__wrapped__', None)
+    if to_mask is None:
+        return state.to_mask(data, view=view)
+    else:
+        return to_mask(state, data, view=view)
@@ -44,6 +44,28 @@ class Message(object):
                                              self.tag or '',
                                              self.sender)
 
+    def merge_key(self):
+        """
+        Return a key used to merge messages queued while the hub callbacks
+        are delayed (see :meth:`~glue.core.hub.Hub.delay_callbacks`).
+
+        If several queued messages have the same key, only the last one is
+        broadcast. By default, messages are never merged, and this returns
+        `None`. Message classes for which only the latest message matters
+        can override this.
+        """
+        return None
+
+    def supersedes(self, message):
+        """
+        Whether this message makes a message queued before it redundant, in
+        which case the earlier message is dropped when the hub callbacks are
+        delayed (see :meth:`~glue.core.hub.Hub.delay_callbacks`).
+
+        By default this returns `False`.
+        """
+        return False
+
 
 class ErrorMessage(Message):
 
@@ -102,13 +124,19 @@ class SubsetUpdateMessage(SubsetMessage):
         result += "\n\t Updated %s" % self.attribute
         return result
 
+    def merge_key(self):
+        return type(self), id(self.sender), self.attribute
+
 
 class SubsetDeleteMessage(SubsetMessage):
 
     """
     A message that a subset issues when it is deleted
     """
-    pass
+
+    def supersedes(self, message):
+        return (isinstance(message, SubsetUpdateMessage) and
+                message.sender is self.sender)
 
 
 class DataMessage(Message):
@@ -155,15 +183,21 @@ class DataReorderComponentMessage(DataMessage):
 
 
 class ExternallyDerivableComponentsChangedMessage(DataMessage):
-    pass
+
+    def merge_key(self):
+        return type(self), id(self.sender)
 
 
 class PixelAlignedDataChangedMessage(DataMessage):
-    pass
+
+    def merge_key(self):
+        return type(self), id(self.sender)
 
 
 class ComponentsChangedMessage(DataMessage):
-    pass
+
+    def merge_key(self):
+        return type(self), id(self.sender)
 
 
 class ComponentReplacedMessage(ComponentsChangedMessage):
@@ -173,6 +207,9 @@ class ComponentReplacedMessage(ComponentsChangedMessage):
         self.old = old_component
         self.new = new_component
 
+    def merge_key(self):
+        return None
+
 
 class DataUpdateMessage(DataMessage):
 
@@ -180,9 +217,43 @@ class DataUpdateMessage(DataMessage):
         super(DataUpdateMessage, self).__init__(sender, tag=tag)
         self.attribute = attribute
 
+    def merge_key(self):
+        return type(self), id(self.sender), self.attribute
+
 
 class NumericalDataChangedMessage(DataMessage):
-    pass
+    """
+    Indicates that the numerical values in a dataset have changed.
+
+    Parameters
+    ----------
+    sender : `~glue.core.data.BaseData`
+        The dataset whose values have changed.
+    region : tuple of slices, optional
+        If specified, the values of the stored (i.e. non-derived) components
+        have only changed inside this region of the dataset (which includes
+        any items appended to the dataset). Otherwise, any value may have
+        changed. This is advisory only: the data version is incremented and
+        all cached masks and statistics for the dataset are invalidated
+        regardless of the region, and receivers are free to ignore it and
+        refresh everything.
+    """
+
+    def __init__(self, sender, region=None, tag=None):
+        super(NumericalDataChangedMessage, self).__init__(sender, tag=tag)
+        self.region = region
+
+    def merge_key(self):
+        # Messages for different regions can't be merged
+        if self.region is None:
+            return type(self), id(self.sender)
+        else:
+            return None
+
+    def supersedes(self, message):
+        return (self.region is None and
+                isinstance(message, NumericalDataChangedMessage) and
+                message.sender is self.sender)
 
 
 class DataCollectionMessage(Message):
@@ -216,6 +287,10 @@ class DataCollectionDeleteMessage(DataCollectionMessage):
         DataCollectionMessage.__init__(self, sender, tag=tag)
         self.data = data
 
+    def supersedes(self, message):
+        return (isinstance(message, (DataUpdateMessage, NumericalDataChangedMessage)) and
+                message.sender is self.data)
+
 
 class SettingsChangeMessage(Message):
     """
@@ -248,6 +323,9 @@ class LayerArtistUpdatedMessage(Message):
         super(LayerArtistUpdatedMessage, self).__init__(sender, tag=tag)
         self.layer_artist = self.sender
 
+    def merge_key(self):
+        return type(self), id(self.sender)
+
 
 class LayerArtistVisibilityMessage(Message):
     def __init__(self, sender, tag=None):
@@ -1,9 +1,15 @@
 import re
+import sys
+import ast
+import math
 import random
 
+import numpy as np
+
 from glue.core.component_link import ComponentLink
 from glue.core.subset import Subset, SubsetState
-from glue.core.data import ComponentID
+from glue.core.data import BaseCartesianData, ComponentID
+from glue.utils import iterate_chunks, view_shape
 
 
 # The following expression matches substrings surrounded by curly brackets
@@ -158,6 +164,89 @@ def _validate(cmd, references):
     return cmd_new, references_new
 
 
+def _evaluation_namespace():
+    """
+    Return the global variables to use when evaluating commands, which
+    include the variables defined in the config.py file as well as the
+    numpy and math modules (if not already defined).
+    """
+    from glue import env
+    namespace = dict(vars(env))
+    namespace.setdefault('numpy', np)
+    namespace.setdefault('np', np)
+    namespace.setdefault('math', math)
+    return namespace
+
+
+def _is_reference(node):
+    """
+    Whether an AST node is one of the dereferenced tags produced by
+    ``_dereference``.
+    """
+    if isinstance(node, ast.Subscript):
+        return isinstance(node.value, ast.Name) and node.value.id == 'data'
+    elif isinstance(node, ast.Call):
+        return (isinstance(node.func, ast.Attribute) and
+                node.func.attr == 'to_mask' and
+                isinstance(node.func.value, ast.Subscript) and
+                isinstance(node.func.value.value, ast.Name) and
+                node.func.value.value.id == 'references')
+    else:
+        return False
+
+
+def _resolve(node, namespace):
+    """
+    Find the object referred to by a (possibly dotted) name, or return
+    `None` if the node is not a name or the name cannot be found.
+    """
+    if isinstance(node, ast.Name):
+        return namespace.get(node.id)
+    elif isinstance(node, ast.Attribute):
+        return getattr(_resolve(node.value, namespace), node.attr, None)
+    else:
+        return None
+
+
+# Before Python 3.8, literals are parsed as separate node types rather than as
+# ast.Constant
+if sys.version_info < (3, 8):
+    _CONSTANT_NODES = (ast.Num, ast.Str, ast.Bytes, ast.NameConstant, ast.Constant)
+else:
+    _CONSTANT_NODES = (ast.Constant,)
+
+
+def _is_elementwise(node, namespace):
+    """
+    Whether the value of each element in the result of an expression only
+    depends on the same element in the referenced components and subsets.
+
+    Expressions made only of arithmetic operators, comparisons, constants and
+    calls to Numpy ufuncs satisfy this, and can therefore be evaluated for
+    any view or chunk of the data independently. Other expressions (for
+    example ones that normalize by the maximum value of a component) need to
+    be evaluated for the whole dataset.
+    """
+    if isinstance(node, ast.Expression):
+        return _is_elementwise(node.body, namespace)
+    elif _is_reference(node) or isinstance(node, _CONSTANT_NODES):
+        return True
+    elif isinstance(node, ast.BinOp):
+        return (_is_elementwise(node.left, namespace) and
+                _is_elementwise(node.right, namespace))
+    elif isinstance(node, ast.UnaryOp):
+        return _is_elementwise(node.operand, namespace)
+    elif isinstance(node, ast.Compare):
+        return all(_is_elementwise(child, namespace)
+                   for child in [node.left] + node.comparators)
+    elif isinstance(node, ast.Call):
+        return (isinstance(_resolve(node.func, namespace), np.ufunc) and
+                len(node.keywords) == 0 and
+                all(_is_elementwise(arg, namespace) for arg in node.args))
+    else:
+        return False
+
+
 class ParsedCommand(object):
 
     """ Class to manage commands that define new components and subsets """
@@ -171,6 +260,7 @@ class ParsedCommand(object):
         references : mapping from command templates to substitution objects
         """
         self._cmd, self._references = _validate(cmd, references)
+        self._compiled = None
 
     def render(self, mapping=None):
         def sub_func(match):
@@ -189,57 +279,77 @@ class ParsedCommand(object):
     def reference_list(self):
         return _reference_list(self._cmd, self._references)
 
-    def evaluate(self, data, view=None):
+    def _compile(self, namespace):
+        """
+        Parse and compile the command, or return the cached result if the
+        command has not changed since it was last compiled.
+        """
+        if self._compiled is None or self._compiled[0] != self._cmd:
+            tree = ast.parse(_dereference(self._cmd, self._references), mode='eval')
+            code = compile(tree, '<glue command>', 'eval')
+            self._compiled = (self._cmd, code, _is_elementwise(tree, namespace))
+        return self._compiled[1:]
 
-        from glue import env
+    @property
+    def elementwise(self):
+        """
+        Whether the command can be evaluated independently for any view of
+        the data.
+        """
+        return self._compile(_evaluation_namespace())[1]
 
-        # pylint: disable=W0613, W0612
-        references = self._references
-        cmd = _dereference(self._cmd, self._references)
+    def evaluate(self, data, view=None, n_chunk_max=1000000):
+        """
+        Evaluate the command for a dataset.
 
-        scope = vars(env)
-        scope['__view'] = view
+        Parameters
+        ----------
+        data : `~glue.core.data.BaseCartesianData`
+            The dataset to evaluate the command for.
+        view : slice, optional
+            If specified, the command is only evaluated for this view of the
+            data where possible.
+        n_chunk_max : int, optional
+            If the command is evaluated for the whole of a dataset larger than
+            this, and the command is elementwise, the evaluation is done in
+            chunks of at most this size to limit the size of temporary arrays.
+        """
 
-        global_variables = vars(env)
+        namespace = _evaluation_namespace()
+        code, elementwise = self._compile(namespace)
 
-        # We now import math modules if not already defined in local or
-        # global variables
-        if 'numpy' not in global_variables and 'numpy' not in locals():
-            import numpy  # noqa
-        if 'np' not in global_variables and 'np' not in locals():
-            import numpy as np  # noqa
-        if 'math' not in global_variables and 'math' not in locals():
-            import math  # noqa
+        def evaluate_view(view):
+            local_variables = {'data': data,
+                               'references': self._references,
+                               '__view': view}
+            return eval(code, namespace, local_variables)  # careful!
 
-        result = eval(cmd, global_variables, locals())  # careful!
+        if (elementwise and view is None and
+                isinstance(data, BaseCartesianData) and
+                data.size > n_chunk_max and len(self._references) > 0):
 
-        # At this point, np may have been defined in the globals but not the
-        # locals so we import it manually to avoid any issues.
-        import numpy as np  # noqa
+            result = None
+            for chunk in iterate_chunks(data.shape, n_max=n_chunk_max):
+                chunk_result = evaluate_view(chunk)
+                if result is None:
+                    result = np.empty(data.shape, dtype=np.result_type(chunk_result))
+                result[chunk] = chunk_result
+
+        else:
+
+            result = evaluate_view(view)
+
+        # Scalars are broadcast to the shape of the data without allocating
+        # the full array.
         if data is not None and np.isscalar(result):
-            result = np.ones(data.shape) * result
+            result = np.broadcast_to(np.multiply(1., result),
+                                     view_shape(data.shape, view))
 
         return result
 
     def evaluate_test(self, view=None):
-        from glue import env
         cmd = _dereference_random(self._cmd)
-
-        scope = vars(env)
-        scope['__view'] = view
-
-        global_variables = vars(env)
-
-        # We now import math modules if not already defined in local or
-        # global variables
-        if 'numpy' not in global_variables and 'numpy' not in locals():
-            import numpy  # noqa
-        if 'np' not in global_variables and 'np' not in locals():
-            import numpy as np  # noqa
-        if 'math' not in global_variables and 'math' not in locals():
-            import math  # noqa
-
-        return eval(cmd, global_variables, locals())  # careful!
+        return eval(cmd, _evaluation_namespace(), {'__view': view})  # careful!
 
     def __gluestate__(self, context):
         return dict(cmd=self._cmd,
@@ -300,6 +410,8 @@ class ParsedSubsetState(SubsetState):
 
     def to_mask(self, data, view=None):
         """ Calculate the new mask by evaluating the dereferenced command """
+        if self._parsed.elementwise:
+            return self._parsed.evaluate(data, view)
         result = self._parsed.evaluate(data)
         if view is not None:
             result = result[view]
@@ -6,7 +6,8 @@ from matplotlib.transforms import IdentityTransform, blended_transform_factory
 
 from glue.core.component import CategoricalComponent
 from glue.core.exceptions import UndefinedROI
-from glue.utils import points_inside_poly, iterate_chunks
+from glue.utils import points_inside_poly, iterate_chunks, PolygonIndex
+from glue.utils.geometry import POLYGON_INDEX_MIN_POINTS
 
 
 np.seterr(all='ignore')
@@ -663,9 +664,22 @@ class PolygonalROI(VertexROIBase):
         if not isinstance(y, np.ndarray):
             y = np.asarray(y)
 
-        result = points_inside_poly(x, y, self.vx, self.vy)
+        if x.size >= POLYGON_INDEX_MIN_POINTS and x.dtype.kind != 'M' and y.dtype.kind != 'M':
+            index = self._get_index()
+        else:
+            index = None
+
+        result = points_inside_poly(x, y, self.vx, self.vy, index=index)
         return result
 
+    def _get_index(self):
+        # The index is cached and only re-computed if the vertices change
+        vertices = (tuple(self.vx), tuple(self.vy))
+        if getattr(self, '_index_vertices', None) != vertices:
+            self._index = PolygonIndex(self.vx, self.vy)
+            self._index_vertices = vertices
+        return self._index
+
     def move_to(self, xdelta, ydelta):
         self.vx = list(map(lambda x: x + xdelta, self.vx))
         self.vy = list(map(lambda y: y + ydelta, self.vy))
@@ -16,6 +16,14 @@ u = GlueUnSerializer.loads(str)
 u.object(varname) -> A reconstituted version of `x`
 u.object('__main__') -> The object passed to the GlueSerializer constructor
 
+Sessions can also be saved to a zip archive, in which Numpy arrays are stored
+as uncompressed .npy files rather than being base64-encoded in the JSON. When
+loading such an archive, the arrays are memory-mapped rather than read into
+memory:
+
+s.dump_archive(filename)
+u = GlueUnSerializer.load_archive(filename)
+
 Developer Notes:
 
 Custom methods to serialize a class of objects can be registered either by:
@@ -53,10 +61,13 @@ starting from 1.
 
 import os
 import json
+import time
 import uuid
 import types
+import struct
 import logging
 from io import BytesIO
+from zipfile import ZipFile, ZipInfo, ZIP_STORED, is_zipfile
 from itertools import count
 from collections import defaultdict, OrderedDict
 from base64 import b64encode, b64decode
@@ -71,7 +82,8 @@ from glue import core
 from glue.core.data import Data
 from glue.core.component_id import ComponentID, PixelComponentID
 from glue.core.component import (Component, CategoricalComponent,
-                                 DerivedComponent, CoordinateComponent)
+                                 DerivedComponent, CoordinateComponent,
+                                 LazyComponent)
 from glue.core.subset import (OPSYM, SYMOP, CompositeSubsetState,
                               SubsetState, Subset, RoiSubsetState,
                               InequalitySubsetState, RangeSubsetState)
@@ -80,7 +92,7 @@ from glue.core.component_link import CoordinateComponentLink
 from glue.core.roi import Roi
 from glue.core import glue_pickle as gp
 from glue.core.subset_group import coerce_subset_groups
-from glue.utils import lookup_class
+from glue.utils import lookup_class, PackedMask
 from glue.config import session_patch
 
 literals = tuple([type(None), float, int, bytes, bool])
@@ -107,15 +119,28 @@ with open(PATCH_FILE) as fp:
         PATH_PATCHES[before.strip()] = after.strip()
 
 
-def save(filename, obj):
+# Name of the JSON file containing the state in session archives
+ARCHIVE_STATE = 'session.json'
+
+# ID of the zip extra field used to align arrays in session archives
+ZIP_PADDING_ID = 0xD935
+
+
+def save(filename, obj, archive=False):
     s = GlueSerializer(obj)
-    with open(filename, 'w') as f:
-        s.dump(f)
+    if archive:
+        s.dump_archive(filename)
+    else:
+        with open(filename, 'w') as f:
+            s.dump(f)
 
 
 def load(filename):
-    with open(filename, 'r') as f:
-        s = GlueUnSerializer.load(f)
+    if is_zipfile(filename):
+        s = GlueUnSerializer.load_archive(filename)
+    else:
+        with open(filename, 'r') as f:
+            s = GlueUnSerializer.load(f)
     return s.object('__main__')
 
 
@@ -262,6 +287,8 @@ class GlueSerializer(object):
         self.id(obj)
         self.include_data = include_data
         self.absolute_paths = absolute_paths
+        self.archive = False
+        self._arrays = OrderedDict()  # map name -> array for archives
 
     @classmethod
     def serializes(cls, obj, version=1):
@@ -423,13 +450,42 @@ class GlueSerializer(object):
         return json.dump(result, outfile, default=self.json_default,
                          indent=indent, sort_keys=True)
 
+    def store_array(self, array):
+        """
+        Add an array to the arrays to write to a session archive, and return
+        the name of the file it will be stored in.
+        """
+        name = 'arrays/%i.npy' % len(self._arrays)
+        self._arrays[name] = array
+        return name
+
+    def dump_archive(self, filename, indent=None):
+        """
+        Dump the state to a zip archive, in which Numpy arrays are stored as
+        uncompressed .npy files so that they can be memory-mapped when loading
+        the archive with :meth:`GlueUnSerializer.load_archive`.
+        """
+        self.archive = True
+        self._arrays.clear()
+        try:
+            state = self.dumps(indent=indent)
+            with ZipFile(filename, 'w', compression=ZIP_STORED, allowZip64=True) as zf:
+                zf.writestr(ARCHIVE_STATE, state)
+                for name, array in self._arrays.items():
+                    with zf.open(_aligned_zip_info(zf, name), 'w', force_zip64=True) as f:
+                        np.lib.format.write_array(f, array, allow_pickle=False)
+        finally:
+            self.archive = False
+            self._arrays.clear()
+
 
 class GlueUnSerializer(object):
     dispatch = VersionedDict()
 
-    def __init__(self, string=None, fobj=None):
+    def __init__(self, string=None, fobj=None, archive=None):
         if string is None and fobj is None:
             raise ValueError("Most provide either a string or a file")
+        self._archive = None if archive is None else os.path.abspath(archive)
         self._names = {}  # map id(object) -> name
         self._objs = {}   # map name -> object
         self._working = set()
@@ -450,6 +506,26 @@ class GlueUnSerializer(object):
     def load(cls, fobj):
         return cls(fobj=fobj)
 
+    @classmethod
+    def load_archive(cls, filename):
+        """
+        Load the state from a zip archive written by
+        :meth:`GlueSerializer.dump_archive`.
+        """
+        with ZipFile(filename) as zf:
+            string = zf.read(ARCHIVE_STATE).decode('utf-8')
+        return cls(string=string, archive=filename)
+
+    def load_array(self, name):
+        """
+        Load an array stored in the session archive. Arrays are
+        memory-mapped if possible.
+        """
+        if self._archive is None:
+            raise GlueSerializeError("Cannot load array %s since the session "
+                                     "was not loaded from an archive" % name)
+        return _load_archive_array(self._archive, name)
+
     @classmethod
     def unserializes(cls, obj, version=1):
         def decorator(func):
@@ -1066,6 +1142,17 @@ def _load_component(rec, context):
                units=rec['units'])
 
 
+@loader(LazyComponent)
+def _load_lazy_component(rec, context):
+
+    if 'log' in rec:
+        return context.object(rec['log']).component(rec['log_item'])
+
+    # The values were saved in the session, so there is nothing left to load
+    return Component(data=context.object(rec['data']),
+                     units=rec['units'])
+
+
 @saver(CategoricalComponent)
 def _save_categorical_component(component, context):
 
@@ -1188,18 +1275,93 @@ def _save_session(session, context):
 
 @loader(np.ndarray)
 def _load_numpy(rec, context):
+    if 'npy' in rec:
+        return context.load_array(rec['npy'])
     s = BytesIO(b64decode(rec['data']))
     return np.load(s)
 
 
 @saver(np.ndarray)
 def _save_numpy(obj, context):
+    if context.archive and not obj.dtype.hasobject:
+        return dict(npy=context.store_array(obj))
     f = BytesIO()
     np.save(f, obj)
     data = b64encode(f.getvalue()).decode('ascii')
     return dict(data=data)
 
 
+@saver(PackedMask)
+def _save_packed_mask(mask, context):
+    flags, bits = mask.encode()
+    return dict(shape=list(mask.shape), chunk_rows=mask.chunk_rows,
+                flags=context.do(flags), bits=context.do(bits))
+
+
+@loader(PackedMask)
+def _load_packed_mask(rec, context):
+    return PackedMask.decode(rec['shape'], context.object(rec['flags']),
+                             context.object(rec['bits']), rec['chunk_rows'])
+
+
+def _aligned_zip_info(zf, name, alignment=64):
+    """
+    Return a ZipInfo object for a .npy file to be written to a zip archive,
+    with an extra field used as padding so that the array data is aligned in
+    the archive (.npy headers are themselves padded to a multiple of 64 bytes).
+    """
+    info = ZipInfo(name, date_time=time.localtime()[:6])
+    info.compress_type = ZIP_STORED
+    # The local header is 30 bytes, followed by the file name, the padding
+    # field (4 bytes plus the padding itself), and the ZIP64 field (20 bytes)
+    start = zf.fp.tell() + 30 + len(name.encode('utf-8')) + 4 + 20
+    padding = -start % alignment
+    info.extra = struct.pack('<HH', ZIP_PADDING_ID, padding) + b'\0' * padding
+    return info
+
+
+def _load_archive_array(filename, name):
+    """
+    Load a .npy file from a zip archive, memory-mapping it (in copy-on-write
+    mode) if it is stored uncompressed.
+    """
+
+    with ZipFile(filename) as zf:
+
+        info = zf.getinfo(name)
+
+        with zf.open(info) as f:
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                header = np.lib.format.read_array_header_1_0(f)
+            elif version == (2, 0):
+                header = np.lib.format.read_array_header_2_0(f)
+            else:
+                header = None
+            header_size = f.tell()
+
+        if (header is None or info.compress_type != ZIP_STORED or
+                header[2].hasobject or np.prod(header[0]) == 0 or len(header[0]) == 0):
+            with zf.open(info) as f:
+                return np.lib.format.read_array(f)
+
+    shape, fortran_order, dtype = header
+
+    # Find the start of the file data, which comes after the local header
+    with open(filename, 'rb') as f:
+        f.seek(info.header_offset)
+        local_header = f.read(30)
+        name_length, extra_length = struct.unpack('<HH', local_header[26:30])
+
+    offset = info.header_offset + 30 + name_length + extra_length + header_size
+
+    array = np.memmap(filename, dtype=dtype, mode='c', offset=offset, shape=shape,
+                      order='F' if fortran_order else 'C')
+
+    # Return a plain Numpy array that shares memory with the memory map
+    return array.view(np.ndarray)
+
+
 @saver(Colormap)
 def _save_cmap(cmap, context):
     return {'cmap': cmap.name}
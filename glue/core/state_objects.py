@@ -338,19 +338,16 @@ class StateAttributeLimitsHelper(StateAttributeCacheHelper):
             exclude = (100 - percentile) / 2.
 
             if percentile == 100:
-                lower = self.data.compute_statistic('minimum', cid=self.component_id,
-                                                    finite=True, positive=log,
-                                                    random_subset=self.random_subset)
-                upper = self.data.compute_statistic('maximum', cid=self.component_id,
-                                                    finite=True, positive=log,
-                                                    random_subset=self.random_subset)
+                lower, upper = self.data.compute_statistics(['minimum', 'maximum'],
+                                                            cid=self.component_id,
+                                                            finite=True, positive=log,
+                                                            random_subset=self.random_subset)
             else:
-                lower = self.data.compute_statistic('percentile', cid=self.component_id,
-                                                    percentile=exclude, positive=log,
-                                                    random_subset=self.random_subset)
-                upper = self.data.compute_statistic('percentile', cid=self.component_id,
-                                                    percentile=100 - exclude, positive=log,
-                                                    random_subset=self.random_subset)
+                lower, upper = self.data.compute_statistics(['percentile', 'percentile'],
+                                                            cid=self.component_id,
+                                                            percentile=[exclude, 100 - exclude],
+                                                            positive=log,
+                                                            random_subset=self.random_subset)
 
             if not isinstance(lower, np.datetime64) and np.isnan(lower):
                 lower, upper = 0, 1
@@ -473,10 +470,9 @@ class StateAttributeHistogramHelper(StateAttributeCacheHelper):
                 else:
                     n_bin = self._common_n_bin
 
-                lower = self.data.compute_statistic('minimum', cid=self.component_id,
-                                                    finite=True, random_subset=self.random_subset)
-                upper = self.data.compute_statistic('maximum', cid=self.component_id,
-                                                    finite=True, random_subset=self.random_subset)
+                lower, upper = self.data.compute_statistics(['minimum', 'maximum'],
+                                                            cid=self.component_id, finite=True,
+                                                            random_subset=self.random_subset)
 
                 if not isinstance(lower, np.datetime64) and np.isnan(lower):
                     lower, upper = 0, 1
@@ -3,19 +3,21 @@ import numbers
 import operator
 
 import numpy as np
+import pandas as pd
 
 from glue.core.roi import (PolygonalROI, CategoricalROI, RangeROI, XRangeROI,
                            YRangeROI, RectangularROI, CircularROI, EllipticalROI)
 from glue.core.contracts import contract
+from glue.core.component import CategoricalComponent
 from glue.core.util import split_component_view
 from glue.core.registry import Registry
 from glue.core.exceptions import IncompatibleAttribute
 from glue.core.message import SubsetDeleteMessage, SubsetUpdateMessage
-from glue.core.decorators import memoize
+from glue.core.mask_cache import cached_mask, uncached_mask
 from glue.core.visual import VisualAttributes
 from glue.config import settings
-from glue.utils import (view_shape, broadcast_to, floodfill, combine_slices,
-                        polygon_line_intersections, categorical_ndarray)
+from glue.utils import (view_shape, broadcast_to, floodfill_region, combine_slices,
+                        polygon_line_intersections, categorical_ndarray, PackedMask)
 
 
 __all__ = ['Subset', 'SubsetState', 'RoiSubsetState', 'CategoricalROISubsetState',
@@ -449,6 +451,15 @@ class SubsetState(object):
         """
         return SubsetState()
 
+    def _evaluation_cost(self):
+        """
+        Return an estimate of the relative cost of computing the mask for each
+        value, or `None` if this is not known or if the mask should always be
+        computed for the whole view. This is used to decide in which order to
+        compute the masks for combinations of subset states.
+        """
+        return None
+
     @contract(other_state='isinstance(SubsetState)',
               returns='isinstance(SubsetState)')
     def __or__(self, other_state):
@@ -581,6 +592,14 @@ class RoiSubsetState(SubsetState):
 
         return result
 
+    def _evaluation_cost(self):
+        # ROIs defined in pixel space are computed for a single slice and
+        # broadcast, which is cheaper than computing them for some values.
+        from glue.core.component_id import PixelComponentID
+        if isinstance(self.xatt, PixelComponentID) and isinstance(self.yatt, PixelComponentID):
+            return None
+        return _roi_cost(self.roi)
+
     def copy(self):
         result = RoiSubsetState()
         result.xatt = self.xatt
@@ -633,14 +652,25 @@ class CategoricalROISubsetState(SubsetState):
     def attributes(self):
         return self.att,
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
+
+        # If possible, we check which categories are in the ROI and then look
+        # up the result for each value using the integer codes.
+        codes = _categorical_codes(data, self.att, view)
+        if codes is not None:
+            categories, codes = codes
+            return self.roi.contains(categories, None)[codes].ravel()
+
         x = data[self.att, view]
         result = self.roi.contains(x, None)
         assert x.shape == result.shape
         return result.ravel()
 
+    def _evaluation_cost(self):
+        return 1
+
     def copy(self):
         result = CategoricalROISubsetState()
         result.att = self.att
@@ -729,6 +759,9 @@ class RangeSubsetState(SubsetState):
         result = (x >= self.lo) & (x <= self.hi)
         return result
 
+    def _evaluation_cost(self):
+        return 1
+
     def copy(self):
         return RangeSubsetState(self.lo, self.hi, self.att)
 
@@ -787,6 +820,9 @@ class MultiRangeSubsetState(SubsetState):
             result |= (x >= lo) & (x <= hi)
         return result
 
+    def _evaluation_cost(self):
+        return len(self.pairs)
+
     def copy(self):
         return MultiRangeSubsetState(self.pairs, self.att)
 
@@ -851,10 +887,27 @@ class CategoricalROISubsetState2D(SubsetState):
     def attributes(self):
         return (self.att1, self.att2)
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
 
+        codes1 = _categorical_codes(data, self.att1, view)
+        codes2 = _categorical_codes(data, self.att2, view)
+
+        # If possible, we convert the pairs of labels to pairs of integer
+        # codes, and combine each pair of codes into a single integer.
+        if codes1 is not None and codes2 is not None:
+            (categories1, codes1), (categories2, codes2) = codes1, codes2
+            index1, index2 = pd.Index(categories1), pd.Index(categories2)
+            n2 = len(categories2)
+            selected = [np.zeros(0, dtype=np.int64)]
+            for label1, labels2 in self.categories.items():
+                code1 = index1.get_indexer([label1])[0]
+                if code1 >= 0:
+                    selected_codes2 = index2.get_indexer(list(labels2))
+                    selected.append(code1 * n2 + selected_codes2[selected_codes2 >= 0])
+            return np.in1d(codes1.astype(np.int64) * n2 + codes2, np.hstack(selected))
+
         # Extract categories and numerical values
         labels1 = data[self.att1, view]
         labels2 = data[self.att2, view]
@@ -873,6 +926,9 @@ class CategoricalROISubsetState2D(SubsetState):
 
         return mask
 
+    def _evaluation_cost(self):
+        return 2
+
     def copy(self):
         result = CategoricalROISubsetState2D(self.categories,
                                              self.att1, self.att2)
@@ -950,7 +1006,7 @@ class CategoricalMultiRangeSubsetState(SubsetState):
     def attributes(self):
         return (self.cat_att, self._num_att)
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
 
@@ -979,6 +1035,9 @@ class CategoricalMultiRangeSubsetState(SubsetState):
 
         return mask
 
+    def _evaluation_cost(self):
+        return 20
+
     def copy(self):
         result = CategoricalMultiRangeSubsetState(self.ranges,
                                                   self.cat_att,
@@ -1021,12 +1080,15 @@ class CompositeSubsetState(SubsetState):
             att += self.state2.attributes
         return tuple(sorted(set(att)))
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
         return self.op(self.state1.to_mask(data, view),
                        self.state2.to_mask(data, view))
 
+    def _evaluation_cost(self):
+        return _total_cost([self.state1, self.state2])
+
     def __str__(self):
         sym = OPSYM.get(self.op, self.op)
         return "(%s %s %s)" % (self.state1, sym, self.state2)
@@ -1041,6 +1103,11 @@ class OrState(CompositeSubsetState):
     """
     op = operator.or_
 
+    @cached_mask
+    @contract(data='isinstance(Data)', view='array_view')
+    def to_mask(self, data, view=None):
+        return _planned_mask(data, view, _flatten_states(self), self.op)
+
 
 class AndState(CompositeSubsetState):
     """
@@ -1051,6 +1118,11 @@ class AndState(CompositeSubsetState):
     """
     op = operator.and_
 
+    @cached_mask
+    @contract(data='isinstance(Data)', view='array_view')
+    def to_mask(self, data, view=None):
+        return _planned_mask(data, view, _flatten_states(self), self.op)
+
 
 class XorState(CompositeSubsetState):
     """
@@ -1071,11 +1143,14 @@ class InvertState(CompositeSubsetState):
     ``state1``.
     """
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
         return ~self.state1.to_mask(data, view)
 
+    def _evaluation_cost(self):
+        return self.state1._evaluation_cost()
+
     def __str__(self):
         return "(~%s)" % self.state1
 
@@ -1105,14 +1180,13 @@ class MultiOrState(SubsetState):
             att += state.attributes
         return tuple(sorted(set(att)))
 
-    @memoize
+    @cached_mask
     @contract(data='isinstance(Data)', view='array_view')
     def to_mask(self, data, view=None):
-        # Copy the first mask so that we can then modify it in-place
-        result = self.states[0].to_mask(data, view=view).copy()
-        for state in self.states[1:]:
-            result |= state.to_mask(data, view=view)
-        return result
+        return _planned_mask(data, view, _flatten_states(self), operator.or_)
+
+    def _evaluation_cost(self):
+        return _total_cost(self.states)
 
     def __str__(self):
         return "('or' combination of {0} individual states)".format(len(self.states))
@@ -1122,9 +1196,14 @@ class MaskSubsetState(SubsetState):
     """
     A subset defined by a boolean mask.
 
+    The mask is stored as a :class:`~glue.utils.array.PackedMask`, which uses
+    one bit per value (and much less for regions of the mask with no or only
+    selected values), and only the part of the mask needed for a given view
+    is unpacked when computing the subset.
+
     Parameters
     ----------
-    mask : `~numpy.ndarray`
+    mask : `~numpy.ndarray` or :class:`~glue.utils.array.PackedMask`
         The boolean mask to apply to the data.
     cids : iterable of :class:`~glue.core.component_id.ComponentID`
         The component IDs along which the mask applies.
@@ -1132,18 +1211,32 @@ class MaskSubsetState(SubsetState):
 
     def __init__(self, mask, cids):
         self._cids = cids
-        self._mask = np.asarray(mask, dtype=bool)
+        self.mask = mask
 
     @property
     def mask(self):
         """
         The boolean mask to apply to the data.
+
+        This is unpacked from :attr:`packed_mask` into a new array each time
+        it is accessed, so modifying it has no effect on the subset state. To
+        change the mask, set this property to a new array instead.
         """
-        return self._mask
+        return self._packed_mask.to_array()
 
     @mask.setter
     def mask(self, value):
-        self._mask = value
+        if not isinstance(value, PackedMask):
+            value = PackedMask.from_array(np.asarray(value, dtype=bool))
+        self._packed_mask = value
+
+    @property
+    def packed_mask(self):
+        """
+        The boolean mask to apply to the data, as a
+        :class:`~glue.utils.array.PackedMask`.
+        """
+        return self._packed_mask
 
     @property
     def cids(self):
@@ -1160,8 +1253,15 @@ class MaskSubsetState(SubsetState):
     def attributes(self):
         return self._cids
 
+    def _evaluation_cost(self):
+        return 1
+
     def copy(self):
-        return MaskSubsetState(self.mask, self.cids)
+        # The packed mask is never modified in place so can be shared
+        return MaskSubsetState(self.packed_mask, self.cids)
+
+    def _get_mask(self, view):
+        return self.packed_mask[view]
 
     def to_mask(self, data, view=None):
 
@@ -1170,23 +1270,57 @@ class MaskSubsetState(SubsetState):
 
         # shortcut for data on the same pixel grid
         if data.pixel_component_ids == self.cids:
-            return self.mask[view].copy()
+            return self._get_mask(view)
 
         # locate each element of data in the coordinate system of the mask
         vals = [data[c, view].astype(np.int) for c in self.cids]
-        result = self.mask[tuple(vals)]
+        result = self._get_mask(tuple(vals))
 
         for v, n in zip(vals, data.shape):
             result &= ((v >= 0) & (v < n))
 
         return result
 
+    def _combine_masks(self, other, op):
+        # Masks defined along the same pixel components can be combined
+        # directly without decompressing them.
+        if (type(self) is MaskSubsetState and type(other) is MaskSubsetState and
+                len(self.cids) == len(other.cids) and
+                all(c1 is c2 for c1, c2 in zip(self.cids, other.cids)) and
+                self.packed_mask.shape == other.packed_mask.shape):
+            return MaskSubsetState(op(self.packed_mask, other.packed_mask), self.cids)
+
+    def __and__(self, other_state):
+        result = self._combine_masks(other_state, operator.and_)
+        if result is None:
+            result = super(MaskSubsetState, self).__and__(other_state)
+        return result
+
+    def __or__(self, other_state):
+        result = self._combine_masks(other_state, operator.or_)
+        if result is None:
+            result = super(MaskSubsetState, self).__or__(other_state)
+        return result
+
+    def __xor__(self, other_state):
+        result = self._combine_masks(other_state, operator.xor)
+        if result is None:
+            result = super(MaskSubsetState, self).__xor__(other_state)
+        return result
+
+    def __invert__(self):
+        if type(self) is MaskSubsetState:
+            return MaskSubsetState(~self.packed_mask, self.cids)
+        return super(MaskSubsetState, self).__invert__()
+
     def __gluestate__(self, context):
         return dict(cids=[context.id(c) for c in self.cids],
-                    mask=context.do(self.mask))
+                    mask=context.do(self.packed_mask))
 
     @classmethod
     def __setgluestate__(cls, rec, context):
+        # Older sessions store the mask as a plain array, which is packed when
+        # the subset state is created.
         return cls(context.object(rec['mask']),
                    [context.object(c) for c in rec['cids']])
 
@@ -1372,14 +1506,27 @@ class CategorySubsetState(SubsetState):
     def attributes(self):
         return self._att,
 
-    @memoize
+    @cached_mask
     def to_mask(self, data, view=None):
+
+        # If possible, we look up the result for each value using the integer
+        # codes rather than comparing the floating-point codes.
+        codes = _categorical_codes(data, self._att, view)
+        if codes is not None:
+            categories, codes = codes
+            selected = np.zeros(len(categories), dtype=bool)
+            selected[_valid_codes(self._categories, len(categories))] = True
+            return selected[codes]
+
         vals = data[self._att, view]
         if isinstance(vals, categorical_ndarray):
             vals = vals.codes
         result = np.in1d(vals.ravel(), self._categories)
         return result.reshape(vals.shape)
 
+    def _evaluation_cost(self):
+        return 1
+
     def copy(self):
         return CategorySubsetState(self._att, self._categories.copy())
 
@@ -1435,7 +1582,7 @@ class ElementSubsetState(SubsetState):
     def data(self, value):
         self._data = value
 
-    @memoize
+    @cached_mask
     def to_mask(self, data, view=None):
         if data.uuid == self._data_uuid or self._data_uuid is None:
             # XXX this is inefficient for views
@@ -1550,7 +1697,7 @@ class InequalitySubsetState(SubsetState):
     def operator(self, value):
         self._operator = value
 
-    @memoize
+    @cached_mask
     def to_mask(self, data, view=None):
 
         # FIXME: the default view in glue should be ... not None, because
@@ -1571,6 +1718,9 @@ class InequalitySubsetState(SubsetState):
 
         return self._operator(left, right)
 
+    def _evaluation_cost(self):
+        return 1
+
     def copy(self):
         return InequalitySubsetState(self._left, self._right, self._operator)
 
@@ -1601,9 +1751,6 @@ class FloodFillSubsetState(MaskSubsetState):
         is the value of the data at ``start_coords``.
     """
 
-    # TODO: we need to recompute the mask if the numerical values of the
-    # data changes.
-
     def __init__(self, data, att, start_coords, threshold):
 
         if len(start_coords) != data.ndim:
@@ -1616,6 +1763,7 @@ class FloodFillSubsetState(MaskSubsetState):
         self._threshold = float(threshold)
         self._cids = self.data.pixel_component_ids
 
+        self._mask_cache = None
         self._compute_mask()
 
     @property
@@ -1666,20 +1814,56 @@ class FloodFillSubsetState(MaskSubsetState):
         self._threshold = value
 
     def _compute_mask(self):
-        mask = floodfill(self.data[self.att],
-                         self.start_coords, self.threshold)
-        self._mask_cache = (self._hash, mask)
+
+        # If only the threshold has changed, the previous region can be used
+        # as a starting point if the threshold has increased.
+        if self._mask_cache is not None and self._mask_cache[0][:-1] == self._hash[:-1]:
+            previous = self._mask_cache[1]
+        else:
+            previous = None
+
+        region = floodfill_region(self.data[self.att], self.start_coords,
+                                  self.threshold, previous=previous)
+
+        self._mask_cache = (self._hash, region)
 
     @property
     def _hash(self):
-        return self.data, self.att, self.start_coords, self.threshold, self.cids
+        return (self.data, getattr(self.data, '_data_version', 0), self.att,
+                self.start_coords, self.cids, self.threshold)
 
     @property
-    def mask(self):
+    def region(self):
+        """
+        The region selected by the flood fill, as a
+        :class:`~glue.utils.geometry.FloodFillRegion`.
+        """
         if self._mask_cache[0] != self._hash:
             self._compute_mask()
         return self._mask_cache[1]
 
+    @property
+    def mask(self):
+        return self.region.to_mask()
+
+    @property
+    def packed_mask(self):
+        return PackedMask.from_array(self.mask)
+
+    def _get_mask(self, view):
+        return self.region.to_mask(view=view)
+
+    def _evaluation_cost(self):
+        # The cost depends on whether the flood fill needs to be recomputed
+        return None
+
+    def to_mask(self, data, view=None):
+        # shortcut for data on the same pixel grid, in which case we expand
+        # the bounding box of the region to the full mask
+        if data.pixel_component_ids == self.cids:
+            return self.region.to_mask(view=view)
+        return super(FloodFillSubsetState, self).to_mask(data, view=view)
+
     @property
     def attributes(self):
         return list(self._data.pixel_component_ids) + [self.att]
@@ -1819,6 +2003,221 @@ class RoiSubsetState3d(SubsetState):
                                 context.object(rec['roi']))
 
 
+# Combinations of subset states with 'and' and 'or' are computed by first
+# computing the masks of the subset states that are cheap and that exclude (for
+# 'and') or include (for 'or') the most values, and by then computing the masks
+# of the remaining subset states only for the values that are still undecided.
+# The fraction of values selected by each subset state is estimated from a
+# random sample of values. For small views, or when the cost of the subset
+# states is not known, all masks are computed for the whole view.
+
+PLANNER_MIN_SIZE = 100000
+PLANNER_SAMPLE_SIZE = 1000
+
+# If more than this fraction of values is still undecided, the mask for the next
+# subset state is computed for the whole view rather than for the undecided
+# values, since indexing the values is then slower.
+PLANNER_MAX_UNDECIDED = 0.5
+
+
+def _total_cost(states):
+    """
+    Return the total cost of computing a list of subset states, or `None` if
+    any of the costs is not known.
+    """
+    costs = [state._evaluation_cost() for state in states if state is not None]
+    if any(cost is None for cost in costs):
+        return None
+    return sum(costs)
+
+
+def _roi_cost(roi):
+    """
+    Return an estimate of the relative cost of checking whether a value is
+    inside a region of interest.
+    """
+    if isinstance(roi, (RectangularROI, RangeROI)):
+        return 2
+    elif isinstance(roi, (CircularROI, EllipticalROI)):
+        return 3
+    elif isinstance(roi, PolygonalROI):
+        return 5 + len(roi.vx)
+    else:
+        return 20
+
+
+def _flatten_states(state):
+    """
+    Return the subset states combined by nested 'and' or 'or' subset states.
+    """
+    if type(state) is MultiOrState:
+        return sum((_flatten_states(child) if type(child) in (OrState, MultiOrState)
+                    else [child] for child in state.states), [])
+    elif type(state) in (AndState, OrState):
+        states = []
+        for child in (state.state1, state.state2):
+            if type(child) is type(state) or (type(state) is OrState and
+                                              type(child) is MultiOrState):
+                states.extend(_flatten_states(child))
+            else:
+                states.append(child)
+        return states
+    else:
+        return [state]
+
+
+def _can_restrict_view(view, shape):
+    """
+    Return whether `_restrict_view` supports the given view of an array with
+    the specified shape.
+    """
+
+    if view is None or view is Ellipsis:
+        return True
+
+    if not isinstance(view, tuple):
+        view = (view,)
+
+    if (len(view) <= len(shape) and
+            all(isinstance(v, (slice, int, np.integer)) for v in view)):
+        return True
+
+    return (len(view) == len(shape) and
+            all(isinstance(v, np.ndarray) and v.ndim == 1 and v.dtype.kind in 'iu'
+                for v in view))
+
+
+def _restrict_view(view, shape, positions):
+    """
+    Given a view of an array with the specified shape and positions in the
+    result of applying the view (as returned by `numpy.nonzero`), return a view
+    that selects these positions in the original array. The view should be
+    supported, as determined by `_can_restrict_view`.
+    """
+
+    if view is None or view is Ellipsis:
+        return positions
+
+    if not isinstance(view, tuple):
+        view = (view,)
+
+    if all(isinstance(v, (slice, int, np.integer)) for v in view):
+        view = view + (slice(None),) * (len(shape) - len(view))
+        positions = iter(positions)
+        result = []
+        for v, size in zip(view, shape):
+            if isinstance(v, slice):
+                start, _, step = v.indices(size)
+                result.append(start + step * next(positions))
+            else:
+                result.append(v % size)
+        return tuple(result)
+
+    # Views of individual values, as used when computing combinations of
+    # subset states which are themselves nested in combinations.
+    return tuple(v[positions[0]] for v in view)
+
+
+def _planned_mask(data, view, states, op):
+    """
+    Compute the mask for the combination of several subset states with
+    ``op``, which should be `operator.and_` or `operator.or_`.
+    """
+
+    shape = view_shape(data.shape, view)
+    size = int(np.prod(shape))
+
+    costs = [state._evaluation_cost() for state in states]
+
+    if (size < PLANNER_MIN_SIZE or all(cost is None for cost in costs) or
+            not _can_restrict_view(view, data.shape)):
+        result = states[0].to_mask(data, view)
+        for state in states[1:]:
+            result = op(result, state.to_mask(data, view))
+        return result
+
+    # Subset states with unknown costs are computed for the whole view first,
+    # then the others are sorted by the cost per value that gets decided.
+    unknown = [state for state, cost in zip(states, costs) if cost is None]
+    known = [(state, cost) for state, cost in zip(states, costs) if cost is not None]
+
+    if len(known) > 1:
+        random = np.random.RandomState(0)
+        positions = np.unravel_index(random.randint(0, size, PLANNER_SAMPLE_SIZE), shape)
+        sample_view = _restrict_view(view, data.shape, positions)
+        ranked = []
+        for state, cost in known:
+            selected = np.count_nonzero(uncached_mask(state, data, sample_view)) / PLANNER_SAMPLE_SIZE
+            decided = 1 - selected if op is operator.and_ else selected
+            ranked.append((cost / max(decided, 1. / PLANNER_SAMPLE_SIZE), state))
+        known = [state for _, state in sorted(ranked, key=lambda x: x[0])]
+    else:
+        known = [state for state, _ in known]
+
+    result = None
+
+    for state in unknown + known:
+
+        if result is None:
+            result = np.array(broadcast_to(state.to_mask(data, view), shape), dtype=bool)
+            continue
+
+        # For 'and', only the values that are still selected are undecided,
+        # while for 'or', only the values that are not yet selected are.
+        undecided = result if op is operator.and_ else ~result
+        n_undecided = np.count_nonzero(undecided)
+
+        if state in unknown or n_undecided > size * PLANNER_MAX_UNDECIDED:
+            result = op(result, state.to_mask(data, view))
+        else:
+            # Note that we still compute the mask if no values are undecided,
+            # so that the same errors are raised as when computing all masks.
+            positions = np.nonzero(undecided)
+            result[positions] = uncached_mask(state, data,
+                                              _restrict_view(view, data.shape, positions))
+
+    return result
+
+
+def _categorical_codes(data, att, view=None):
+    """
+    If ``att`` is a categorical component of ``data`` and all the values are
+    in the categories, return the categories and the integer codes of the
+    values in ``view``, otherwise return `None`.
+    """
+
+    try:
+        component = data.get_component(att)
+    except (AttributeError, IncompatibleAttribute):
+        return None
+
+    if (not isinstance(component, CategoricalComponent) or
+            not isinstance(component.categories, np.ndarray)):
+        return None
+
+    codes = component.compact_codes
+
+    if view is not None:
+        codes = codes[view]
+
+    if np.any(codes == len(component.categories)):
+        return None
+
+    return component.categories, codes
+
+
+def _valid_codes(codes, n_categories):
+    """
+    Return the values in ``codes`` that are valid integer codes for
+    ``n_categories`` categories.
+    """
+    codes = np.asarray(codes).ravel()
+    if codes.dtype.kind not in 'iuf':
+        return np.zeros(0, dtype=int)
+    valid = (codes >= 0) & (codes < n_categories) & (codes == np.floor(codes))
+    return codes[valid].astype(int)
+
+
 @contract(subsets='list(isinstance(Subset))', returns=Subset)
 def _combine(subsets, operator):
     state = operator(*[s.subset_state for s in subsets])
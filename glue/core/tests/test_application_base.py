@@ -2,6 +2,8 @@ import os
 import json
 from unittest.mock import MagicMock
 
+from numpy.testing import assert_equal
+
 from .. import Data
 from ..application_base import Application
 
@@ -36,6 +38,32 @@ def test_session(tmpdir):
     MockApplication.restore_session(session_file)
 
 
+def test_session_archive(tmpdir):
+
+    # Sessions are only saved as archives if requested, even when including
+    # the data, since older versions of glue can't read archives.
+
+    session_file = tmpdir.join('test.glu').strpath
+
+    app = MockApplication()
+    app.data_collection.append(Data(x=[1, 2, 3], label='data'))
+
+    for include_data, archive in [(True, None), (True, True), (False, True), (True, False)]:
+
+        if archive is None:
+            app.save_session(session_file, include_data=include_data)
+        else:
+            app.save_session(session_file, include_data=include_data, archive=archive)
+
+        with open(session_file, 'rb') as f:
+            is_archive = f.read(2) == b'PK'
+
+        assert is_archive is (archive is True)
+
+        app2 = MockApplication.restore_session(session_file)
+        assert_equal(app2.data_collection[0]['x'], [1, 2, 3])
+
+
 def test_set_data_color():
 
     x = Data(x=[1, 2, 3])
@@ -4,14 +4,15 @@ import operator
 
 import pytest
 import numpy as np
-from unittest.mock import MagicMock
+from unittest.mock import MagicMock, patch
 
 from glue import core
 from glue.tests.helpers import requires_astropy
+from glue.utils import categorical_ndarray
 
 from ..coordinates import Coordinates
 from ..component import (Component, DerivedComponent, CoordinateComponent,
-                         CategoricalComponent)
+                         CategoricalComponent, LazyComponent, TypeInference)
 from ..component_id import ComponentID
 from ..data import Data
 from ..parse import ParsedCommand, ParsedComponentLink
@@ -37,6 +38,77 @@ class TestComponent(object):
         assert self.component.ndim is len(self.data.shape)
 
 
+class TestLazyComponent(object):
+
+    def setup_method(self, method):
+        self.calls = []
+        self.values = np.arange(12).reshape((3, 4))
+        self.component = LazyComponent(self.load, (3, 4), units='m',
+                                       section=self.section)
+
+    def load(self):
+        self.calls.append(None)
+        return self.values
+
+    def section(self, view):
+        self.calls.append(view)
+        return self.values[view]
+
+    def test_shape(self):
+        assert self.component.shape == (3, 4)
+        assert self.component.ndim == 2
+        assert self.component.numeric
+        assert self.component.units == 'm'
+        assert not self.component.loaded
+        assert self.calls == []
+
+    def test_section(self):
+        np.testing.assert_equal(self.component[1:, 2], [6, 10])
+        assert self.calls == [(slice(1, None), 2)]
+        assert not self.component.loaded
+
+    def test_load(self):
+        np.testing.assert_equal(self.component[self.values > 6], [7, 8, 9, 10, 11])
+        np.testing.assert_equal(self.component.data, self.values)
+        np.testing.assert_equal(self.component[1:, 2], [6, 10])
+        assert self.component.loaded
+        assert self.calls == [None]
+
+
+class TestTypeInference(object):
+
+    def test_sample(self):
+        values = np.array(['1', '2', 'a'] * 1000)
+        inference = TypeInference(sample_size=100)
+        inference.update(values)
+        assert not inference.categorical
+        inference = TypeInference(sample_size=100, threshold=0.8)
+        inference.update(values)
+        assert inference.categorical
+
+    def test_chunks(self):
+        inference = TypeInference(sample_size=10)
+        inference.update(np.array(['1.5', '2'] * 10))
+        assert not inference.categorical
+        inference.update(np.array(['a', 'b'] * 20))
+        assert inference.categorical
+
+    def test_empty(self):
+        assert not TypeInference().categorical
+
+    def test_autotyped_sample_size(self):
+        from glue.config import settings
+        old = settings.TYPE_INFERENCE_SAMPLE_SIZE
+        settings.TYPE_INFERENCE_SAMPLE_SIZE = 10
+        try:
+            values = np.array(['1'] * 1000 + ['a'] * 10)
+            component = Component.autotyped(values)
+            assert not component.categorical
+            assert np.isnan(component.data[-10:]).all()
+        finally:
+            settings.TYPE_INFERENCE_SAMPLE_SIZE = old
+
+
 class TestComponentID(object):
 
     def setup_method(self, method):
@@ -176,6 +248,37 @@ class TestCategoricalComponent(object):
                                       np.array([1, 3, 'a', 'b'], dtype=object))
         np.testing.assert_array_equal(c.codes, [0, 1, 1, 0, 2, 3, 2])
 
+    def test_compact_storage(self):
+        cat_comp = CategoricalComponent(['b', 'a', 'c', 'a'])
+        assert cat_comp.compact_codes.dtype == np.uint8
+        np.testing.assert_equal(cat_comp.compact_codes, [1, 0, 2, 0])
+        assert cat_comp._labels is None
+        np.testing.assert_equal(cat_comp[1:3], ['a', 'c'])
+        np.testing.assert_equal(cat_comp[1:3].codes, [0, 2])
+        assert cat_comp[2] == 'c'
+
+    def test_jitter_view(self):
+        cat_comp = CategoricalComponent(['b', 'a', 'c', 'a'], jitter='uniform')
+        np.testing.assert_equal(cat_comp[1:3].codes, cat_comp.codes[1:3])
+
+    def test_cached_codes(self):
+        cat_comp = CategoricalComponent(['b', 'a', 'c', 'a'])
+        # The codes are computed without generating the labels, and are only
+        # computed once. The labels are generated on each access rather than
+        # being kept in memory, but re-use the cached codes.
+        with patch.object(categorical_ndarray, 'from_codes') as from_codes:
+            codes = cat_comp.codes
+            assert from_codes.call_count == 0
+        assert cat_comp.codes is codes
+        assert cat_comp.data is not cat_comp.data
+        assert cat_comp.data.codes is codes
+        cat_comp.jitter(method='uniform')
+        jittered = cat_comp.codes
+        assert cat_comp.codes is jittered
+        assert cat_comp.data.codes is jittered
+        cat_comp.jitter(method=None)
+        assert cat_comp.codes is codes
+
     def test_valueerror_on_bad_jitter(self):
 
         with pytest.raises(ValueError):
@@ -0,0 +1,102 @@
+import threading
+
+import pytest
+import numpy as np
+
+from ..compute import ComputeExecutor, check_cancelled, current_job
+from ..data import Data
+from ..exceptions import ComputationCancelled
+
+
+def test_submit():
+
+    executor = ComputeExecutor(max_workers=2)
+
+    job = executor.submit('a', lambda x, y=1: x + y, 1, y=2)
+    assert job.future.result() == 3
+    assert job.wait(1)
+    assert not job.cancelled
+
+    executor.shutdown()
+
+
+def test_check_cancelled_outside_job():
+    assert current_job() is None
+    check_cancelled()
+
+
+def test_supersede():
+
+    executor = ComputeExecutor(max_workers=4)
+
+    started = threading.Event()
+    release = threading.Event()
+    running = []
+
+    def slow():
+        running.append(current_job())
+        started.set()
+        release.wait(5)
+        check_cancelled()
+        return 'slow'
+
+    def fast(value):
+        # Jobs for the same key should never run concurrently
+        assert all(job.done for job in running)
+        return value
+
+    job1 = executor.submit('a', slow)
+    assert started.wait(5)
+
+    # The second job is superseded by the third one before it starts, and the
+    # third one waits for the first one to be done.
+    job2 = executor.submit('a', fast, 2)
+    job3 = executor.submit('a', fast, 3)
+
+    # Jobs for other keys are not affected
+    other = executor.submit('b', lambda: 4)
+    assert other.future.result(5) == 4
+
+    assert executor.get_job('a') is job3
+
+    release.set()
+
+    assert job3.future.result(5) == 3
+
+    assert job1.cancelled
+    with pytest.raises(ComputationCancelled):
+        job1.future.result(5)
+
+    assert job2.cancelled
+    assert job2.done
+
+    job3.wait(5)
+    assert executor.get_job('a') is None
+
+    executor.shutdown()
+
+
+def test_cancel_histogram():
+
+    # Check that computations over chunks stop when the job is cancelled
+
+    data = Data(x=np.arange(1000))
+
+    executor = ComputeExecutor(max_workers=1)
+
+    def histogram():
+        current_job().cancel()
+        return data.compute_histogram([data.id['x']], range=[(0, 1000)],
+                                      bins=[10], n_chunk_max=100)
+
+    job = executor.submit('a', histogram)
+
+    with pytest.raises(ComputationCancelled):
+        job.future.result(5)
+
+    # Outside of jobs the computation proceeds as normal
+    result = data.compute_histogram([data.id['x']], range=[(0, 1000)],
+                                    bins=[10], n_chunk_max=100)
+    assert result.sum() == 1000
+
+    executor.shutdown()
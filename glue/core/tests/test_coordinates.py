@@ -7,7 +7,7 @@ from numpy.testing import assert_allclose, assert_equal
 from glue.core.tests.test_state import clone
 from glue.tests.helpers import requires_astropy
 
-from ..coordinate_helpers import (axis_label, world_axis,
+from ..coordinate_helpers import (axis_label, world_axis, CoordinateCache,
                                   pixel2world_single_axis, dependent_axes)
 from ..coordinates import (coordinates_from_header, IdentityCoordinates,
                            WCSCoordinates, AffineCoordinates,
@@ -363,6 +363,80 @@ def test_pixel2world_single_axis():
     assert_allclose(pixel2world_single_axis(coord, x, y, z, world_axis=2), [1.5, 1.5, 1.5])
 
 
+class CountingWCSCoordinates(WCSCoordinates):
+
+    calls = 0
+
+    def pixel_to_world_values(self, *pixel):
+        self.calls += 1
+        return super(CountingWCSCoordinates, self).pixel_to_world_values(*pixel)
+
+
+def test_pixel2world_single_axis_cache():
+
+    coord = CountingWCSCoordinates(naxis=3)
+    coord.wcs.ctype = 'HPLN-TAN', 'HPLT-TAN', 'Time'
+    coord.wcs.crval = 1, 1, 1
+    coord.wcs.crpix = 1, 1, 1
+    coord.wcs.cd = [[0.9, 0.1, 0], [-0.1, 0.9, 0], [0, 0, 1]]
+
+    x = np.array([0.2, 0.4, 0.6])
+    y = np.array([0.3, 0.6, 0.9])
+    z = np.array([0.5, 0.5, 0.5])
+
+    cache = CoordinateCache()
+
+    # The first two world axes depend on the same pixel axes so should be
+    # computed in a single call.
+    assert_allclose(pixel2world_single_axis(coord, x, y, z, world_axis=0,
+                                            cache=cache, cache_key=('test',)),
+                    [1.21004705, 1.42012044, 1.63021455])
+    assert_allclose(pixel2world_single_axis(coord, x, y, z, world_axis=1,
+                                            cache=cache, cache_key=('test',)),
+                    [1.24999002, 1.499947, 1.74985138])
+    assert coord.calls == 1
+
+    assert_allclose(pixel2world_single_axis(coord, x, y, z, world_axis=2,
+                                            cache=cache, cache_key=('test',)),
+                    [1.5, 1.5, 1.5])
+    assert coord.calls == 2
+
+    cache.clear()
+    pixel2world_single_axis(coord, x, y, z, world_axis=0,
+                            cache=cache, cache_key=('test',))
+    assert coord.calls == 3
+
+
+def test_world_coordinates_cached_on_data():
+
+    from glue.core import Data
+
+    coord = CountingWCSCoordinates(naxis=3)
+    coord.wcs.ctype = 'RA---TAN', 'DEC--TAN', 'VELO'
+    coord.wcs.crval = 10, 20, 100
+    coord.wcs.crpix = 1, 1, 1
+    coord.wcs.cdelt = -0.1, 0.1, 2
+
+    data = Data(x=np.ones((4, 5, 6)), coords=coord)
+
+    expected = [data[cid] for cid in data.world_component_ids]
+    calls = coord.calls
+
+    for iter in range(2):
+        for cid, values in zip(data.world_component_ids, expected):
+            assert_allclose(data[cid], values)
+            assert_allclose(data[cid, 1:3, 0, ::2], values[1:3, 0, ::2])
+
+    # The full arrays were already cached, and for the view the spatial axes
+    # share one transformation while the spectral axis needs a separate one.
+    assert coord.calls == calls + 2
+
+    # Changing the values in the data clears the cache
+    data.update_components({data.id['x']: np.zeros((4, 5, 6))})
+    assert_allclose(data[data.world_component_ids[0]], expected[0])
+    assert coord.calls == calls + 3
+
+
 def test_affine():
 
     matrix = np.array([[2, 3, -1], [1, 2, 2], [0, 0, 1]])
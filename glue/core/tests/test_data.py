@@ -17,7 +17,8 @@ from ..data import Data, pixel_label, BaseCartesianData
 from ..link_helpers import LinkSame
 from ..data_collection import DataCollection
 from ..exceptions import IncompatibleAttribute
-from ..hub import Hub
+from ..hub import Hub, HubListener
+from ..message import NumericalDataChangedMessage
 from ..registry import Registry
 from ..subset import (Subset, CategoricalROISubsetState, SubsetState,
                       RoiSubsetState, RangeSubsetState, SliceSubsetState,
@@ -721,6 +722,76 @@ def test_update_values_from_data_order():
     assert [cid.label for cid in d2.main_components] == ['j', 'a', 'c', 'b', 'f']
 
 
+class ChangeListener(HubListener):
+
+    def __init__(self, data):
+        self.messages = []
+        data.hub.subscribe(self, NumericalDataChangedMessage,
+                           handler=self.messages.append)
+
+
+def test_update_values_from_data_appended():
+
+    dc = DataCollection([Data(a=[1, 2, 3], b=[4., np.nan, 6], label='banana')])
+    d1 = dc[0]
+    listener = ChangeListener(d1)
+    version = d1._data_version
+
+    # Identical values should not result in a change of version or a message
+    d1.update_values_from_data(Data(a=[1, 2, 3], b=[4., np.nan, 6], label='banana'))
+    assert d1._data_version == version
+    assert listener.messages == []
+
+    # Appending values should indicate which region has changed
+    d1.update_values_from_data(Data(a=[1, 2, 3, 4], b=[4., np.nan, 6, 7], label='banana'))
+    assert d1._data_version != version
+    assert len(listener.messages) == 1
+    assert listener.messages[0].region == (slice(3, 4),)
+    assert_equal(d1['a'], [1, 2, 3, 4])
+
+    # Changing values in the middle of the data
+    d1.update_values_from_data(Data(a=[1, 5, 5, 4], b=[4., np.nan, 6, 7], label='banana'))
+    assert listener.messages[1].region == (slice(1, 3),)
+
+    # If the components differ, the region is not known
+    d1.update_values_from_data(Data(a=[1, 5, 5, 4], c=[4., np.nan, 6, 7], label='banana'))
+    assert listener.messages[2].region is None
+
+
+def test_update_values_from_data_truncated():
+
+    dc = DataCollection([Data(a=np.arange(10), label='banana')])
+    d1 = dc[0]
+    subset = dc.new_subset_group(subset_state=d1.id['a'] > 4)
+    assert_equal(d1.subsets[0].to_mask(), np.arange(10) > 4)
+    listener = ChangeListener(d1)
+    version = d1._data_version
+
+    # Removing items should always count as a change, even though the values
+    # in the remaining items are unchanged.
+    d1.update_values_from_data(Data(a=np.arange(8), label='banana'))
+    assert d1._data_version != version
+    assert len(listener.messages) == 1
+    assert listener.messages[0].region is None
+    assert_equal(subset.subsets[0].to_mask(), np.arange(8) > 4)
+
+
+def test_update_components_message():
+
+    # The values passed to update_components are not compared to the existing
+    # ones, so a message without a region is always sent
+
+    dc = DataCollection([Data(a=np.zeros((4, 2)), label='banana')])
+    d1 = dc[0]
+    listener = ChangeListener(d1)
+    version = d1._data_version
+
+    d1.update_components({d1.id['a']: np.zeros((4, 2))})
+    assert d1._data_version != version
+    assert len(listener.messages) == 1
+    assert listener.messages[0].region is None
+
+
 def test_find_component_id_with_cid():
 
     # Regression test for a bug that caused Data.find_component_id to return
@@ -991,6 +1062,56 @@ def test_compute_statistic_shape():
     assert result.shape == (20,)
 
 
+@pytest.mark.parametrize('axis', (None, 1, (0, 2)))
+def test_compute_statistics(axis):
+
+    # Make sure that computing several statistics at once gives the same
+    # results as computing them one by one.
+
+    array = np.random.random((10, 20, 30))
+    array[2, 3, 4] = np.nan
+
+    data = Data(x=array, y=array)
+
+    subset_state = data.id['y'] > 0.3
+
+    statistics = ['minimum', 'percentile', 'maximum', 'median', 'percentile', 'mean']
+    percentiles = [5, 95]
+
+    results = data.compute_statistics(statistics, data.id['x'], axis=axis,
+                                      subset_state=subset_state,
+                                      percentile=percentiles)
+
+    assert len(results) == len(statistics)
+
+    percentiles = iter(percentiles)
+    for statistic, result in zip(statistics, results):
+        expected = data.compute_statistic(statistic, data.id['x'], axis=axis,
+                                          subset_state=subset_state,
+                                          percentile=next(percentiles) if statistic == 'percentile' else None)
+        assert_allclose(result, expected)
+
+
+def test_compute_statistics_chunks():
+
+    data = Data(x=np.random.random((30, 10)))
+
+    results = data.compute_statistics(['minimum', 'maximum'], data.id['x'], axis=(0,))
+    results_chunked = data.compute_statistics(['minimum', 'maximum'], data.id['x'],
+                                              axis=(0,), n_chunk_max=10)
+
+    assert_allclose(results, results_chunked)
+
+
+def test_compute_statistics_empty_subset():
+
+    data = Data(x=np.empty((30, 20)))
+
+    results = data.compute_statistics(['minimum', 'maximum'], data.id['x'],
+                                      subset_state=SubsetState())
+    assert_equal(results, [np.nan, np.nan])
+
+
 def test_compute_histogram_log():
 
     # Make sure that the returned histogram is NaN everywhere if either of the
@@ -1032,6 +1153,33 @@ def test_compute_histogram_dask():
     assert_allclose(result, [1, 4])
 
 
+@pytest.mark.parametrize('use_dask', (False, True))
+def test_compute_histogram_chunks(use_dask):
+
+    # Make sure that computing the histogram in chunks gives the same result
+    # as computing it in one go.
+
+    x = np.random.normal(size=(40, 25))
+    y = np.random.normal(size=(40, 25))
+    w = np.random.random((40, 25))
+
+    if use_dask:
+        da = pytest.importorskip('dask.array')
+        x, y, w = da.from_array(x, chunks=(10, 5)), da.from_array(y, chunks=(10, 5)), da.from_array(w, chunks=(10, 5))
+
+    data = Data(x=x, y=y, w=w)
+
+    for kwargs in ({'cids': [data.id['x']], 'range': [[-2, 1.5]], 'bins': [7]},
+                   {'cids': [data.id['x'], data.id['y']], 'range': [[-2, 1.5], [2, -1]],
+                    'bins': [7, 3], 'weights': data.id['w']},
+                   {'cids': [data.id['w']], 'range': [[0.1, 0.9]], 'bins': [4], 'log': [True],
+                    'subset_state': data.id['x'] > 0.5}):
+
+        expected = data.compute_histogram(**kwargs)
+        result = data.compute_histogram(n_chunk_max=60, **kwargs)
+        assert_allclose(result, expected)
+
+
 def test_base_cartesian_data_coords():
 
     # Make sure that world_component_ids works in both the case where
@@ -7,7 +7,8 @@ from ..data import Data
 from ..data_collection import DataCollection
 from ..exceptions import InvalidSubscriber, InvalidMessage
 from ..hub import Hub, HubListener
-from ..message import SubsetMessage, Message
+from ..message import (SubsetMessage, Message, SubsetUpdateMessage,
+                       SubsetDeleteMessage, NumericalDataChangedMessage)
 from ..subset import Subset
 
 
@@ -122,6 +123,90 @@ class TestHub(object):
         handler.assert_called_once_with(msg_instance)
         handler2.assert_called_once_with(msg_instance)
 
+    def test_routing_table_updated(self):
+        msg, handler, subscriber = self.get_subscription()
+        handler2 = MagicMock()
+
+        self.hub.subscribe(subscriber, msg, handler)
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 1
+        assert SubsetMessage in self.hub._routes
+
+        # Subscribing to a more specific message should update the routing
+        self.hub.subscribe(subscriber, SubsetMessage, handler2)
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 1
+        assert handler2.call_count == 1
+
+        self.hub.unsubscribe(subscriber, SubsetMessage)
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 2
+        assert handler2.call_count == 1
+
+        self.hub.unsubscribe_all(subscriber)
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 2
+
+    def test_removed_handler_falls_back(self):
+
+        class Listener(HubListener):
+            def handle(self, message):
+                pass
+
+        msg, handler, subscriber = self.get_subscription()
+        listener = Listener()
+        self.hub.subscribe(subscriber, msg, handler)
+        self.hub.subscribe(subscriber, SubsetMessage, listener.handle)
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 0
+
+        # The bound method is removed from the subscriptions once its instance
+        # is deleted, in which case the less specific subscription is used.
+        del listener
+        self.hub.broadcast(SubsetMessage(Subset(None)))
+        assert handler.call_count == 1
+
+    def test_delay_callbacks_coalesces(self):
+        msg, handler, subscriber = self.get_subscription()
+        self.hub.subscribe(subscriber, Message, handler)
+
+        data = Data()
+        subset1 = Subset(None)
+        subset2 = Subset(None)
+
+        with self.hub.delay_callbacks():
+            self.hub.broadcast(SubsetUpdateMessage(subset1, attribute='style'))
+            self.hub.broadcast(NumericalDataChangedMessage(data))
+            self.hub.broadcast(SubsetUpdateMessage(subset1, attribute='style'))
+            self.hub.broadcast(SubsetUpdateMessage(subset1, attribute='label'))
+            self.hub.broadcast(SubsetUpdateMessage(subset2, attribute='style'))
+            self.hub.broadcast(NumericalDataChangedMessage(data))
+            self.hub.broadcast(Message('Test'))
+            self.hub.broadcast(Message('Test'))
+            self.hub.broadcast(SubsetDeleteMessage(subset2))
+            assert handler.call_count == 0
+
+        received = [(type(call[0][0]), call[0][0].sender) for call in handler.call_args_list]
+        assert received[:4] == [(SubsetUpdateMessage, subset1),
+                                (SubsetUpdateMessage, subset1),
+                                (NumericalDataChangedMessage, data),
+                                (Message, 'Test')]
+        assert received[4:] == [(Message, 'Test'), (SubsetDeleteMessage, subset2)]
+        assert handler.call_args_list[1][0][0].attribute == 'label'
+
+        assert self.hub.coalesced_messages[SubsetUpdateMessage] == 2
+        assert self.hub.coalesced_messages[NumericalDataChangedMessage] == 1
+        assert Message not in self.hub.coalesced_messages
+
+    def test_delay_callbacks_nested(self):
+        msg, handler, subscriber = self.get_subscription()
+        self.hub.subscribe(subscriber, msg, handler)
+        with self.hub.delay_callbacks():
+            with self.hub.delay_callbacks():
+                self.hub.broadcast(msg('Test'))
+            assert handler.call_count == 0
+        assert handler.call_count == 1
+
     def test_invalid_unsubscribe_ignored(self):
         msg, handler, subscriber = self.get_subscription()
         self.hub.unsubscribe(handler, subscriber)
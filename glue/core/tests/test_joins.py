@@ -1,8 +1,10 @@
 import pytest
+import numpy as np
 from numpy.testing import assert_array_equal
 
 from .. import Data, DataCollection
 from ..exceptions import IncompatibleAttribute
+from ..joins import JoinIndex, get_join_index, _JOIN_INDICES
 from .test_state import clone
 
 
@@ -196,3 +198,78 @@ def test_mismatch():
                                  "join sets should match, or one of the "
                                  "component sets should contain a single "
                                  "component.")
+
+
+@pytest.mark.parametrize('dtype', [int, float, 'U3'])
+def test_join_index(dtype):
+
+    keys = np.array([3, 1, 2, 3, 5, 1, 1], dtype=dtype)
+    index = JoinIndex(keys)
+
+    for values in ([], [1], [3, 5], [4], [1, 1, 2, 6], [5, 3, 1, 2]):
+        values = np.array(values, dtype=dtype)
+        assert_array_equal(np.sort(index.lookup(values)),
+                           np.nonzero(np.in1d(keys, values))[0])
+        assert_array_equal(index.mask(values), np.in1d(keys, values))
+
+
+def test_join_index_nan():
+    index = JoinIndex(np.array([1., np.nan, 2.]))
+    assert_array_equal(index.mask([np.nan, 2.]), [0, 0, 1])
+
+
+def test_join_index_cache():
+
+    d1 = Data(x=[1, 2, 3], label='d1')
+    d2 = Data(a=[1, 1, 2, 5], b=[2, 3, 3, 5], label='d2')
+    d1.join_on_key(d2, 'x', 'a')
+
+    s = d1.new_subset()
+    s.subset_state = d2.id['b'] > 2
+    assert_array_equal(s.to_mask(), [1, 1, 0])
+
+    # The index is only built once
+    index = get_join_index(d1, (d1.id['x'],))
+    s.subset_state = d2.id['b'] > 4
+    assert_array_equal(s.to_mask(), [0, 0, 0])
+    assert get_join_index(d1, (d1.id['x'],)) is index
+
+    # But is rebuilt when the keys change
+    d1.update_components({d1.id['x']: [5, 2, 3]})
+    assert get_join_index(d1, (d1.id['x'],)) is not index
+    assert_array_equal(s.to_mask(), [1, 0, 0])
+
+
+def test_join_index_incompatible_types():
+
+    # Keys that can't be ordered against each other should never match
+
+    index = JoinIndex(np.array([1, 2, 3]))
+    assert_array_equal(index.mask(np.array(['a', '1'])), [0, 0, 0])
+    assert_array_equal(index.mask(np.array(['a', 2], dtype=object)), [0, 1, 0])
+
+    index = JoinIndex(np.array([1, 'a', 2.5], dtype=object))
+    assert_array_equal(index.mask(np.array(['a', 2], dtype=object)), [0, 1, 0])
+    assert_array_equal(index.mask([1, 3]), [1, 0, 0])
+
+    d1 = Data(x=[1, 2, 3], label='d1')
+    d2 = Data(a=np.array(['1', 'b', 'c'], dtype=object), b=[2, 3, 3], label='d2')
+    d1.join_on_key(d2, 'x', 'a')
+
+    s = d1.new_subset()
+    s.subset_state = d2.id['b'] > 2
+    assert_array_equal(s.to_mask(), [0, 0, 0])
+
+
+def test_join_index_invalidate():
+
+    d1 = Data(x=[1, 2, 3], y=[4, 5, 6], label='d1')
+
+    index = get_join_index(d1, (d1.id['x'],))
+    assert get_join_index(d1, (d1.id['x'],)) is index
+    assert d1 in _JOIN_INDICES
+
+    # Removing components drops the indices for the dataset
+    d1.remove_component(d1.id['y'])
+    assert d1 not in _JOIN_INDICES
+    assert get_join_index(d1, (d1.id['x'],)) is not index
@@ -9,7 +9,7 @@ from ..component_link import ComponentLink
 from ..data import ComponentID, DerivedComponent, Data, Component
 from ..coordinates import IdentityCoordinates
 from ..data_collection import DataCollection
-from ..link_manager import (LinkManager, accessible_links, discover_links,
+from ..link_manager import (LinkManager, LinkIndex, accessible_links, discover_links,
                             find_dependents, is_convertible_to_single_pixel_cid,
                             equivalent_pixel_cids, pixel_cid_to_pixel_cid_matrix)
 from ..link_helpers import LinkSame, MultiLink
@@ -114,6 +114,13 @@ class TestDiscoverLinks(object):
 
         assert links[self.cs[4]] is self.links[-1]
 
+    def test_link_index(self):
+        """ A LinkIndex can be re-used for several datasets """
+        index = LinkIndex(self.links)
+        assert discover_links(self.data, index) == discover_links(self.data, self.links)
+        other = Data(x=[1, 2, 3])
+        assert discover_links(other, index) == {}
+
 
 class TestFindDependents(object):
 
@@ -487,3 +494,75 @@ def test_pixel_cid_to_pixel_cid_matrix():
     expected = np.array([[0, 0], [0, 0], [1, 0]], dtype=bool)
     assert_array_equal(pixel_cid_to_pixel_cid_matrix(data2, data3), expected)
     assert_array_equal(pixel_cid_to_pixel_cid_matrix(data3, data2), expected.T)
+
+
+def test_incremental_update(monkeypatch):
+
+    # Adding or removing links should only update the externally derivable
+    # components of datasets that can make use of the links.
+
+    datasets = [Data(x=[1, 2, 3], label='d{0}'.format(i)) for i in range(4)]
+    dc = DataCollection(datasets)
+
+    updated = []
+    original = Data._set_externally_derivable_components
+
+    def tracking(self, derivable_components):
+        updated.append(self)
+        return original(self, derivable_components)
+
+    monkeypatch.setattr(Data, '_set_externally_derivable_components', tracking)
+
+    link1 = LinkSame(datasets[0].id['x'], datasets[1].id['x'])
+    dc.add_link(link1)
+    assert updated == datasets[:2]
+    assert datasets[1].id['x'] in datasets[0].externally_derivable_components
+
+    del updated[:]
+    link2 = LinkSame(datasets[1].id['x'], datasets[2].id['x'])
+    dc.add_link(link2)
+    assert updated == datasets[:3]
+    assert datasets[2].id['x'] in datasets[0].externally_derivable_components
+
+    del updated[:]
+    dc.remove_link(link2)
+    assert updated == datasets[:3]
+    assert datasets[2].id['x'] not in datasets[0].externally_derivable_components
+    assert datasets[1].id['x'] in datasets[0].externally_derivable_components
+
+    # Datasets appended to the collection are synced in full
+    del updated[:]
+    dc.append(Data(x=[1, 2, 3], label='d4'))
+    assert len(updated) == 5
+
+
+def test_pixel_alignment_cached(monkeypatch):
+
+    from .. import link_manager
+
+    data1 = Data(x=np.ones((2, 3)))
+    data2 = Data(y=np.ones((2, 3)))
+    data3 = Data(z=np.ones((2, 3)))
+    dc = DataCollection([data1, data2, data3])
+
+    calls = []
+    original = link_manager.equivalent_pixel_cids
+
+    def counting(reference, target):
+        calls.append((reference, target))
+        return original(reference, target)
+
+    monkeypatch.setattr(link_manager, 'equivalent_pixel_cids', counting)
+
+    dc._link_manager.update_externally_derivable_components()
+    assert len(calls) == 0
+
+    dc.add_link(LinkSame(data1.pixel_component_ids[0], data2.pixel_component_ids[0]))
+    dc.add_link(LinkSame(data1.pixel_component_ids[1], data2.pixel_component_ids[1]))
+
+    assert data2 in data1.pixel_aligned_data
+    assert data1 in data2.pixel_aligned_data
+    assert len(data3.pixel_aligned_data) == 0
+
+    # Only pairs involving a modified dataset as the reference are recomputed
+    assert all(reference is not data3 for reference, target in calls)
@@ -0,0 +1,172 @@
+import gc
+import operator
+
+import numpy as np
+from numpy.testing import assert_equal
+
+from ..data import Data
+from ..subset import InequalitySubsetState, AndState
+from ..mask_cache import MaskCache, mask_cache, cached_mask
+
+
+class CountingState(object):
+
+    def __init__(self, size=10):
+        self.size = size
+        self.calls = 0
+
+    def to_mask(self, data, view=None):
+        self.calls += 1
+        mask = np.ones(self.size, dtype=bool)
+        if view is not None:
+            mask = mask[view]
+        return mask
+
+
+class SimpleData(object):
+    pass
+
+
+def test_hits_and_misses():
+
+    cache = MaskCache(max_bytes=1000)
+    state = CountingState()
+    data = SimpleData()
+
+    cache.get_mask(CountingState.to_mask, state, data)
+    cache.get_mask(CountingState.to_mask, state, data)
+    cache.get_mask(CountingState.to_mask, state, data, view=slice(2, 5))
+    cache.get_mask(CountingState.to_mask, state, data, view=(slice(2, 5),))
+    cache.get_mask(CountingState.to_mask, state, data, view=slice(2, 5))
+
+    assert state.calls == 3
+    assert cache.stats['hits'] == 2
+    assert cache.stats['misses'] == 3
+    assert cache.stats['entries'] == 3
+    assert cache.nbytes == 16
+
+
+def test_unhashable_view():
+
+    cache = MaskCache(max_bytes=1000)
+    state = CountingState()
+    data = SimpleData()
+
+    view = np.array([1, 2, 3])
+    assert_equal(cache.get_mask(CountingState.to_mask, state, data, view=view), True)
+    cache.get_mask(CountingState.to_mask, state, data, view=view)
+
+    assert state.calls == 2
+    assert len(cache) == 0
+
+
+def test_lru_eviction():
+
+    cache = MaskCache(max_bytes=25)
+    states = [CountingState() for i in range(3)]
+    data = SimpleData()
+
+    cache.get_mask(CountingState.to_mask, states[0], data)
+    cache.get_mask(CountingState.to_mask, states[1], data)
+
+    # Access the first state again so that the second one is the least
+    # recently used.
+    cache.get_mask(CountingState.to_mask, states[0], data)
+
+    cache.get_mask(CountingState.to_mask, states[2], data)
+
+    assert cache.stats['evictions'] == 1
+    assert cache.nbytes == 20
+
+    cache.get_mask(CountingState.to_mask, states[0], data)
+    cache.get_mask(CountingState.to_mask, states[1], data)
+
+    assert [state.calls for state in states] == [1, 2, 1]
+
+    # Masks larger than the whole budget are never stored
+    big = CountingState(size=100)
+    cache.get_mask(CountingState.to_mask, big, data)
+    assert cache.nbytes <= 25
+
+    # Reducing the budget evicts entries immediately
+    cache.max_bytes = 0
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_weak_references():
+
+    cache = MaskCache(max_bytes=1000)
+    state = CountingState()
+    data = SimpleData()
+
+    cache.get_mask(CountingState.to_mask, state, data)
+    assert len(cache) == 1
+
+    del state
+    gc.collect()
+
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_invalidate():
+
+    cache = MaskCache(max_bytes=1000)
+    state = CountingState()
+    data1 = SimpleData()
+    data2 = SimpleData()
+
+    cache.get_mask(CountingState.to_mask, state, data1)
+    cache.get_mask(CountingState.to_mask, state, data2)
+
+    cache.invalidate(data1)
+    assert len(cache) == 1
+
+    cache.get_mask(CountingState.to_mask, state, data2)
+    assert state.calls == 2
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.nbytes == 0
+
+
+def test_data_version():
+
+    class VersionedState(CountingState):
+
+        @cached_mask
+        def to_mask(self, data, view=None):
+            return super(VersionedState, self).to_mask(data, view=view)
+
+    data = Data(x=np.arange(10))
+    state = VersionedState()
+
+    state.to_mask(data)
+    state.to_mask(data)
+    assert state.calls == 1
+
+    version = data.data_version
+    data.update_components({data.id['x']: np.arange(10) * 2})
+    assert data.data_version > version
+
+    state.to_mask(data)
+    assert state.calls == 2
+
+    data.add_component(np.ones(10), 'y')
+    state.to_mask(data)
+    assert state.calls == 3
+
+
+def test_subset_masks_updated():
+
+    data = Data(x=np.arange(5), y=np.arange(5))
+    state = AndState(InequalitySubsetState(data.id['x'], 1, operator.gt),
+                     InequalitySubsetState(data.id['y'], 4, operator.lt))
+
+    assert_equal(state.to_mask(data), [0, 0, 1, 1, 0])
+    assert_equal(state.to_mask(data), [0, 0, 1, 1, 0])
+    assert len(mask_cache) > 0
+
+    data.update_components({data.id['x']: np.arange(5) - 1})
+    assert_equal(state.to_mask(data), [0, 0, 0, 1, 0])
@@ -157,6 +157,59 @@ class TestParsedCommand(object):
             pc.evaluate(data)
 
 
+    @pytest.mark.parametrize(('cmd', 'elementwise'),
+                             [('{x} * 2 + 1', True),
+                              ('np.sqrt({x}) > -{y}', True),
+                              ('{x} / {x}.max()', False),
+                              ('max({x}, 100)', False),
+                              ('np.sum({x})', False),
+                              ('np.sin(3.4)', True)])
+    def test_elementwise(self, cmd, elementwise):
+        data = Data(x=[1, 2, 3], y=[4, 5, 6])
+        pc = parse.ParsedCommand(cmd, {'x': data.id['x'], 'y': data.id['y']})
+        assert pc.elementwise is elementwise
+
+    @pytest.mark.parametrize('literal', ['2', '-1.5', '3j', "'a'", "b'a'", 'True', 'None'])
+    def test_elementwise_literals(self, literal):
+        # The node types used for literals depend on the Python version
+        data = Data(x=[1, 2, 3])
+        pc = parse.ParsedCommand('{x} * ' + literal, {'x': data.id['x']})
+        assert pc.elementwise
+        assert parse._is_elementwise(parse.ast.parse(literal, mode='eval'), {})
+
+    def test_compile_once(self):
+        data = Data(x=[1, 2, 3])
+        pc = parse.ParsedCommand('{x} + 1', {'x': data.id['x']})
+        with patch('ast.parse', wraps=parse.ast.parse) as parse_func:
+            np.testing.assert_equal(pc.evaluate(data), [2, 3, 4])
+            np.testing.assert_equal(pc.evaluate(data, view=slice(1, None)), [3, 4])
+            assert parse_func.call_count == 1
+            # Commands can be edited in-place by the component arithmetic editor
+            pc._cmd = pc._cmd.replace('+ 1', '+ 2')
+            np.testing.assert_equal(pc.evaluate(data), [3, 4, 5])
+            assert parse_func.call_count == 2
+
+    def test_evaluate_chunks(self):
+        data = Data(x=np.arange(100).reshape((10, 10)))
+        sub = data.new_subset(data.id['x'] > 40)
+        pc = parse.ParsedCommand('np.sqrt({x}) * {s}', {'x': data.id['x'], 's': sub})
+        expected = np.sqrt(data['x']) * (data['x'] > 40)
+        with patch.object(Data, 'get_data', autospec=True,
+                          side_effect=Data.get_data) as get_data:
+            np.testing.assert_allclose(pc.evaluate(data, n_chunk_max=15), expected)
+        assert get_data.call_count > 1
+        for call in get_data.call_args_list:
+            assert call[1]['view'] is not None
+
+    def test_evaluate_scalar(self):
+        data = Data(x=np.arange(10))
+        pc = parse.ParsedCommand('3', {})
+        result = pc.evaluate(data, view=slice(2, 5))
+        assert result.shape == (3,)
+        assert result.dtype == float
+        np.testing.assert_equal(result, 3)
+
+
 class TestParsedComponentLink(object):
 
     def make_link(self):
@@ -247,3 +300,12 @@ class TestParsedSubsetState(object):
         expected = np.array([0, 1, 0, 0], dtype=bool)
 
         np.testing.assert_array_equal(result, expected)
+
+    def test_view(self):
+        # Elementwise commands are only evaluated for the view, while others
+        # need to be evaluated for the whole dataset.
+        data = Data(x=np.arange(10))
+        for cmd, expected in [('{x} > 4', [0, 1, 1]),
+                              ('{x} >= {x}.max()', [0, 0, 0])]:
+            state = parse.ParsedSubsetState(parse.ParsedCommand(cmd, {'x': data.id['x']}))
+            np.testing.assert_equal(state.to_mask(data, view=slice(3, 9, 2)), expected)
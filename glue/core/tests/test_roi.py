@@ -403,6 +403,21 @@ class TestPolygon(object):
     def test_to_poly_undefined(self):
         assert self.roi.to_polygon() == ([], [])
 
+    def test_contains_many_points(self):
+        # For large numbers of points, an index is built for the polygon and
+        # re-used until the vertices change.
+        self.define_as_square()
+        x, y = np.meshgrid(np.linspace(-0.503, 1.497, 201),
+                           np.linspace(-0.507, 1.493, 201))
+        expected = (x > 0) & (x < 1) & (y > 0) & (y < 1)
+        np.testing.assert_array_equal(self.roi.contains(x, y), expected)
+        index = self.roi._index
+        np.testing.assert_array_equal(self.roi.contains(x, y), expected)
+        assert self.roi._index is index
+        self.roi.replace_last_point(1, 0.5)
+        np.testing.assert_array_equal(self.roi.contains(x, y), expected & (y > 0.5 * x))
+        assert self.roi._index is not index
+
     def test_rect(self):
         self.roi.reset()
         self.roi.add_point(4.95164474584, 0.136922625654)
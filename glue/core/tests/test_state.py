@@ -133,6 +133,47 @@ def test_data_factory_include_data():
     np.testing.assert_array_equal(d['PRIMARY'], d2['PRIMARY'])
 
 
+def test_archive(tmpdir):
+
+    filename = tmpdir.join('test.glu').strpath
+
+    d = core.Data(x=np.arange(12.).reshape((3, 4)),
+                  y=np.asfortranarray(np.ones((3, 4), dtype='>i4')), label='data')
+    categorical = core.Data(c=['a', 'b', 'c'], label='categorical')
+    empty = core.Data(z=np.zeros((0, 4)), label='empty')
+
+    dc = core.DataCollection([d, categorical, empty])
+
+    gs = GlueSerializer(dc)
+    gs.dump_archive(filename)
+
+    gu = GlueUnSerializer.load_archive(filename)
+    dc2 = gu.object('__main__')
+
+    d2 = dc2[0]
+    for label in ['x', 'y']:
+        assert_equal(d2[label], d[label])
+    assert_equal(dc2[1]['c'], ['a', 'b', 'c'])
+    assert dc2[2]['z'].shape == (0, 4)
+
+    # Arrays should be memory-mapped, and aligned in the archive
+    for label in ['x', 'y']:
+        array = d2.get_component(label).data
+        assert isinstance(array.base, np.memmap)
+        assert array.flags.aligned
+
+    # The arrays are not included in the JSON
+    def check_arrays(rec):
+        if isinstance(rec, dict):
+            if rec.get('_type') == 'numpy.ndarray':
+                assert 'data' not in rec
+                assert rec['npy'].startswith('arrays/')
+            for value in rec.values():
+                check_arrays(value)
+
+    check_arrays(gu._rec)
+
+
 def test_save_numpy_scalar():
     assert clone(np.float32(5)) == 5
 
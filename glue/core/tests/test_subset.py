@@ -1,5 +1,6 @@
 # pylint: disable=I0011,W0613,W0201,W0212,E1101,E1103
 
+import json
 import tempfile
 import operator as op
 
@@ -13,7 +14,8 @@ from glue.tests.helpers import requires_astropy, requires_scipy, SCIPY_INSTALLED
 from ..exceptions import IncompatibleAttribute
 from .. import DataCollection, ComponentLink
 from ..data import Data, Component
-from ..roi import CategoricalROI, RectangularROI, Projected3dROI, CircularROI
+from ..roi import CategoricalROI, RectangularROI, Projected3dROI, CircularROI, PolygonalROI
+from ..component_id import ComponentID
 from ..message import SubsetDeleteMessage
 from ..registry import Registry
 from ..link_helpers import LinkSame
@@ -29,6 +31,9 @@ from ..subset import InvertState
 from ..subset import OrState
 from ..subset import XorState
 from .test_state import clone
+from ..state import GlueSerializer, GlueUnSerializer
+from ...utils import PackedMask
+from ..mask_cache import mask_cache
 
 
 class TestSubset(object):
@@ -624,6 +629,68 @@ def test_mask_clone():
     np.testing.assert_array_equal(sub.to_mask(), [False, True, True])
 
 
+
+class TestMaskSubsetState(object):
+
+    def setup_method(self, method):
+        self.data = Data(x=np.arange(12).reshape((3, 4)))
+        self.cids = self.data.pixel_component_ids
+        self.mask1 = self.data['x'] % 3 == 0
+        self.mask2 = self.data['x'] > 4
+
+    def test_packed(self):
+        state = MaskSubsetState(self.mask1, self.cids)
+        assert isinstance(state.packed_mask, PackedMask)
+        assert_equal(state.mask, self.mask1)
+        # The mask is unpacked into a new array on each access
+        state.mask[...] = True
+        assert_equal(state.mask, self.mask1)
+        assert_equal(state.to_mask(self.data, view=(slice(1, 3), 2)), self.mask1[1:3, 2])
+        # The packed mask is shared with copies
+        assert state.copy().packed_mask is state.packed_mask
+
+    @pytest.mark.parametrize('operation', [op.and_, op.or_, op.xor])
+    def test_combine(self, operation):
+        state1 = MaskSubsetState(self.mask1, self.cids)
+        state2 = MaskSubsetState(self.mask2, self.cids)
+        state = operation(state1, state2)
+        assert type(state) is MaskSubsetState
+        assert_equal(state.to_mask(self.data), operation(self.mask1, self.mask2))
+
+    def test_invert(self):
+        state = ~MaskSubsetState(self.mask1, self.cids)
+        assert type(state) is MaskSubsetState
+        assert_equal(state.to_mask(self.data), ~self.mask1)
+
+    def test_combine_other(self):
+        # Masks along different components, or other subset states, are
+        # combined as usual.
+        state1 = MaskSubsetState(self.mask1, self.cids)
+        state2 = MaskSubsetState(self.mask2, self.cids[::-1])
+        assert isinstance(state1 & state2, AndState)
+        state = state1 | (self.data.id['x'] > 10)
+        assert isinstance(state, OrState)
+        assert_equal(state.to_mask(self.data), self.mask1 | (self.data['x'] > 10))
+
+    def test_session(self):
+        state = MaskSubsetState(self.mask1, self.cids)
+        gs = GlueSerializer(state)
+        oid = gs.id(state)
+        rec = json.loads(gs.dumps())
+        assert 'PackedMask' in rec[oid]['mask']['_type']
+        assert_equal(GlueUnSerializer.loads(json.dumps(rec)).object(oid).mask, self.mask1)
+
+    def test_session_dense(self):
+        # Older sessions stored the mask as a plain array
+        state = MaskSubsetState(self.mask1, self.cids)
+        gs = GlueSerializer(state)
+        oid = gs.id(state)
+        rec = json.loads(gs.dumps())
+        rec[oid]['mask'] = gs.do(self.mask1)
+        state = GlueUnSerializer.loads(json.dumps(rec)).object(oid)
+        assert isinstance(state.packed_mask, PackedMask)
+        assert_equal(state.mask, self.mask1)
+
 class TestAttributes(object):
 
     def test_empty(self):
@@ -901,6 +968,45 @@ def test_floodfill_subset_state():
     assert_equal(result, 1)
 
 
+@requires_scipy
+def test_floodfill_subset_state_threshold():
+
+    data = Data(x=np.array([[9, 6, 2, 3],
+                            [4, 5, 2, 5],
+                            [2, 4, 1, 0],
+                            [5, 6, 0, -1]]))
+
+    subset_state = FloodFillSubsetState(data, data.id['x'], (1, 0), 1.3)
+
+    assert_equal(subset_state.to_mask(data), [[0, 0, 0, 0],
+                                              [1, 1, 0, 0],
+                                              [0, 1, 0, 0],
+                                              [0, 0, 0, 0]])
+
+    slices, mask = subset_state.region.bounding_box()
+    assert slices == (slice(1, 3), slice(0, 2))
+
+    # Increasing the threshold grows the previous region
+
+    subset_state.threshold = 1.6
+
+    expected = [[0, 1, 1, 1],
+                [1, 1, 1, 1],
+                [1, 1, 0, 0],
+                [1, 1, 0, 0]]
+
+    assert_equal(subset_state.to_mask(data), expected)
+    assert_equal(subset_state.to_mask(data, view=(slice(1, 3), 1)), [1, 1])
+    assert_equal(subset_state.mask, expected)
+    assert_equal(np.asarray(subset_state.packed_mask), expected)
+    assert subset_state._evaluation_cost() is None
+
+    # Changing the values of the data updates the mask
+
+    data.update_components({data.id['x']: np.ones((4, 4))})
+    assert_equal(subset_state.to_mask(data), 1)
+
+
 def test_projected_3d_clone():
 
     d = Data(x=[1, 2, 3], y=[2, 3, 4], z=[4, 3, 2])
@@ -1002,3 +1108,143 @@ def test_multi_or_state():
 
     # Test str
     assert str(state3) == "('or' combination of 3 individual states)"
+
+
+@pytest.mark.parametrize('categories', [None, ['a', 'c']])
+def test_categorical_masks_codes(categories):
+
+    # Categorical masks are computed from the integer codes where possible,
+    # which should give the same result as using the labels, including when
+    # some of the values are not in the categories.
+
+    from ..component import CategoricalComponent
+
+    data = Data(label='data')
+    data.add_component(CategoricalComponent(['a', 'b', 'a', 'c', 'd', 'c'],
+                                            categories=categories), 'x')
+    data.add_component(CategoricalComponent(['u', 'v', 'u', 'v', 'v', 'u']), 'y')
+
+    view = slice(1, 5)
+
+    state = CategoricalROISubsetState(att=data.id['x'], roi=CategoricalROI(['a', 'd']))
+    assert_equal(state.to_mask(data), [1, 0, 1, 0, 1, 0])
+    assert_equal(state.to_mask(data, view=view), [0, 1, 0, 1])
+
+    state = CategoricalROISubsetState2D({'a': ['u'], 'd': ['v', 'w'], 'e': ['u']},
+                                        data.id['x'], data.id['y'])
+    assert_equal(state.to_mask(data), [1, 0, 1, 0, 1, 0])
+    assert_equal(state.to_mask(data, view=view), [0, 1, 0, 1])
+
+    state = CategorySubsetState(data.id['x'], [1, 1.5, 7])
+    expected = [0, 0, 0, 1, 0, 1] if categories else [0, 1, 0, 0, 0, 0]
+    assert_equal(state.to_mask(data), expected)
+    assert_equal(state.to_mask(data, view=view), expected[view])
+
+
+class CountingSubsetState(SubsetState):
+    """
+    A subset state that records the number of values it was computed for.
+    """
+
+    def __init__(self, state, cost=1):
+        super(CountingSubsetState, self).__init__()
+        self.state = state
+        self.cost = cost
+        self.sizes = []
+
+    def to_mask(self, data, view=None):
+        mask = self.state.to_mask(data, view)
+        self.sizes.append(mask.size)
+        return mask
+
+    def _evaluation_cost(self):
+        return self.cost
+
+    def copy(self):
+        # Return the same object so that we can check the recorded sizes
+        return self
+
+
+class TestPlannedMask(object):
+
+    def setup_method(self, method):
+        from .. import subset
+        self.subset = subset
+        self.min_size = subset.PLANNER_MIN_SIZE
+        subset.PLANNER_MIN_SIZE = 10
+        np.random.seed(12345)
+        self.data = Data(x=np.random.random((40, 50)), y=np.random.random((40, 50)),
+                         c=np.random.randint(0, 5, (40, 50)))
+
+    def teardown_method(self, method):
+        self.subset.PLANNER_MIN_SIZE = self.min_size
+
+    def states(self):
+        roi = PolygonalROI(vx=[0.1, 0.9, 0.5], vy=[0.1, 0.2, 0.9])
+        return [RoiSubsetState(self.data.id['x'], self.data.id['y'], roi),
+                RangeSubsetState(0.2, 0.3, self.data.id['x']),
+                self.data.id['y'] > 0.5,
+                CategorySubsetState(self.data.id['c'], [1, 3]),
+                MaskSubsetState(self.data.get_data(self.data.id['c']) > 2,
+                                self.data.pixel_component_ids)]
+
+    @pytest.mark.parametrize('view', [None, (slice(3, 30, 2), slice(None)), slice(5, 10),
+                                      (slice(None), 7), (-3,), (4, slice(2, None, 3))])
+    def test_combinations(self, view):
+
+        s = self.states()
+
+        x, y = self.data.id['x'], self.data.id['y']
+
+        trees = [s[0] & s[1], s[0] | s[2], (s[0] & s[2]) | s[1] | s[3],
+                 s[0] & ~s[1] & s[3] & s[4], MultiOrState([s[1], s[2] & s[0], s[3]]),
+                 (s[0] ^ s[1]) & s[2],
+                 RoiSubsetState(self.data.pixel_component_ids[1],
+                                self.data.pixel_component_ids[0],
+                                RectangularROI(3, 20, 4, 30)) & (x > 0.5) & (y < 0.6)]
+
+        for tree in trees:
+            planned = tree.to_mask(self.data, view)
+            self.subset.PLANNER_MIN_SIZE = 10 ** 9
+            expected = tree.copy().to_mask(self.data, view)
+            self.subset.PLANNER_MIN_SIZE = 10
+            assert_equal(planned, expected)
+
+    def test_order(self):
+
+        # The cheap and selective states should be computed first, and the
+        # expensive one only for the values that are still selected.
+
+        expensive = CountingSubsetState(RangeSubsetState(0, 0.9, self.data.id['x']), cost=100)
+        selective = CountingSubsetState(RangeSubsetState(0, 0.1, self.data.id['y']))
+
+        mask = (expensive & selective).to_mask(self.data)
+
+        assert_equal(mask, (self.data['x'] <= 0.9) & (self.data['y'] <= 0.1))
+
+        # The first values are for the sample used to estimate selectivity
+        assert selective.sizes[-1] == self.data.size
+        assert expensive.sizes[-1] == np.count_nonzero(self.data['y'] <= 0.1)
+
+    def test_sub_views_not_cached(self):
+
+        # The masks for the sample and for the undecided values are only
+        # needed once, so should not end up in the mask cache.
+
+        state = (self.data.id['x'] > 0.5) & (self.data.id['y'] < 0.2)
+
+        mask_cache.clear()
+        state.to_mask(self.data)
+
+        assert len(mask_cache) > 0
+        assert all(key[-1] is None for key in mask_cache._entries)
+
+    def test_incompatible(self):
+
+        # Even if no values are left to check, incompatible attributes in the
+        # other subset states should cause an error.
+
+        state = (self.data.id['x'] > 2) & (ComponentID('z') > 1)
+
+        with pytest.raises(IncompatibleAttribute):
+            state.to_mask(self.data)
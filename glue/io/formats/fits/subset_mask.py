@@ -5,6 +5,7 @@ import numpy as np
 from astropy.io import fits
 from glue.config import subset_mask_importer, subset_mask_exporter
 from glue.core.data_factories.fits import is_fits
+from glue.utils import PackedMask
 
 
 @subset_mask_importer(label='FITS', extension=['fits', 'fit',
@@ -21,14 +22,19 @@ def fits_subset_mask_importer(filename):
     with fits.open(filename) as hdulist:
 
         for ihdu, hdu in enumerate(hdulist):
-            if hdu.data is not None and hdu.data.dtype.kind == 'i':
+            if hdu.data is not None and hdu.data.dtype.kind in 'iu':
                 if not hdu.name:
                     name = '{0}[{1}]'.format(label, ihdu)
                 elif ihdu == 0:
                     name = label
                 else:
                     name = hdu.name
-                masks[name] = hdu.data > 0
+                # Unsigned values (as written by the exporter) are packed
+                # one chunk at a time without loading the whole array.
+                if hdu.data.dtype.kind == 'u':
+                    masks[name] = PackedMask.from_array(hdu.data)
+                else:
+                    masks[name] = PackedMask.from_array(hdu.data > 0)
 
     if len(masks) == 0:
         raise ValueError('No HDUs with integer values (which would normally indicate a mask) were found in file')
@@ -44,8 +50,9 @@ def fits_subset_mask_exporter(filename, masks):
     hdulist.append(fits.PrimaryHDU())
 
     # We store the subset masks in the extensions to make sure we can give
-    # then a name.
+    # then a name. The masks are stored as 8-bit unsigned integers, which is
+    # the smallest integer type supported by FITS.
     for label, mask in masks.items():
-        hdulist.append(fits.ImageHDU(np.asarray(mask, int), name=label))
+        hdulist.append(fits.ImageHDU(np.asarray(mask, np.uint8), name=label))
 
     hdulist.writeto(filename, overwrite=True)
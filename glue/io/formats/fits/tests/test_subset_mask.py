@@ -1,9 +1,11 @@
 from collections import OrderedDict
 import pytest
 
+import numpy as np
 from numpy.testing import assert_equal
 
 from astropy.io import fits
+from glue.utils import PackedMask
 from glue.io.formats.fits.subset_mask import fits_subset_mask_importer, fits_subset_mask_exporter
 
 
@@ -21,7 +23,8 @@ def test_reader(tmpdir):
     label, mask = list(masks.items())[0]
 
     assert label == 'subset_mask'
-    assert_equal(mask, original_mask)
+    assert isinstance(mask, PackedMask)
+    assert_equal(np.asarray(mask), original_mask)
 
 
 def test_reader_extensions(tmpdir):
@@ -44,10 +47,10 @@ def test_reader_extensions(tmpdir):
     label2, mask2 = mask_items[1]
 
     assert label1 == 'SUBSET A'
-    assert_equal(mask1, original_mask1)
+    assert_equal(np.asarray(mask1), original_mask1)
 
     assert label2 == 'subset_mask[2]'
-    assert_equal(mask2, original_mask2)
+    assert_equal(np.asarray(mask2), original_mask2)
 
 
 def test_reader_invalid_hdus(tmpdir):
@@ -95,3 +98,23 @@ def test_writer(tmpdir):
 
         assert hdulist[2].name == 'SUBSET 2'
         assert_equal(hdulist[2].data, masks['subset 2'])
+
+        assert hdulist[1].data.dtype == np.uint8
+
+
+def test_roundtrip(tmpdir):
+
+    mask_filename = tmpdir.join('subset_mask.fits').strpath
+
+    original_mask = np.zeros((20, 30, 40), dtype=bool)
+    original_mask[3:5, 10:20, 5] = True
+
+    masks = OrderedDict()
+    masks['subset'] = PackedMask.from_array(original_mask)
+
+    fits_subset_mask_exporter(mask_filename, masks)
+
+    masks = fits_subset_mask_importer(mask_filename)
+
+    assert list(masks) == ['SUBSET']
+    assert_equal(np.asarray(masks['SUBSET']), original_mask)
@@ -5,6 +5,7 @@ import pytest
 import numpy as np
 from numpy.testing import assert_equal
 from glue.core import DataCollection, Data
+from glue.utils import PackedMask
 
 from ..subset_mask import SubsetMaskImporter, SubsetMaskExporter
 
@@ -50,6 +51,13 @@ class TestImporter():
         assert_equal(self.data.subsets[0].to_mask(), [0, 1, 0])
         assert_equal(self.data.subsets[1].to_mask(), [1, 1, 0])
 
+    def test_packed(self):
+        mask = PackedMask.from_array(np.array([0, 1, 1]))
+        self.importer.reader.return_value = OrderedDict([('subset 1', mask)])
+        self.importer.run(self.data, self.data_collection)
+        assert self.data.subsets[0].subset_state.packed_mask is mask
+        assert_equal(self.data.subsets[0].to_mask(), [0, 1, 1])
+
     def test_missing_masks(self):
         self.importer.reader.return_value = OrderedDict()
         with pytest.raises(ValueError) as exc:
@@ -1,7 +1,9 @@
 #!/usr/bin/env python
 
 import sys
+import time
 import optparse
+from functools import partial
 from importlib import import_module
 
 from glue import __version__
@@ -274,7 +276,62 @@ REQUIRED_PLUGINS_QT = ['glue.plugins.tools.pv_slicer.qt',
                        'glue.viewers.table.qt']
 
 
-def load_plugins(splash=None, require_qt_plugins=False):
+def _load_plugin(item, require_qt_plugins=False):
+
+    # We don't use item.load() because that then checks requirements of all
+    # the imported packages, which can lead to errors like this one that
+    # don't really matter:
+    #
+    # Exception: (pytest 2.6.0 (/Users/tom/miniconda3/envs/py27/lib/python2.7/site-packages),
+    #             Requirement.parse('pytest>=2.8'), set(['astropy']))
+    #
+    # Just to be clear, this kind of error does indicate that there is an
+    # old version of a package in the environment, but this can confuse
+    # users as importing astropy directly would work (as setuptools then
+    # doesn't do a stringent test of dependency versions). Often this kind
+    # of error can occur if there is a conda version of a package and and
+    # older pip version.
+
+    if item.module_name in _loaded_plugins:
+        return
+
+    start = time.time()
+
+    try:
+        module = import_module(item.module_name)
+        function = getattr(module, item.attrs[0])
+        function()
+    except Exception as exc:
+        # Here we check that some of the 'core' plugins load well and
+        # raise an actual exception if not.
+        if item.module_name in REQUIRED_PLUGINS:
+            raise
+        elif item.module_name in REQUIRED_PLUGINS_QT and require_qt_plugins:
+            raise
+        else:
+            logger.info("Loading plugin {0} failed "
+                        "(Exception: {1})".format(item.name, exc))
+    else:
+        logger.info("Loading plugin {0} succeeded in "
+                    "{1:.3f}s".format(item.name, time.time() - start))
+        _loaded_plugins.add(item.module_name)
+
+
+def load_plugins(splash=None, require_qt_plugins=False, defer=False):
+    """
+    Find and set up the installed plugins.
+
+    Parameters
+    ----------
+    splash : `~glue.app.qt.splash_screen.QtSplashScreen`, optional
+        If specified, the splash screen on which to show progress.
+    require_qt_plugins : bool, optional
+        Whether to raise an error if the built-in Qt plugins fail to load.
+    defer : bool, optional
+        If `True`, the plugins are only imported and set up when a registry
+        is first needed (e.g. to find data factories or viewers), which
+        avoids slowing down the start up of scripts that don't need them.
+    """
 
     # Search for plugins installed via entry_points. Basically, any package can
     # define plugins for glue, and needs to define an entry point using the
@@ -290,16 +347,14 @@ def load_plugins(splash=None, require_qt_plugins=False):
     # where ``setup`` is a function that does whatever is needed to set up the
     # plugin, such as add items to various registries.
 
-    import setuptools
-    logger.info("Loading external plugins using "
-                "setuptools=={0}".format(setuptools.__version__))
-
-    from glue._plugin_helpers import iter_plugin_entry_points, PluginConfig
+    from glue._plugin_helpers import iter_plugin_entry_points, defer_plugin, PluginConfig
     config = PluginConfig.load()
 
-    n_plugins = len(list(iter_plugin_entry_points()))
+    start = time.time()
+    entry_points = list(iter_plugin_entry_points())
+    logger.info("Found {0} plugins in {1:.3f}s".format(len(entry_points), time.time() - start))
 
-    for iplugin, item in enumerate(iter_plugin_entry_points()):
+    for iplugin, item in enumerate(entry_points):
 
         if item.module_name not in _installed_plugins:
             _installed_plugins.add(item.name)
@@ -311,40 +366,13 @@ def load_plugins(splash=None, require_qt_plugins=False):
         if not config.plugins[item.name]:
             continue
 
-        # We don't use item.load() because that then checks requirements of all
-        # the imported packages, which can lead to errors like this one that
-        # don't really matter:
-        #
-        # Exception: (pytest 2.6.0 (/Users/tom/miniconda3/envs/py27/lib/python2.7/site-packages),
-        #             Requirement.parse('pytest>=2.8'), set(['astropy']))
-        #
-        # Just to be clear, this kind of error does indicate that there is an
-        # old version of a package in the environment, but this can confuse
-        # users as importing astropy directly would work (as setuptools then
-        # doesn't do a stringent test of dependency versions). Often this kind
-        # of error can occur if there is a conda version of a package and and
-        # older pip version.
-
-        try:
-            module = import_module(item.module_name)
-            function = getattr(module, item.attrs[0])
-            function()
-        except Exception as exc:
-            # Here we check that some of the 'core' plugins load well and
-            # raise an actual exception if not.
-            if item.module_name in REQUIRED_PLUGINS:
-                raise
-            elif item.module_name in REQUIRED_PLUGINS_QT and require_qt_plugins:
-                raise
-            else:
-                logger.info("Loading plugin {0} failed "
-                            "(Exception: {1})".format(item.name, exc))
+        if defer:
+            defer_plugin(partial(_load_plugin, item, require_qt_plugins=require_qt_plugins))
         else:
-            logger.info("Loading plugin {0} succeeded".format(item.name))
-            _loaded_plugins.add(item.module_name)
+            _load_plugin(item, require_qt_plugins=require_qt_plugins)
 
         if splash is not None:
-            splash.set_progress(100. * iplugin / float(n_plugins))
+            splash.set_progress(100. * iplugin / float(len(entry_points)))
 
     try:
         config.save()
@@ -354,8 +382,9 @@ def load_plugins(splash=None, require_qt_plugins=False):
     # Reload the settings now that we have loaded plugins, since some plugins
     # may have added some settings. Note that this will not re-read settings
     # that were previously read.
-    from glue._settings_helpers import load_settings
-    load_settings()
+    if not defer:
+        from glue._settings_helpers import load_settings
+        load_settings()
 
 
 if __name__ == "__main__":
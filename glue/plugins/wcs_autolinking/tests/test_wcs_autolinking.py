@@ -1,6 +1,7 @@
 import numpy as np
 
 from astropy.wcs import WCS
+from astropy.wcs.utils import pixel_to_pixel
 from glue.core import Data, DataCollection
 from glue.plugins.wcs_autolinking.wcs_autolinking import wcs_autolink, WCSLink
 from glue.core.link_helpers import MultiLink
@@ -240,3 +241,91 @@ def test_celestial_with_unknown_axes():
     assert link[2].get_from_ids() == [px2, pz2]
     assert link[3].get_to_id() == py1
     assert link[3].get_from_ids() == [px2, pz2]
+
+
+def test_wcs_autolink_mosaic():
+
+    # Datasets with compatible WCSes should be linked via a spanning tree
+    # rather than by linking all pairs.
+
+    tiles = []
+    for i in range(5):
+        wcs = WCS(naxis=2)
+        wcs.wcs.ctype = 'RA---TAN', 'DEC--TAN'
+        wcs.wcs.crval = 10 + i * 0.01, 20
+        wcs.wcs.cdelt = -0.001, 0.001
+        wcs.wcs.set()
+        data = Data(label='tile {0}'.format(i))
+        data.coords = wcs
+        data['x'] = np.ones((3, 4))
+        tiles.append(data)
+
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = 'GLON-CAR', 'GLAT-CAR'
+    wcs.wcs.set()
+    image = Data(label='image')
+    image.coords = wcs
+    image['x'] = np.ones((3, 4))
+
+    dc = DataCollection(tiles + [image])
+    links = wcs_autolink(dc)
+
+    assert len(links) == 5
+    assert [(link.data1, link.data2) for link in links] == ([(tiles[0], tile) for tile in tiles[1:]] +
+                                                            [(tiles[0], image)])
+
+    dc.add_link(links)
+
+    # Pixel coordinates can be derived between any pair via the links
+    x1 = tiles[1].get_data(tiles[3].pixel_component_ids[1])
+    expected = pixel_to_pixel(tiles[1].coords, tiles[3].coords, np.arange(4), np.zeros(4))[0]
+    np.testing.assert_allclose(x1[0], expected)
+
+    # Running the autolinker again shouldn't produce any new links
+    assert wcs_autolink(dc) == []
+
+
+def test_wcs_autolink_cubes_and_image():
+
+    # A link between an image and a spectral cube only covers the celestial
+    # axes of the cube, so it can't be chained with the link between two
+    # cubes, and the image needs to be linked to both cubes directly.
+
+    cubes = []
+    for i in range(2):
+        wcs = WCS(naxis=3)
+        wcs.wcs.ctype = 'RA---TAN', 'DEC--TAN', 'FREQ'
+        wcs.wcs.crval = 10 + i * 0.01, 20, 1e9
+        wcs.wcs.cdelt = -0.001, 0.001, 1e6
+        wcs.wcs.set()
+        data = Data(label='cube {0}'.format(i))
+        data.coords = wcs
+        data['x'] = np.ones((2, 3, 4))
+        cubes.append(data)
+
+    wcs = WCS(naxis=2)
+    wcs.wcs.ctype = 'RA---TAN', 'DEC--TAN'
+    wcs.wcs.crval = 10.005, 20
+    wcs.wcs.cdelt = -0.002, 0.002
+    wcs.wcs.set()
+    image = Data(label='image')
+    image.coords = wcs
+    image['x'] = np.ones((3, 4))
+
+    dc = DataCollection(cubes + [image])
+    links = wcs_autolink(dc)
+
+    assert [(link.data1, link.data2) for link in links] == [(cubes[0], cubes[1]),
+                                                            (cubes[0], image),
+                                                            (cubes[1], image)]
+
+    dc.add_link(links)
+
+    # The pixel coordinates of the second cube can be derived for the image
+    x2 = image.get_data(cubes[1].pixel_component_ids[2])
+    expected = pixel_to_pixel(image.coords, cubes[1].coords.celestial,
+                              np.arange(4), np.zeros(4))[0]
+    np.testing.assert_allclose(x2[0], expected)
+
+    # Running the autolinker again shouldn't produce any new links
+    assert wcs_autolink(dc) == []
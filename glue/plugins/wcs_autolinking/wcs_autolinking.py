@@ -128,6 +128,17 @@ class WCSLink(MultiLink):
                 .format(types1, types2))
 
 
+def wcs_compatibility_class(wcs):
+    """
+    Return a key such that any two WCSes with the same key can be fully
+    linked to each other, in the sense that all their pixel coordinates can
+    be linked via the same world coordinates.
+    """
+    return (wcs.pixel_n_dim, wcs.world_n_dim,
+            tuple(wcs.world_axis_physical_types),
+            tuple(wcs.world_axis_units))
+
+
 @autolinker('Astronomy WCS')
 def wcs_autolink(data_collection):
 
@@ -139,23 +150,82 @@ def wcs_autolink(data_collection):
     if len(wcs_datasets) < 2:
         return []
 
+    # Group the datasets by WCS compatibility class, keeping the order of the
+    # datasets in the data collection.
+    classes = {}
+    for data in wcs_datasets:
+        classes.setdefault(wcs_compatibility_class(data.coords), []).append(data)
+
     # Find existing WCS links
     existing = set()
     for link in data_collection.external_links:
         if isinstance(link, WCSLink):
             existing.add((link.data1, link.data2))
+            existing.add((link.data2, link.data1))
+
+    # Links between pairs of datasets are combined by the link manager, so we
+    # don't need to link all pairs of datasets. Within each class, we only
+    # link each dataset to the first one (the representative of the class)
+    # unless it is already connected to it via existing links, since the
+    # links between datasets in the same class are all equivalent. We then
+    # link the representatives of the classes with each other. Datasets that
+    # can't be linked to their representative are treated as separate
+    # classes.
+
+    parent = {}
+
+    def find(data):
+        while parent.get(data, data) is not data:
+            data = parent[data]
+        return data
+
+    for data1, data2 in existing:
+        if wcs_compatibility_class(data1.coords) == wcs_compatibility_class(data2.coords):
+            parent[find(data1)] = find(data2)
 
-    # Loop through all pairs of datasets, skipping pairs for which a link
-    # already exists. PERF: in practice we don't actually have to link all
-    # pairs, so we should try and optimize that.
     all_links = []
-    for i1, data1 in enumerate(wcs_datasets):
-        for data2 in wcs_datasets[i1 + 1:]:
-            if (data1, data2) not in existing:
+    groups = {}
+    for members in classes.values():
+        representative = members[0]
+        groups[representative] = [representative]
+        for data in members[1:]:
+            if find(data) is not find(representative):
                 try:
-                    link = WCSLink(data1, data2)
+                    link = WCSLink(representative, data)
                 except IncompatibleWCS:
+                    groups[data] = [data]
                     continue
+                parent[find(data)] = find(representative)
                 all_links.append(link)
+            groups[representative].append(data)
+
+    # Loop through all pairs of representatives. If the link between two
+    # representatives only covers some of the pixel axes of one of them (for
+    # example only the celestial axes of a spectral cube), it can't be
+    # combined with the links within that class, since these need all the
+    # pixel coordinates. In this case, each member of that class is linked
+    # to the other class, and if neither link covers all pixel axes, all
+    # pairs of members are linked.
+    order = dict((id(data), index) for index, data in enumerate(wcs_datasets))
+    representatives = sorted(groups, key=lambda data: order[id(data)])
+    for i1, data1 in enumerate(representatives):
+        for data2 in representatives[i1 + 1:]:
+            try:
+                link = WCSLink(data1, data2)
+            except IncompatibleWCS:
+                continue
+            members1 = [data1] if len(link.cids1) == data1.ndim else groups[data1]
+            members2 = [data2] if len(link.cids2) == data2.ndim else groups[data2]
+            for member1 in members1:
+                for member2 in members2:
+                    if (member1, member2) in existing:
+                        continue
+                    if member1 is data1 and member2 is data2:
+                        all_links.append(link)
+                        continue
+                    try:
+                        all_links.append(WCSLink(member1, member2))
+                    except IncompatibleWCS:
+                        pass
 
     return all_links
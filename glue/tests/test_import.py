@@ -0,0 +1,78 @@
+import sys
+import subprocess
+
+import pytest
+
+# The following tests check that importing glue (or its core classes) only
+# imports what is needed, since e.g. importing the Qt, viewer, or plugin code
+# would make batch scripts that only use glue.core slow to start up. These are
+# run in a separate process since the modules are already imported here.
+
+CHECK_MODULES = """
+import sys
+{imports}
+print(' '.join(sys.modules))
+"""
+
+
+def import_modules(imports):
+    output = subprocess.check_output([sys.executable, '-c',
+                                      CHECK_MODULES.format(imports=imports)])
+    return output.decode('utf-8').splitlines()[-1].split()
+
+
+def test_import_glue():
+
+    modules = import_modules('import glue')
+
+    # Rather than timing the import, which would be unreliable, we check
+    # that the modules that are slow to import are not imported.
+    for module in ('glue.core', 'glue.core.data', 'pandas', 'matplotlib', 'astropy'):
+        assert module not in modules
+
+    for module in modules:
+        assert not module.startswith(('glue.core', 'glue.viewers', 'glue.app', 'glue.main',
+                                      'glue.qglue', 'matplotlib', 'pandas', 'astropy',
+                                      'pkg_resources', 'qtpy'))
+
+
+@pytest.mark.parametrize('imports', ['from glue.core import Data',
+                                     'from glue.core.data import Data\n'
+                                     'from glue.core.data_collection import DataCollection'])
+def test_import_core(imports):
+
+    modules = import_modules(imports)
+
+    for module in modules:
+        assert not module.startswith(('glue.viewers', 'glue.app', 'glue.main', 'glue.qglue',
+                                      'glue.dialogs', 'glue.core.data_factories',
+                                      'pkg_resources', 'qtpy', 'dask'))
+
+
+def test_import_core_star():
+
+    modules = import_modules('from glue.core import *\n'
+                             'print(Data, DataCollection, Session, Subset, Application)')
+
+    assert 'glue.core.data' in modules
+    assert 'glue.core.session' in modules
+
+
+def test_lazy_attributes():
+
+    import glue
+    import glue.core
+
+    from glue.qglue import qglue
+    from glue.viewers.custom.helper import custom_viewer
+    from glue.core.data import Data
+
+    assert glue.qglue is qglue
+    assert glue.custom_viewer is custom_viewer
+    assert glue.core.Data is Data
+    assert 'env' in dir(glue)
+    assert 'DataCollection' in dir(glue.core)
+
+    with pytest.raises(AttributeError) as exc:
+        glue.core.spam
+    assert exc.value.args[0] == "module 'glue.core' has no attribute 'spam'"
@@ -0,0 +1,109 @@
+import sys
+import types
+from unittest.mock import patch
+
+import pytest
+
+from glue import _plugin_helpers as ph
+from glue.config import data_factory
+from glue.main import load_plugins, _loaded_plugins
+
+ENTRY_POINT = ph.PluginEntryPoint('spam', 'glue_spam_plugin', ('setup',),
+                                  ph.PluginDistribution('glue-spam', '0.1'))
+
+
+def setup_function(func):
+    from glue import config
+    func.CFG_DIR_ORIG = config.CFG_DIR
+    ph._entry_points_cache = None
+
+
+def teardown_function(func):
+    from glue import config
+    config.CFG_DIR = func.CFG_DIR_ORIG
+    ph._entry_points_cache = None
+
+
+@pytest.fixture
+def plugin_module():
+
+    calls = []
+
+    def spam_reader(filename):
+        pass
+
+    def setup():
+        calls.append(True)
+        data_factory('Spam reader')(spam_reader)
+
+    module = types.ModuleType('glue_spam_plugin')
+    module.setup = setup
+    sys.modules['glue_spam_plugin'] = module
+
+    yield calls
+
+    sys.modules.pop('glue_spam_plugin')
+    _loaded_plugins.discard('glue_spam_plugin')
+    data_factory._members = [item for item in data_factory._members
+                             if item.function is not spam_reader]
+
+
+def test_entry_points_cache(tmpdir):
+
+    from glue import config
+    config.CFG_DIR = tmpdir.join('.glue').strpath
+
+    fingerprint = [['a', 1.]]
+
+    with patch.object(ph, '_find_entry_points', return_value=[(ENTRY_POINT, '')]) as find:
+        with patch.object(ph, '_entry_points_fingerprint', side_effect=lambda paths: fingerprint):
+
+            assert list(ph.iter_plugin_entry_points()) == [ENTRY_POINT]
+            assert list(ph.iter_plugin_entry_points()) == [ENTRY_POINT]
+            assert find.call_count == 1
+
+            # The cache is also stored on disk
+            ph._entry_points_cache = None
+            assert list(ph.iter_plugin_entry_points()) == [ENTRY_POINT]
+            assert find.call_count == 1
+
+            # But the entry points are found again if the environment changes
+            fingerprint = [['a', 2.]]
+            assert list(ph.iter_plugin_entry_points()) == [ENTRY_POINT]
+            assert find.call_count == 2
+
+
+def test_metadata_path(tmpdir):
+
+    from pathlib import Path, PurePosixPath
+
+    class Distribution(object):
+
+        files = [PurePosixPath('glue_spam/__init__.py'),
+                 PurePosixPath('glue_spam-0.1.dist-info/entry_points.txt')]
+
+        def locate_file(self, path):
+            return Path(tmpdir.strpath) / path
+
+    dist = Distribution()
+    assert ph._metadata_path(dist) == tmpdir.join('glue_spam-0.1.dist-info').strpath
+
+    dist.files = None
+    assert ph._metadata_path(dist) == tmpdir.strpath
+
+
+def test_load_plugins_defer(tmpdir, plugin_module):
+
+    from glue import config
+    config.CFG_DIR = tmpdir.join('.glue').strpath
+
+    with patch.object(ph, 'iter_plugin_entry_points', return_value=iter([ENTRY_POINT])):
+        load_plugins(defer=True)
+
+    assert plugin_module == []
+    assert 'glue_spam_plugin' not in _loaded_plugins
+
+    # The plugin is set up when a registry is needed
+    assert 'Spam reader' in [item.label for item in data_factory.members]
+    assert plugin_module == [True]
+    assert 'glue_spam_plugin' in _loaded_plugins
@@ -1,3 +1,6 @@
+import sys
+import numbers
+import operator
 import warnings
 
 import numpy as np
@@ -10,8 +13,23 @@ __all__ = ['unique', 'shape_to_string', 'view_shape', 'stack_view',
            'coerce_numeric', 'check_sorted', 'broadcast_to', 'unbroadcast',
            'iterate_chunks', 'combine_slices', 'nanmean', 'nanmedian', 'nansum',
            'nanmin', 'nanmax', 'format_minimal', 'compute_statistic',
-           'categorical_ndarray', 'index_lookup', 'ensure_numerical',
-           'broadcast_arrays_minimal', 'random_views_for_dask_array']
+           'compute_statistics', 'categorical_ndarray', 'index_lookup',
+           'ensure_numerical', 'broadcast_arrays_minimal',
+           'random_views_for_dask_array', 'view_cache_key', 'is_dask_array',
+           'PackedMask']
+
+
+def is_dask_array(array):
+    """
+    Return whether an array is a dask array.
+
+    Importing dask is slow, so this only imports it if it has already been
+    imported elsewhere (if it hasn't, the array can't be a dask array).
+    """
+    if 'dask.array' not in sys.modules:
+        return False
+    import dask.array as da
+    return isinstance(array, da.Array)
 
 
 def unbroadcast(array):
@@ -90,6 +108,24 @@ def view_shape(shape, view):
         return np.broadcast_to(1, shape)[view].shape
 
 
+def view_cache_key(view):
+    """
+    Return a hashable representation of a view that can be used as a key in
+    caches. A `TypeError` is raised if the view cannot be represented in this
+    way (for example if it includes arrays).
+    """
+    if isinstance(view, tuple):
+        return ('tuple',) + tuple(view_cache_key(v) for v in view)
+    elif isinstance(view, slice):
+        key = ('slice', view.start, view.stop, view.step)
+    elif view is None or view is Ellipsis:
+        key = view
+    else:
+        key = ('index', view)
+    hash(key)
+    return key
+
+
 def stack_view(shape, *views):
     shp = tuple(slice(0, s, 1) for s in shape)
     result = np.broadcast_arrays(*np.ogrid[shp])
@@ -442,6 +478,52 @@ def compute_statistic(statistic, data, mask=None, axis=None, finite=True,
         should be given and specify the percentile to calculate in the
         range [0:100]
     """
+    return compute_statistics([statistic], data, mask=mask, axis=axis,
+                              finite=finite, positive=positive,
+                              percentile=percentile)[0]
+
+
+def compute_statistics(statistics, data, mask=None, axis=None, finite=True,
+                       positive=False, percentile=None):
+    """
+    Compute several statistics for the data at once.
+
+    This is more efficient than calling :func:`compute_statistic` for each
+    statistic since the finite/positive/mask filtering is only done once, and
+    all percentiles are computed in a single call.
+
+    Parameters
+    ----------
+    statistics : iterable of str
+        The statistics to compute - each item should be one of ``'minimum'``,
+        ``'maximum'``, ``'mean'``, ``'median'``, ``'sum'``, or ``'percentile'``.
+    data : `numpy.ndarray`
+        The data to compute the statistics for.
+    mask : `numpy.ndarray`
+        The mask to apply when computing the statistics.
+    axis : None or int or tuple of int
+        If specified, the axis/axes to compute the statistics over.
+    finite : bool, optional
+        Whether to include only finite values in the statistics. This should
+        be `True` to ignore NaN/Inf values
+    positive : bool, optional
+        Whether to include only (strictly) positive values in the statistics.
+        This is used for example when computing statistics of data shown in
+        log space.
+    percentile : float or iterable of float, optional
+        If ``statistics`` includes ``'percentile'``, the ``percentile``
+        argument should be given and specify the percentile to calculate in
+        the range [0:100]. If several percentiles are requested, this should
+        be an iterable giving the percentiles in the same order as the
+        ``'percentile'`` entries in ``statistics``.
+
+    Returns
+    -------
+    results : list
+        The values of the statistics, in the same order as ``statistics``.
+    """
+
+    statistics = list(statistics)
 
     data = np.asanyarray(data)
     if mask is not None:
@@ -450,8 +532,18 @@ def compute_statistic(statistic, data, mask=None, axis=None, finite=True,
     # NOTE: this function should not ever have to use glue-specific objects.
     # The aim is to eventually use a fast C implementation of this function.
 
-    if statistic not in PLAIN_FUNCTIONS:
-        raise ValueError("Unrecognized statistic: {0}".format(statistic))
+    for statistic in statistics:
+        if statistic not in PLAIN_FUNCTIONS:
+            raise ValueError("Unrecognized statistic: {0}".format(statistic))
+
+    n_percentile = statistics.count('percentile')
+    if np.isscalar(percentile) or percentile is None:
+        percentiles = [percentile] * n_percentile
+    else:
+        percentiles = list(percentile)
+        if len(percentiles) != n_percentile:
+            raise ValueError("The number of percentiles should match the number "
+                             "of 'percentile' statistics")
 
     if (finite or positive or mask is not None) and data.dtype.kind != 'M':
 
@@ -474,24 +566,33 @@ def compute_statistic(statistic, data, mask=None, axis=None, finite=True,
             data = np.array(data, dtype=float)
             data[~keep] = np.nan
 
-        function = NAN_FUNCTIONS[statistic]
+        functions = NAN_FUNCTIONS
 
     else:
 
-        function = PLAIN_FUNCTIONS[statistic]
+        functions = PLAIN_FUNCTIONS
 
     if data.size == 0:
-        return np.nan
+        return [np.nan] * len(statistics)
 
     if isinstance(axis, tuple) and len(axis) == 0:
-        return data
+        return [data] * len(statistics)
+
+    results = {}
 
     with warnings.catch_warnings():
         warnings.simplefilter("ignore", category=RuntimeWarning)
-        if statistic == 'percentile':
-            return function(data, percentile, axis=axis)
-        else:
-            return function(data, axis=axis)
+        if n_percentile == 1:
+            results['percentile'] = [functions['percentile'](data, percentiles[0], axis=axis)]
+        elif n_percentile > 1:
+            results['percentile'] = list(functions['percentile'](data, percentiles, axis=axis))
+        for statistic in set(statistics) - {'percentile'}:
+            results[statistic] = functions[statistic](data, axis=axis)
+
+    percentile_results = iter(results.pop('percentile', []))
+
+    return [next(percentile_results) if statistic == 'percentile' else results[statistic]
+            for statistic in statistics]
 
 
 class categorical_ndarray(np.ndarray):
@@ -500,7 +601,9 @@ class categorical_ndarray(np.ndarray):
     unique integer codes for array values.
     """
 
-    _jitter = None
+    _jitter_seed = None
+    _positions = None
+    _jittered_codes = None
 
     def __new__(cls, value, dtype=None, copy=True, order=None, subok=False,
                 ndmin=0, categories=None):
@@ -514,14 +617,56 @@ class categorical_ndarray(np.ndarray):
         if isinstance(obj, categorical_ndarray):
             self.categories = obj.categories
 
+    @classmethod
+    def from_codes(cls, codes, categories, labels=None, jitter_seed=None, positions=None,
+                   float_codes=None):
+        """
+        Create an array from the integer codes of the values.
+
+        Parameters
+        ----------
+        codes : `~numpy.ndarray`
+            The integer codes, as given by :attr:`compact_codes`.
+        categories : `~numpy.ndarray`
+            The categories.
+        labels : `~numpy.ndarray`, optional
+            The values. This only needs to be specified if some codes don't
+            correspond to any of the categories.
+        jitter_seed : int, optional
+            If specified, the codes are jittered with this seed.
+        positions : `~numpy.ndarray`, optional
+            The positions of the values in the array from which they were
+            extracted, which determine the jitter for each value.
+        float_codes : `~numpy.ndarray`, optional
+            The floating-point codes (including the jitter for
+            ``jitter_seed``), as given by :attr:`codes`, if already computed.
+        """
+        if labels is None:
+            labels = np.asarray(categories).take(codes)
+        result = cls(labels, copy=False, categories=categories)
+        result._compact_codes = codes
+        result._jitter_seed = jitter_seed
+        result._positions = positions
+        if float_codes is not None:
+            if jitter_seed is None:
+                result._codes = float_codes
+            else:
+                result._jittered_codes = (jitter_seed, float_codes)
+        return result
+
     def _update_categories_and_codes(self):
         if hasattr(self, '_categories'):
-            self._codes = index_lookup(self, self._categories)
+            codes = _lookup_codes(self, self._categories)
         else:
-            self._categories, self._codes = unique(self)
+            self._categories, codes = unique(self)
             self._categories.setflags(write=False)
-            self._codes = self._codes.astype(float)
-            self._codes.setflags(write=False)
+        # We use the smallest integer type that can hold the number of
+        # categories, since the number of categories is typically small
+        # compared to the number of values.
+        n_categories = len(self._categories)
+        self._compact_codes = codes.astype(np.min_scalar_type(n_categories))
+        self._compact_codes[codes < 0] = n_categories
+        self._compact_codes.setflags(write=False)
 
     @property
     def categories(self):
@@ -533,19 +678,48 @@ class categorical_ndarray(np.ndarray):
     def categories(self, value):
         self._categories = value
 
+    @property
+    def compact_codes(self):
+        """
+        The index of the category for each value, using the smallest unsigned
+        integer type that can hold the number of categories. Values that are
+        not in the categories have a code equal to the number of categories.
+        """
+        if not hasattr(self, '_compact_codes'):
+            self._update_categories_and_codes()
+        return self._compact_codes
+
     @property
     def codes(self):
+        """
+        The index of the category for each value as floating-point values,
+        including any jitter. Values that are not in the categories have a
+        code of NaN.
+        """
         if not hasattr(self, '_codes'):
-            self._update_categories_and_codes()
-        if self._jitter is None:
+            compact_codes = self.compact_codes
+            self._codes = compact_codes.astype(float)
+            self._codes[compact_codes == len(self.categories)] = np.nan
+            self._codes.setflags(write=False)
+        if self._jitter_seed is None:
             return self._codes
-        else:
-            return self._codes + self._jitter
+        # The jittered codes are cached for the current seed
+        if self._jittered_codes is None or self._jittered_codes[0] != self._jitter_seed:
+            positions = self._positions
+            if positions is None:
+                positions = np.arange(self.size).reshape(self.shape)
+            codes = self._codes + _uniform_jitter(positions, self._jitter_seed)
+            codes.setflags(write=False)
+            self._jittered_codes = (self._jitter_seed, codes)
+        return self._jittered_codes[1]
 
     def jitter(self, method=None):
         """
         Jitter the codes.
 
+        The jitter is generated from a random seed and the position of each
+        value, so it does not need to be stored.
+
         Parameters
         ----------
         method : {None, 'uniform'}
@@ -554,14 +728,32 @@ class categorical_ndarray(np.ndarray):
             distributed random variable.
         """
         if method is None:
-            self._jitter = None
+            self._jitter_seed = None
         elif method == 'uniform':
-            self._jitter = np.random.random(self.shape)
-            self._jitter -= 0.5
+            self._jitter_seed = np.random.randint(2 ** 31)
         else:
             raise ValueError("method should be None or 'uniform'")
 
 
+def _uniform_jitter(positions, seed):
+    """
+    Return pseudo-random values uniformly distributed between -0.5 and 0.5
+    that only depend on the positions and the seed, so that the values for
+    any part of an array can be computed independently.
+    """
+    # This uses the SplitMix64 mixing function - numpy wraps around on
+    # overflow for unsigned integer arrays, which is what we need here.
+    x = np.array(positions, dtype=np.uint64, ndmin=1)
+    x += np.uint64((seed * 0x9E3779B97F4A7C15) % 2 ** 64)
+    x ^= x >> np.uint64(30)
+    x *= np.uint64(0xBF58476D1CE4E5B9)
+    x ^= x >> np.uint64(27)
+    x *= np.uint64(0x94D049BB133111EB)
+    x ^= x >> np.uint64(31)
+    values = (x >> np.uint64(11)) * 2. ** -53 - 0.5
+    return values.reshape(np.shape(positions))
+
+
 def ensure_numerical(values):
     if isinstance(values, categorical_ndarray):
         return values.codes
@@ -586,18 +778,368 @@ def index_lookup(data, items):
         If result[i] is finite, then data[i] = categories[result[i]]
         Otherwise, data[i] is not in the categories list
     """
+    codes = _lookup_codes(data, items)
+    result = codes.astype(float)
+    result[codes < 0] = np.nan
+    return result
 
-    # np.searchsorted doesn't work on mixed types in Python3
 
-    ndata, ncat = len(data), len(items)
-    data = pd.DataFrame({'data': data, 'row': np.arange(ndata)})
-    cats = pd.DataFrame({'items': items,
-                         'cat_row': np.arange(ncat)})
+def _lookup_codes(data, items):
+    """
+    Return the index in items of each data value, or -1 if the value is not
+    in items.
+    """
+    # We use a hash table rather than np.searchsorted since the latter doesn't
+    # work on mixed types in Python3
+    data = np.asarray(data)
+    return pd.Index(items).get_indexer(data.ravel()).reshape(data.shape)
 
-    m = pd.merge(data, cats, left_on='data', right_on='items')
-    result = np.zeros(ndata, dtype=float) * np.nan
-    result[np.array(m.row)] = m.cat_row
-    return result
+
+# Number of bits set in each possible byte value
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+def _full_bits(n_bits):
+    """
+    Return the packed bits for ``n_bits`` values that are all `True`.
+    """
+    n_bytes, remainder = divmod(n_bits, 8)
+    bits = np.full(n_bytes + (remainder > 0), 255, dtype=np.uint8)
+    if remainder:
+        bits[-1] = (255 << (8 - remainder)) & 255
+    return bits
+
+
+class PackedMask(object):
+    """
+    A boolean mask stored with one bit per value, in chunks along the first
+    axis.
+
+    Chunks in which the values are all `False` or all `True` are stored as a
+    single flag, so that sparse masks take up very little memory. Boolean
+    operations are carried out on the packed bits directly, and indexing only
+    unpacks the chunks covered by the index along the first axis, so that the
+    values in a small region of a large mask can be extracted cheaply.
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the mask.
+    chunks : list
+        The chunks of the mask. Each chunk is either `False`, `True`, or an
+        array of bits packed with :func:`~numpy.packbits` (with any padding
+        bits set to zero).
+    chunk_rows : int, optional
+        The number of elements along the first axis in each chunk. By default,
+        this is chosen so that each chunk contains about :attr:`chunk_size`
+        values.
+    """
+
+    chunk_size = 2 ** 20
+
+    def __init__(self, shape, chunks, chunk_rows=None):
+        self.shape = tuple(shape)
+        if len(self.shape) == 0:
+            raise ValueError("mask should have at least one dimension")
+        self.chunk_rows = chunk_rows or self._default_chunk_rows(self.shape)
+        self._chunks = list(chunks)
+        if len(self._chunks) != self.n_chunks:
+            raise ValueError("Expected {0} chunks, got {1}".format(self.n_chunks,
+                                                                   len(self._chunks)))
+
+    @classmethod
+    def _default_chunk_rows(cls, shape):
+        row_size = int(np.prod(shape[1:], dtype=np.int64))
+        return max(1, cls.chunk_size // max(1, row_size))
+
+    @classmethod
+    def from_array(cls, values, chunk_rows=None):
+        """
+        Create a packed mask from an array of values, which are converted to
+        booleans one chunk at a time.
+        """
+        if not hasattr(values, 'shape'):
+            values = np.asarray(values)
+        if len(values.shape) == 0:
+            raise ValueError("mask should have at least one dimension")
+        chunk_rows = chunk_rows or cls._default_chunk_rows(values.shape)
+        chunks = []
+        for start in range(0, values.shape[0], chunk_rows):
+            block = np.asarray(values[start:start + chunk_rows], dtype=bool)
+            if not block.any():
+                chunks.append(False)
+            elif block.all():
+                chunks.append(True)
+            else:
+                chunks.append(np.packbits(block.ravel()))
+        return cls(values.shape, chunks, chunk_rows=chunk_rows)
+
+    def __len__(self):
+        return self.shape[0]
+
+    @property
+    def ndim(self):
+        return len(self.shape)
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape, dtype=np.int64))
+
+    @property
+    def dtype(self):
+        return np.dtype(bool)
+
+    @property
+    def n_chunks(self):
+        return -(-self.shape[0] // self.chunk_rows)
+
+    @property
+    def nbytes(self):
+        """
+        The number of bytes used to store the packed bits.
+        """
+        return sum(chunk.nbytes for chunk in self._chunks
+                   if isinstance(chunk, np.ndarray))
+
+    def _chunk_bounds(self, ichunk):
+        start = ichunk * self.chunk_rows
+        return start, min(start + self.chunk_rows, self.shape[0])
+
+    def _chunk_bits(self, ichunk):
+        start, stop = self._chunk_bounds(ichunk)
+        return (stop - start) * (self.size // self.shape[0])
+
+    def _packed_chunk(self, ichunk):
+        chunk = self._chunks[ichunk]
+        if chunk is True:
+            return _full_bits(self._chunk_bits(ichunk))
+        elif chunk is False:
+            return np.zeros((self._chunk_bits(ichunk) + 7) // 8, dtype=np.uint8)
+        else:
+            return chunk
+
+    def _simplify_chunk(self, ichunk, bits):
+        if not bits.any():
+            return False
+        elif np.array_equal(bits, _full_bits(self._chunk_bits(ichunk))):
+            return True
+        else:
+            return bits
+
+    def count(self):
+        """
+        Return the number of `True` values in the mask.
+        """
+        total = 0
+        for ichunk, chunk in enumerate(self._chunks):
+            if chunk is True:
+                total += self._chunk_bits(ichunk)
+            elif chunk is not False:
+                total += int(_POPCOUNT[chunk].sum(dtype=np.int64))
+        return total
+
+    def any(self):
+        """
+        Return whether any of the values in the mask are `True`.
+        """
+        # Chunks with no values set are always stored as False
+        return any(chunk is not False for chunk in self._chunks)
+
+    def _unpack_rows(self, start, stop):
+        """
+        Unpack the values between two positions along the first axis.
+        """
+
+        result = np.empty((stop - start,) + self.shape[1:], dtype=bool)
+
+        if stop <= start:
+            return result
+
+        row_size = self.size // self.shape[0]
+
+        for ichunk in range(start // self.chunk_rows, (stop - 1) // self.chunk_rows + 1):
+
+            chunk_start, chunk_stop = self._chunk_bounds(ichunk)
+            lo, hi = max(start, chunk_start), min(stop, chunk_stop)
+            target = result[lo - start:hi - start]
+
+            chunk = self._chunks[ichunk]
+
+            if chunk is True or chunk is False:
+                target[...] = chunk
+            else:
+                # Only unpack the bytes that contain the required bits
+                bit_start = (lo - chunk_start) * row_size
+                bit_stop = (hi - chunk_start) * row_size
+                bits = np.unpackbits(chunk[bit_start // 8:(bit_stop + 7) // 8])
+                offset = bit_start % 8
+                target[...] = bits[offset:offset + bit_stop - bit_start].view(bool).reshape(target.shape)
+
+        return result
+
+    def _rows_for_index(self, index):
+        """
+        Given an index along the first axis, return the range of positions
+        along the first axis that it selects, and the equivalent index
+        relative to the start of that range. Returns `None` if the index
+        doesn't only apply to the first axis.
+        """
+
+        n = self.shape[0]
+
+        if isinstance(index, slice):
+            rows = range(*index.indices(n))
+            if len(rows) == 0:
+                return 0, 0, slice(0, 0)
+            start = min(rows[0], rows[-1])
+            return start, max(rows[0], rows[-1]) + 1, slice(rows[0] - start, None, index.step)
+
+        if isinstance(index, (numbers.Integral, np.integer)) and not isinstance(index, (bool, np.bool_)):
+            position = int(index) + n if index < 0 else int(index)
+            if position < 0 or position >= n:
+                raise IndexError("index {0} is out of bounds for axis 0 with "
+                                 "size {1}".format(index, n))
+            return position, position + 1, 0
+
+        if index is None or index is Ellipsis or isinstance(index, (bool, np.bool_)):
+            return None
+
+        index = np.asarray(index)
+
+        if index.dtype.kind == 'b':
+            if index.ndim != 1:
+                return None
+            if index.shape[0] != n:
+                raise IndexError("boolean index did not match indexed array along "
+                                 "dimension 0; dimension is {0} but corresponding "
+                                 "boolean dimension is {1}".format(n, index.shape[0]))
+            rows = np.nonzero(index)[0]
+        elif index.dtype.kind in 'iu':
+            rows = np.where(index < 0, index + n, index)
+            if rows.size > 0 and (rows.min() < 0 or rows.max() >= n):
+                raise IndexError("index is out of bounds for axis 0 with size {0}".format(n))
+        else:
+            return None
+
+        if rows.size == 0:
+            return 0, 0, rows
+
+        start = int(rows.min())
+        return start, int(rows.max()) + 1, rows - start
+
+    def to_array(self, view=None):
+        """
+        Return the mask (or part of the mask) as a boolean array.
+
+        Parameters
+        ----------
+        view : slice or tuple, optional
+            If specified, only the values in this view are returned, and only
+            the chunks that overlap with the view along the first axis are
+            unpacked.
+        """
+
+        if view is None:
+            return self._unpack_rows(0, self.shape[0])
+
+        key = view if isinstance(view, tuple) else (view,)
+
+        rows = self._rows_for_index(key[0]) if len(key) > 0 else None
+
+        if rows is None:
+            return self._unpack_rows(0, self.shape[0])[view]
+
+        start, stop, first = rows
+
+        return self._unpack_rows(start, stop)[(first,) + key[1:]]
+
+    def __getitem__(self, view):
+        if view is None:
+            return self.to_array()[None]
+        return self.to_array(view)
+
+    def __array__(self, dtype=None):
+        values = self.to_array()
+        if dtype is not None:
+            values = values.astype(dtype, copy=False)
+        return values
+
+    def _combine(self, other, op):
+
+        if not isinstance(other, PackedMask):
+            other = np.asarray(other, dtype=bool)
+            if other.shape != self.shape:
+                other = np.broadcast_to(other, self.shape)
+            other = PackedMask.from_array(other, chunk_rows=self.chunk_rows)
+        elif other.shape != self.shape:
+            raise ValueError("Masks should have the same shape "
+                             "(got {0} and {1})".format(self.shape, other.shape))
+        elif other.chunk_rows != self.chunk_rows:
+            other = PackedMask.from_array(other, chunk_rows=self.chunk_rows)
+
+        chunks = []
+        for ichunk, (chunk1, chunk2) in enumerate(zip(self._chunks, other._chunks)):
+            if isinstance(chunk1, bool) and isinstance(chunk2, bool):
+                chunks.append(bool(op(chunk1, chunk2)))
+            else:
+                bits = op(self._packed_chunk(ichunk), other._packed_chunk(ichunk))
+                chunks.append(self._simplify_chunk(ichunk, bits))
+
+        return PackedMask(self.shape, chunks, chunk_rows=self.chunk_rows)
+
+    def __and__(self, other):
+        return self._combine(other, operator.and_)
+
+    def __or__(self, other):
+        return self._combine(other, operator.or_)
+
+    def __xor__(self, other):
+        return self._combine(other, operator.xor)
+
+    __rand__ = __and__
+    __ror__ = __or__
+    __rxor__ = __xor__
+
+    def __invert__(self):
+        chunks = []
+        for ichunk, chunk in enumerate(self._chunks):
+            if isinstance(chunk, bool):
+                chunks.append(not chunk)
+            else:
+                # The inverted bits are masked to keep any padding bits unset
+                bits = np.bitwise_and(np.invert(chunk), _full_bits(self._chunk_bits(ichunk)))
+                chunks.append(self._simplify_chunk(ichunk, bits))
+        return PackedMask(self.shape, chunks, chunk_rows=self.chunk_rows)
+
+    def encode(self):
+        """
+        Return the mask as two arrays: one with a flag for each chunk (0 if the
+        values are all `False`, 1 if they are all `True`, and 2 otherwise), and
+        one with the packed bits for all the chunks with flag 2 in turn.
+        """
+        flags = np.array([2 if isinstance(chunk, np.ndarray) else int(chunk)
+                          for chunk in self._chunks], dtype=np.uint8)
+        packed = [chunk for chunk in self._chunks if isinstance(chunk, np.ndarray)]
+        bits = np.concatenate(packed) if packed else np.zeros(0, dtype=np.uint8)
+        return flags, bits
+
+    @classmethod
+    def decode(cls, shape, flags, bits, chunk_rows):
+        """
+        Create a packed mask from the arrays returned by :meth:`encode`.
+        """
+        mask = cls(shape, [False] * len(flags), chunk_rows=chunk_rows)
+        offset = 0
+        for ichunk, flag in enumerate(flags):
+            if flag == 2:
+                n_bytes = (mask._chunk_bits(ichunk) + 7) // 8
+                mask._chunks[ichunk] = np.asarray(bits[offset:offset + n_bytes], dtype=np.uint8)
+                offset += n_bytes
+            else:
+                mask._chunks[ichunk] = bool(flag)
+        if offset != len(bits):
+            raise ValueError("The number of packed bits does not match the flags")
+        return mask
 
 
 def random_views_for_dask_array(array, n_random_samples, n_chunks):
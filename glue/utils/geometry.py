@@ -1,56 +1,258 @@
+import os
+import numbers
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
 import numpy as np
 
-from glue.utils import unbroadcast, broadcast_to
+from glue.utils import unbroadcast, broadcast_to, iterate_chunks
+
+__all__ = ['points_inside_poly', 'polygon_line_intersections', 'floodfill',
+           'floodfill_region', 'FloodFillRegion', 'PolygonIndex']
+
+
+# Number of points processed at a time when testing whether points are inside
+# a polygon - this is chosen so that the temporary arrays fit in the cache.
+POLYGON_CHUNK_SIZE = 2 ** 16
+
+# Minimum number of points for which it is worth building a PolygonIndex
+POLYGON_INDEX_MIN_POINTS = 2 ** 14
+
+# Default number of grid cells along each axis of a PolygonIndex
+POLYGON_INDEX_CELLS = 512
+
+# Approximate number of elements in each of the blocks that flood fills are
+# computed over.
+FLOODFILL_BLOCK_ELEMENTS = 2 ** 18
 
-__all__ = ['points_inside_poly', 'polygon_line_intersections', 'floodfill']
+# Values for the cells in PolygonIndex
+CELL_OUTSIDE, CELL_INSIDE, CELL_BOUNDARY = 0, 1, 2
 
 
-def points_inside_poly(x, y, vx, vy):
+class PolygonIndex(object):
+    """
+    A grid-based index used to quickly determine whether points are inside a
+    polygon.
+
+    The bounding box of the polygon is divided into a regular grid of cells,
+    and each cell is classified as being either entirely inside the polygon,
+    entirely outside, or close to one of the edges of the polygon. Only points
+    in the latter cells then need to be tested against the edges of the
+    polygon, which is done with :meth:`matplotlib.path.Path.contains_points`
+    so that the results are identical to testing all points with it.
+
+    Parameters
+    ----------
+    vx, vy : iterable
+        The vertices of the polygon, which is assumed to be closed.
+    n_cells : int, optional
+        The number of cells along each axis of the grid.
+    """
+
+    def __init__(self, vx, vy, n_cells=POLYGON_INDEX_CELLS):
+
+        from matplotlib.path import Path
+
+        self.vx = np.asarray(vx, dtype=float)
+        self.vy = np.asarray(vy, dtype=float)
+
+        self.path = Path(np.column_stack((self.vx, self.vy)))
+
+        self.xmin, self.xmax = np.min(self.vx), np.max(self.vx)
+        self.ymin, self.ymax = np.min(self.vy), np.max(self.vy)
+
+        if (len(self.vx) < 3 or self.xmax <= self.xmin or self.ymax <= self.ymin or
+                not np.all(np.isfinite(self.vx)) or not np.all(np.isfinite(self.vy))):
+            # Degenerate polygon - we just use a single boundary cell, which
+            # means that all points in the bounding box get tested.
+            self.cells = np.array([[CELL_BOUNDARY]], dtype=np.uint8)
+        else:
+            self.cells = self._compute_cells(n_cells)
+
+        self.ny, self.nx = self.cells.shape
+
+    def _cell_index(self, values, vmin, vmax, n):
+        index = np.floor((values - vmin) * (n / (vmax - vmin))).astype(int)
+        return np.clip(index, 0, n - 1)
+
+    def _compute_cells(self, n):
+
+        dx = (self.xmax - self.xmin) / n
+
+        # Make sure that the polygon is closed, and order the vertices of
+        # each edge by increasing x
+        x1, x2 = self.vx, np.roll(self.vx, -1)
+        y1, y2 = self.vy, np.roll(self.vy, -1)
+        swap = x1 > x2
+        x1, x2 = np.where(swap, x2, x1), np.where(swap, x1, x2)
+        y1, y2 = np.where(swap, y2, y1), np.where(swap, y1, y2)
+
+        # Find all the columns of cells crossed by each edge
+        cmin = self._cell_index(x1, self.xmin, self.xmax, n)
+        cmax = self._cell_index(x2, self.xmin, self.xmax, n)
+        counts = cmax - cmin + 1
+        edge = np.repeat(np.arange(len(x1)), counts)
+        columns = cmin[edge] + np.arange(len(edge)) - np.repeat(np.cumsum(counts) - counts, counts)
+        x1, x2, y1, y2 = x1[edge], x2[edge], y1[edge], y2[edge]
+
+        # Find the range of y values of each edge within each column
+        xlo = np.clip(self.xmin + columns * dx, x1, x2)
+        xhi = np.clip(self.xmin + (columns + 1) * dx, x1, x2)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            slope = np.where(x2 > x1, (y2 - y1) / (x2 - x1), 0)
+        ylo = np.where(x2 > x1, y1 + slope * (xlo - x1), y1)
+        yhi = np.where(x2 > x1, y1 + slope * (xhi - x1), y2)
+        rmin = self._cell_index(np.minimum(ylo, yhi), self.ymin, self.ymax, n)
+        rmax = self._cell_index(np.maximum(ylo, yhi), self.ymin, self.ymax, n)
+
+        # Mark the cells crossed by the edges
+        crossings = np.zeros((n + 1, n), dtype=int)
+        np.add.at(crossings, (rmin, columns), 1)
+        np.add.at(crossings, (rmax + 1, columns), -1)
+        boundary = np.cumsum(crossings, axis=0)[:-1] > 0
+
+        # Grow the boundary region by one cell in each direction so that
+        # points in the remaining cells are never close to an edge, even
+        # taking into account rounding errors in the cell indices.
+        grown = boundary.copy()
+        grown[1:] |= boundary[:-1]
+        grown[:-1] |= boundary[1:]
+        boundary = grown.copy()
+        boundary[:, 1:] |= grown[:, :-1]
+        boundary[:, :-1] |= grown[:, 1:]
+
+        # All points in a cell away from the edges are either inside or
+        # outside the polygon. Furthermore, no edges cross runs of adjacent
+        # cells away from the edges in each row, so we only need to test the
+        # center of the first cell in each run.
+        free = ~boundary
+        start = free.copy()
+        start[:, 1:] &= boundary[:, :-1]
+        rows, columns = np.nonzero(start)
+        xc = self.xmin + (columns + 0.5) * dx
+        yc = self.ymin + (rows + 0.5) * (self.ymax - self.ymin) / n
+        inside = self.path.contains_points(np.column_stack((xc, yc)))
+        run = np.cumsum(start.ravel()).reshape((n, n)) - 1
+
+        cells = np.full((n, n), CELL_BOUNDARY, dtype=np.uint8)
+        cells[free] = np.where(inside[run[free]], CELL_INSIDE, CELL_OUTSIDE)
+
+        return cells
+
+    def contains(self, x, y):
+        """
+        Test whether points are inside the polygon.
+
+        Parameters
+        ----------
+        x, y : `~numpy.ndarray`
+            One-dimensional arrays of coordinates for the points to test.
+
+        Returns
+        -------
+        inside : `~numpy.ndarray`
+            A boolean array indicating whether each point is inside the
+            polygon.
+        """
+
+        inside = np.zeros(len(x), dtype=bool)
+
+        keep = ((x >= self.xmin) &
+                (x <= self.xmax) &
+                (y >= self.ymin) &
+                (y <= self.ymax))
+
+        if not np.any(keep):
+            return inside
+
+        x = x[keep]
+        y = y[keep]
+
+        if self.nx == 1 and self.ny == 1:
+            cells = np.repeat(self.cells[0, 0], len(x))
+        else:
+            cells = self.cells[self._cell_index(y, self.ymin, self.ymax, self.ny),
+                               self._cell_index(x, self.xmin, self.xmax, self.nx)]
+
+        result = cells == CELL_INSIDE
+
+        test = cells == CELL_BOUNDARY
+        if np.any(test):
+            result[test] = self.path.contains_points(np.column_stack((x[test], y[test])))
+
+        inside[keep] = result
+
+        return inside
+
+
+def points_inside_poly(x, y, vx, vy, index=None, n_threads=None):
+    """
+    Test whether points are inside a polygon.
+
+    Parameters
+    ----------
+    x, y : `~numpy.ndarray`
+        The coordinates of the points to test
+    vx, vy : iterable
+        The vertices of the polygon
+    index : `PolygonIndex`, optional
+        A pre-computed index for the polygon. If not specified, an index is
+        computed if the number of points is large enough for it to be useful.
+    n_threads : int, optional
+        The number of threads to use to process the points. By default this
+        depends on the number of points and available CPUs.
+
+    Returns
+    -------
+    inside : `~numpy.ndarray`
+        A boolean array with the same shape as ``x`` and ``y``
+    """
 
     if x.dtype.kind == 'M' and vx.dtype.kind == 'M':
         vx = vx.astype(x.dtype).astype(float)
-        x = x.astype(float)
 
     if y.dtype.kind == 'M' and vy.dtype.kind == 'M':
         vy = vy.astype(y.dtype).astype(float)
-        y = y.astype(float)
 
     original_shape = x.shape
 
     x = unbroadcast(x)
     y = unbroadcast(y)
 
-    x = x.astype(float)
-    y = y.astype(float)
-
     x, y = np.broadcast_arrays(x, y)
 
     reduced_shape = x.shape
 
-    x = x.flat
-    y = y.flat
-
-    from matplotlib.path import Path
-    p = Path(np.column_stack((vx, vy)))
+    if index is None:
+        if x.size >= POLYGON_INDEX_MIN_POINTS:
+            index = PolygonIndex(vx, vy)
+        else:
+            index = PolygonIndex(vx, vy, n_cells=1)
+
+    inside = np.zeros(reduced_shape, bool)
+
+    # Process the points in chunks, converting only one chunk at a time to
+    # floating-point values.
+
+    def process_chunk(view):
+        xc = np.asarray(x[view], dtype=float).ravel()
+        yc = np.asarray(y[view], dtype=float).ravel()
+        inside[view] = index.contains(xc, yc).reshape(inside[view].shape)
+
+    if x.size <= POLYGON_CHUNK_SIZE:
+        process_chunk(Ellipsis)
+    else:
+        chunks = iterate_chunks(reduced_shape, n_max=POLYGON_CHUNK_SIZE)
+        if n_threads is None:
+            n_threads = min(os.cpu_count() or 1, x.size // POLYGON_CHUNK_SIZE, 8)
+        if n_threads > 1:
+            with ThreadPoolExecutor(max_workers=n_threads) as executor:
+                for future in [executor.submit(process_chunk, view) for view in chunks]:
+                    future.result()
+        else:
+            for view in chunks:
+                process_chunk(view)
 
-    keep = ((x >= np.min(vx)) &
-            (x <= np.max(vx)) &
-            (y >= np.min(vy)) &
-            (y <= np.max(vy)))
-
-    inside = np.zeros(len(x), bool)
-
-    x = x[keep]
-    y = y[keep]
-
-    coords = np.column_stack((x, y))
-
-    inside[keep] = p.contains_points(coords).astype(bool)
-
-    good = np.isfinite(x) & np.isfinite(y)
-    inside[keep][~good] = False
-
-    inside = inside.reshape(reduced_shape)
     inside = broadcast_to(inside, original_shape)
 
     return inside
@@ -123,19 +325,324 @@ def polygon_line_intersections(px, py, xval=None, yval=None):
     return segments
 
 
-def floodfill(data, start_coords, threshold):
+class FloodFillRegion(object):
+    """
+    A region selected by a flood fill, stored as a set of blocks.
+
+    Parameters
+    ----------
+    shape : tuple
+        The shape of the array the region is defined on.
+    block_shape : tuple
+        The shape of the blocks the array is divided into.
+    start_coords : tuple
+        The pixel coordinates of the starting point of the flood fill.
+    vmin, vmax : float
+        The range of values (exclusive) included in the region.
+    """
+
+    def __init__(self, shape, block_shape, start_coords, vmin, vmax):
+        self.shape = tuple(shape)
+        self.block_shape = tuple(block_shape)
+        self.start_coords = tuple(start_coords)
+        self.vmin = vmin
+        self.vmax = vmax
+        # Boolean masks for each block that contains part of the region,
+        # indexed by the block indices along each dimension.
+        self.blocks = {}
+        self._bounding_box = None
+
+    def block_slices(self, block):
+        """
+        Return the slices giving the part of the array covered by a block.
+        """
+        return tuple(slice(index * size, min((index + 1) * size, length))
+                     for index, size, length in zip(block, self.block_shape, self.shape))
+
+    def bounding_box(self):
+        """
+        Return the slices of the bounding box of the region, and the mask of
+        the region inside this bounding box.
+
+        The result is computed the first time it is needed and then cached,
+        so the blocks should not be modified after that.
+        """
+
+        if self._bounding_box is None:
+            self._bounding_box = self._compute_bounding_box()
+
+        return self._bounding_box
+
+    def _compute_bounding_box(self):
+
+        if len(self.blocks) == 0:
+            return tuple(slice(0, 0) for length in self.shape), np.zeros((0,) * len(self.shape), dtype=bool)
+
+        start = [min(block[idim] for block in self.blocks) * self.block_shape[idim]
+                 for idim in range(len(self.shape))]
+        stop = [min((max(block[idim] for block in self.blocks) + 1) * self.block_shape[idim],
+                    self.shape[idim]) for idim in range(len(self.shape))]
+
+        mask = np.zeros([b - a for a, b in zip(start, stop)], dtype=bool)
+
+        for block, block_mask in self.blocks.items():
+            slices = self.block_slices(block)
+            mask[tuple(slice(s.start - a, s.stop - a) for s, a in zip(slices, start))] = block_mask
+
+        # Shrink the bounding box to the pixels that are selected
+        for idim in range(mask.ndim):
+            keep = np.flatnonzero(mask.any(axis=tuple(i for i in range(mask.ndim) if i != idim)))
+            stop[idim] = start[idim] + keep[-1] + 1
+            start[idim] += keep[0]
+            mask = mask[(slice(None),) * idim + (slice(keep[0], keep[-1] + 1),)]
+
+        return tuple(slice(a, b) for a, b in zip(start, stop)), mask
 
-    from scipy.ndimage.measurements import label
+    def to_mask(self, view=None):
+        """
+        Return the region as a boolean mask with the same shape as the array,
+        optionally only for the subset of the array given by ``view``.
+
+        If ``view`` is given, only an array with the shape of the view is
+        allocated (except for views mixing slices and index arrays), and the
+        part of the region inside the view is copied to it.
+        """
+
+        slices, region = self.bounding_box()
+
+        if view is None:
+            mask = np.zeros(self.shape, dtype=bool)
+            mask[slices] = region
+            return mask
+
+        key = view if isinstance(view, tuple) else (view,)
+
+        if (len(key) <= len(self.shape) and
+                all(isinstance(k, (slice, numbers.Integral)) and not isinstance(k, bool) for k in key)):
+            return self._basic_view_mask(key, slices, region)
+
+        if len(key) == 1:
+            index = np.asarray(key[0])
+            if index.dtype.kind == 'b' and index.shape == self.shape:
+                return self._coordinates_mask(np.nonzero(index), slices, region)
+
+        if len(key) == len(self.shape):
+            indices = [np.asarray(k) for k in key]
+            if all(index.dtype.kind in 'iu' for index in indices):
+                return self._coordinates_mask(indices, slices, region)
+
+        mask = np.zeros(self.shape, dtype=bool)
+        mask[slices] = region
+        return mask[view]
+
+    def _basic_view_mask(self, key, slices, region):
+        """
+        Return the mask for a view consisting of slices and integers.
+        """
+
+        key = tuple(key) + (slice(None),) * (len(self.shape) - len(key))
+
+        shape = []
+        target = []
+        source = []
+        overlap = True
+
+        for index, bounds, length in zip(key, slices, self.shape):
+
+            if isinstance(index, slice):
+
+                positions = np.arange(*index.indices(length))
+                shape.append(len(positions))
+
+                inside = np.flatnonzero((positions >= bounds.start) & (positions < bounds.stop))
+                if len(inside) == 0:
+                    overlap = False
+                    continue
+
+                target.append(slice(inside[0], inside[-1] + 1))
+
+                # The positions inside the bounding box are evenly spaced, so
+                # can be expressed as a slice of the region
+                first = positions[inside[0]] - bounds.start
+                last = positions[inside[-1]] - bounds.start
+                step = index.step or 1
+                stop = last + step
+                source.append(slice(first, None if stop < 0 else stop, step))
+
+            else:
+
+                position = index + length if index < 0 else index
+                if position < 0 or position >= length:
+                    raise IndexError("index {0} is out of bounds for axis with "
+                                     "size {1}".format(index, length))
+
+                if position < bounds.start or position >= bounds.stop:
+                    overlap = False
+                    continue
+
+                source.append(position - bounds.start)
+
+        mask = np.zeros(shape, dtype=bool)
+
+        if overlap:
+            mask[tuple(target)] = region[tuple(source)]
+
+        return mask
+
+    def _coordinates_mask(self, indices, slices, region):
+        """
+        Return the mask at the positions given by an index array for each
+        dimension.
+        """
+
+        indices = np.broadcast_arrays(*indices)
+
+        mask = np.zeros(indices[0].shape, dtype=bool)
+
+        inside = np.ones(indices[0].shape, dtype=bool)
+        positions = []
+        for index, bounds, length in zip(indices, slices, self.shape):
+            if index.size > 0 and (index.min() < -length or index.max() >= length):
+                raise IndexError("index is out of bounds for axis with size {0}".format(length))
+            index = np.where(index < 0, index + length, index)
+            inside &= (index >= bounds.start) & (index < bounds.stop)
+            positions.append(index)
+
+        mask[inside] = region[tuple(index[inside] - bounds.start
+                                    for index, bounds in zip(positions, slices))]
+
+        return mask
+
+
+def _floodfill_block_shape(ndim):
+    size = max(1, int(round(FLOODFILL_BLOCK_ELEMENTS ** (1. / max(ndim, 1)))))
+    return (size,) * ndim
+
+
+def floodfill_region(data, start_coords, threshold, previous=None, block_shape=None):
+    """
+    Find the region connected to a starting point in which the values are
+    close to the value at the starting point.
+
+    The array is divided into blocks, and the region is grown from the
+    starting point one block at a time, so that only the blocks that the
+    region reaches (and their neighbors) are accessed.
+
+    Parameters
+    ----------
+    data : `~numpy.ndarray`
+        The values to use for the flood fill.
+    start_coords : tuple
+        The pixel coordinates of the starting point.
+    threshold : float
+        A value greater or equal to 1 describing the extent of the flood
+        filling. The range of values selected is ``start_value * (2 -
+        threshold)`` to ``start_value * threshold`` (exclusive), where
+        ``start_value`` is the value at ``start_coords``.
+    previous : `FloodFillRegion`, optional
+        A region previously computed for the same data and starting point. If
+        the range of values for the new threshold includes the previous one,
+        the region is grown from the previous region.
+    block_shape : tuple, optional
+        The shape of the blocks to use.
+
+    Returns
+    -------
+    region : `FloodFillRegion`
+    """
+
+    from scipy.ndimage import label
+
+    start_coords = tuple(int(c) % length for c, length in zip(start_coords, data.shape))
 
     # Determine value at the starting coordinates
     value = data[start_coords]
+    vmin, vmax = value * (2 - threshold), value * threshold
+
+    if block_shape is None:
+        if previous is None:
+            block_shape = _floodfill_block_shape(data.ndim)
+        else:
+            block_shape = previous.block_shape
+
+    region = FloodFillRegion(data.shape, block_shape, start_coords, vmin, vmax)
+
+    # If the starting point itself is not in the range, the region is empty
+    if not (vmin < value < vmax):
+        return region
+
+    n_blocks = [-(-length // size) for length, size in zip(region.shape, region.block_shape)]
+
+    # Queue of blocks to grow the region into, along with the mask of pixels
+    # in these blocks that should be part of the region.
+    queue = deque()
+
+    if (previous is not None and len(previous.blocks) > 0 and
+            previous.shape == region.shape and
+            previous.block_shape == region.block_shape and
+            previous.start_coords == start_coords and
+            vmin <= previous.vmin and vmax >= previous.vmax):
+        queue.extend(previous.blocks.items())
+    else:
+        block = tuple(c // size for c, size in zip(start_coords, region.block_shape))
+        seeds = np.zeros([s.stop - s.start for s in region.block_slices(block)], dtype=bool)
+        seeds[tuple(c % size for c, size in zip(start_coords, region.block_shape))] = True
+        queue.append((block, seeds))
+
+    labels = {}
+
+    while queue:
+
+        block, seeds = queue.popleft()
+
+        # Find the connected features inside the block
+        if block not in labels:
+            values = np.asarray(data[region.block_slices(block)])
+            labels[block] = label((values > vmin) & (values < vmax))[0]
+        block_labels = labels[block]
+
+        selected = region.blocks.get(block)
+        if selected is not None:
+            seeds = seeds & ~selected
+
+        # Add any features that the seeds are part of to the region
+        seed_labels = np.unique(block_labels[seeds])
+        seed_labels = seed_labels[seed_labels > 0]
+        if len(seed_labels) == 0:
+            continue
+
+        new = np.isin(block_labels, seed_labels)
+
+        if selected is None:
+            region.blocks[block] = new
+        else:
+            new &= ~selected
+            selected |= new
+
+        # Propagate the new pixels on the faces of the block to the
+        # neighboring blocks
+        for idim in range(data.ndim):
+            for step in (-1, 1):
+                index = block[idim] + step
+                if index < 0 or index >= n_blocks[idim]:
+                    continue
+                face = new[(slice(None),) * idim + (0 if step < 0 else -1,)]
+                if not face.any():
+                    continue
+                neighbor = block[:idim] + (index,) + block[idim + 1:]
+                slices = region.block_slices(neighbor)
+                seeds = np.zeros([s.stop - s.start for s in slices], dtype=bool)
+                seeds[(slice(None),) * idim + (-1 if step < 0 else 0,)] = face
+                queue.append((neighbor, seeds))
+
+    return region
 
-    # Determine all pixels that match
-    mask = (data > value * (2 - threshold)) & (data < value * threshold)
-
-    # Determine all individual chunks
-    labels, num_features = label(mask)
 
-    mask = labels == labels[start_coords]
+def floodfill(data, start_coords, threshold):
+    """
+    Return a boolean mask of the region connected to a starting point in
+    which the values are close to the value at the starting point.
 
-    return mask
+    See :func:`floodfill_region` for a description of the parameters.
+    """
+    return floodfill_region(data, start_coords, threshold).to_mask()
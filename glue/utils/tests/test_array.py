@@ -1,3 +1,4 @@
+import operator
 from itertools import product
 
 import pytest
@@ -9,8 +10,9 @@ from glue.tests.helpers import HYPOTHESIS_INSTALLED
 from ..array import (view_shape, coerce_numeric, stack_view, unique, broadcast_to,
                      shape_to_string, check_sorted, pretty_number, unbroadcast,
                      iterate_chunks, combine_slices, nanmean, nanmedian, nansum,
-                     nanmin, nanmax, format_minimal, compute_statistic, categorical_ndarray,
-                     index_lookup, broadcast_arrays_minimal)
+                     nanmin, nanmax, format_minimal, compute_statistic, compute_statistics,
+                     categorical_ndarray, index_lookup, broadcast_arrays_minimal,
+                     PackedMask)
 
 
 @pytest.mark.parametrize(('before', 'ref_after', 'ref_indices'),
@@ -316,6 +318,37 @@ def test_compute_statistic(statistic, data, kwargs, result):
     assert_allclose(compute_statistic(statistic, data, **kwargs), result)
 
 
+@pytest.mark.parametrize('axis', (None, 0, 1, (0, 1)))
+def test_compute_statistics(axis):
+
+    data = np.random.random((20, 30))
+    data[3, 4] = np.nan
+    mask = data > 0.2
+
+    statistics = ['sum', 'percentile', 'median', 'percentile', 'minimum', 'maximum', 'mean']
+
+    results = compute_statistics(statistics, data, mask=mask, axis=axis,
+                                 percentile=[10, 90])
+
+    percentiles = iter([10, 90])
+    for statistic, result in zip(statistics, results):
+        expected = compute_statistic(statistic, data, mask=mask, axis=axis,
+                                     percentile=next(percentiles) if statistic == 'percentile' else None)
+        assert_allclose(result, expected)
+
+
+def test_compute_statistics_invalid():
+
+    with pytest.raises(ValueError) as exc:
+        compute_statistics(['minimum', 'spam'], np.ones(3))
+    assert exc.value.args[0] == 'Unrecognized statistic: spam'
+
+    with pytest.raises(ValueError) as exc:
+        compute_statistics(['percentile', 'percentile'], np.ones(3), percentile=[1, 2, 3])
+    assert exc.value.args[0] == ("The number of percentiles should match the "
+                                 "number of 'percentile' statistics")
+
+
 def test_index_lookup():
 
     assert_equal(index_lookup(['a', 'b', 't', 'f', 'a', 'b'], ['a', 'b', 'f']),
@@ -336,8 +369,8 @@ def test_categorical_ndarray():
 
     np.random.seed(12345)
     array.jitter(method='uniform')
-    assert_allclose(array.codes, [1.42961609, -0.18362445, np.nan,
-                                  -0.29543972, 0.06772503, 1.0955447])
+    assert_allclose(array.codes, [0.52672544, 0.29077214, np.nan,
+                                  0.25485172, -0.40003874, 1.04899815])
 
     array.jitter(method=None)
     assert_equal(array.codes, [1, 0, np.nan, 0, 0, 1])
@@ -354,3 +387,97 @@ def test_categorical_ndarray_slicing():
     assert_equal(subset, ['b', 'c', 'b', 'b'])
     assert_equal(subset.codes, [1, 2, 1, 1])
     assert_equal(subset.categories, ['a', 'b', 'c'])
+
+
+def test_categorical_ndarray_compact_codes():
+
+    array = categorical_ndarray(['a', 'b', 'c', 'b', 'b', 'a'], categories=['b', 'a'])
+    assert array.compact_codes.dtype == np.uint8
+    assert_equal(array.compact_codes, [1, 0, 2, 0, 0, 1])
+
+    array = categorical_ndarray.from_codes(np.array([1, 0, 0], dtype=np.uint8),
+                                           np.array(['x', 'y']), jitter_seed=1,
+                                           positions=np.array([3, 4, 5]))
+    assert_equal(array, ['y', 'x', 'x'])
+
+    # The jitter only depends on the seed and position of the values
+    full = categorical_ndarray.from_codes(np.array([0, 0, 0, 1, 0, 0], dtype=np.uint8),
+                                          np.array(['x', 'y']), jitter_seed=1)
+    assert_equal(array.codes, full.codes[3:])
+    assert np.all(np.abs(full.codes - [0, 0, 0, 1, 0, 0]) < 0.5)
+
+
+class TestPackedMask(object):
+
+    def setup_method(self, method):
+        rng = np.random.RandomState(12345)
+        self.array1 = rng.uniform(size=(11, 3, 4)) > 0.5
+        self.array2 = rng.uniform(size=(11, 3, 4)) > 0.8
+        # Include chunks with all values unset and all values set
+        self.array1[:2] = False
+        self.array2[:4] = True
+        self.mask1 = PackedMask.from_array(self.array1, chunk_rows=2)
+        self.mask2 = PackedMask.from_array(self.array2, chunk_rows=2)
+
+    def test_roundtrip(self):
+        assert self.mask1.shape == (11, 3, 4)
+        assert self.mask1.n_chunks == 6
+        assert_equal(np.asarray(self.mask1), self.array1)
+        assert self.mask1.count() == np.count_nonzero(self.array1)
+        assert self.mask1.any()
+        assert not PackedMask.from_array(np.zeros((3, 4), dtype=bool)).any()
+
+    def test_nbytes(self):
+        # Chunks with constant values don't take up any space
+        assert self.mask1.nbytes == 4 * 3 + 2
+        assert PackedMask.from_array(np.ones((1000, 100), dtype=bool)).nbytes == 0
+
+    @pytest.mark.parametrize('view', [np.s_[:], np.s_[3], np.s_[-1], np.s_[3:6],
+                                      np.s_[::-2], np.s_[5:1:-1, 0], np.s_[:, 1:, ::2],
+                                      np.s_[4, 2, 1], np.s_[..., 0],
+                                      np.s_[[1, -2, 5]], np.s_[3:3],
+                                      (np.array([1, 6, 2]), np.array([0, 2, 1])),
+                                      np.arange(11) % 3 == 0])
+    def test_view(self, view):
+        assert_equal(self.mask1[view], self.array1[view])
+        assert_equal(self.mask1.to_array(view), self.array1[view])
+
+    def test_view_boolean_mask(self):
+        view = self.array2.copy()
+        assert_equal(self.mask1[view], self.array1[view])
+
+    def test_view_out_of_bounds(self):
+        with pytest.raises(IndexError):
+            self.mask1[11]
+        with pytest.raises(IndexError):
+            self.mask1[[0, 12]]
+
+    @pytest.mark.parametrize('operation', [operator.and_, operator.or_, operator.xor])
+    def test_operations(self, operation):
+        assert_equal(np.asarray(operation(self.mask1, self.mask2)),
+                     operation(self.array1, self.array2))
+        assert_equal(np.asarray(operation(self.mask1, self.array2)),
+                     operation(self.array1, self.array2))
+        other = PackedMask.from_array(self.array2, chunk_rows=3)
+        assert_equal(np.asarray(operation(self.mask1, other)),
+                     operation(self.array1, self.array2))
+
+    def test_invert(self):
+        assert_equal(np.asarray(~self.mask1), ~self.array1)
+        assert (~self.mask2).count() == np.count_nonzero(~self.array2)
+        assert_equal(np.asarray(~~self.mask1), self.array1)
+
+    def test_operations_invalid_shape(self):
+        with pytest.raises(ValueError) as exc:
+            self.mask1 & PackedMask.from_array(np.ones((2, 3)))
+        assert exc.value.args[0] == 'Masks should have the same shape (got (11, 3, 4) and (2, 3))'
+
+    def test_encode(self):
+        flags, bits = self.mask1.encode()
+        assert_equal(flags, [0, 2, 2, 2, 2, 2])
+        assert bits.dtype == np.uint8
+        mask = PackedMask.decode(self.mask1.shape, flags, bits, self.mask1.chunk_rows)
+        assert_equal(np.asarray(mask), self.array1)
+        with pytest.raises(ValueError) as exc:
+            PackedMask.decode(self.mask1.shape, flags, bits[:-1], self.mask1.chunk_rows)
+        assert exc.value.args[0] == 'The number of packed bits does not match the flags'
@@ -1,9 +1,61 @@
+import pytest
 import numpy as np
 from numpy.testing import assert_equal
+from matplotlib.path import Path
 
 from glue.tests.helpers import requires_scipy
 
-from ..geometry import polygon_line_intersections, floodfill
+from ..geometry import (polygon_line_intersections, floodfill, floodfill_region,
+                        points_inside_poly, PolygonIndex)
+
+
+@pytest.mark.parametrize(('n_vertices', 'dtype', 'n_threads'),
+                         [(5, float, None), (200, float, None),
+                          (200, np.float32, 1), (200, float, 3)])
+def test_points_inside_poly_index(n_vertices, dtype, n_threads):
+
+    # Make sure that using the polygon index gives identical results to
+    # testing all points with Matplotlib, including for points on edges,
+    # vertices, and for self-intersecting polygons.
+
+    rng = np.random.RandomState(12345)
+
+    for vx, vy in [rng.uniform(-1, 1, (2, n_vertices)),
+                   np.round(rng.uniform(-1, 1, (2, n_vertices)), 1)]:
+
+        x = rng.uniform(-1.2, 1.2, 200000)
+        y = rng.uniform(-1.2, 1.2, 200000)
+
+        f = rng.uniform(0, 1, n_vertices)
+        x[:n_vertices] = vx
+        y[:n_vertices] = vy
+        x[n_vertices:2 * n_vertices] = vx + f * (np.roll(vx, -1) - vx)
+        y[n_vertices:2 * n_vertices] = vy + f * (np.roll(vy, -1) - vy)
+        x[-10:] = np.nan
+
+        x = x.astype(dtype)
+        y = y.astype(dtype)
+
+        path = Path(np.column_stack((vx, vy)))
+        keep = ((x >= vx.min()) & (x <= vx.max()) &
+                (y >= vy.min()) & (y <= vy.max()))
+        expected = np.zeros(len(x), dtype=bool)
+        expected[keep] = path.contains_points(np.column_stack((x[keep], y[keep])))
+
+        assert_equal(points_inside_poly(x, y, vx, vy, n_threads=n_threads), expected)
+
+        index = PolygonIndex(vx, vy, n_cells=64)
+        assert_equal(points_inside_poly(x, y, vx, vy, index=index), expected)
+
+        assert_equal(points_inside_poly(x.reshape((400, 500)), y.reshape((400, 500)), vx, vy),
+                     expected.reshape((400, 500)))
+
+
+def test_points_inside_poly_degenerate():
+    x = np.array([0., 1., 2., 3.])
+    y = np.array([0., 0., 0., 1.])
+    assert_equal(points_inside_poly(x, y, [0, 2, 1], [0, 0, 0]),
+                 [False, False, False, False])
 
 
 def test_square_nonclosed():
@@ -98,3 +150,76 @@ def test_floodfill():
                           [1, 1, 1, 1],
                           [1, 1, 1, 1],
                           [1, 1, 1, 1]])
+
+
+@requires_scipy
+def test_floodfill_start_outside_range():
+
+    # If the value at the starting point is itself not in the range of values,
+    # nothing should be selected
+    assert not floodfill(DATA, (3, 3), 1.5).any()
+    assert not floodfill(DATA, (1, 0), 1).any()
+
+
+@requires_scipy
+@pytest.mark.parametrize('ndim', [1, 2, 3])
+def test_floodfill_region(ndim):
+
+    from scipy.ndimage import label
+
+    # Compare the region grown block by block to the region found by
+    # labelling the whole array.
+
+    random = np.random.RandomState(12345)
+
+    for trial in range(5):
+
+        shape = tuple(random.randint(1, 12, ndim))
+        data = random.uniform(1, 3, shape)
+        start = tuple(random.randint(0, size) for size in shape)
+
+        previous = None
+
+        for threshold in [1.05, 1.2, 1.5, 1.3, 2.]:
+
+            value = data[start]
+            labels = label((data > value * (2 - threshold)) & (data < value * threshold))[0]
+            expected = labels == labels[start]
+
+            for block_shape in [None, (1,) * ndim, (3,) * ndim]:
+                region = floodfill_region(data, start, threshold, block_shape=block_shape)
+                assert_equal(region.to_mask(), expected)
+
+            # Growing the previous region should give the same result
+            previous = floodfill_region(data, start, threshold, previous=previous,
+                                        block_shape=(4,) * ndim)
+            assert_equal(previous.to_mask(), expected)
+
+            slices, mask = previous.bounding_box()
+            indices = np.nonzero(expected)
+            assert slices == tuple(slice(i.min(), i.max() + 1) for i in indices)
+            assert_equal(mask, expected[slices])
+
+            # Views should only extract the overlap with the bounding box
+            views = [(0,) * ndim, (slice(None, None, -1),), (slice(1, None, 2), -1),
+                     random.uniform(size=shape) > 0.5, np.nonzero(~expected),
+                     tuple(random.randint(-size, size, 4) for size in shape)]
+            for view in views:
+                if isinstance(view, tuple):
+                    view = view[:ndim]
+                assert_equal(previous.to_mask(view=view), expected[view])
+
+
+@requires_scipy
+def test_floodfill_region_blocks():
+
+    # Only the blocks reached by the region should be accessed
+
+    data = np.ones((100, 100))
+    data[40:60, 40:60] = 10
+
+    region = floodfill_region(data, (50, 50), 1.1, block_shape=(10, 10))
+
+    assert sorted(region.blocks) == [(i, j) for i in range(4, 6) for j in range(4, 6)]
+    assert region.bounding_box()[0] == (slice(40, 60), slice(40, 60))
+    assert_equal(region.to_mask(view=(slice(45, 55), 50)), 1)
@@ -1,6 +1,8 @@
 # This artist can be used to deal with the sampling of the data as well as any
 # RGB blending.
 
+import weakref
+
 import numpy as np
 
 from matplotlib.colors import ColorConverter, Colormap
@@ -31,6 +33,15 @@ class CompositeArray(object):
 
         self._first = True
 
+        # Cache of stretched planes for each layer. The key is the UUID of the
+        # layer artist, and the values are tuples of (weak reference to the
+        # original array, stretch parameters, stretched float32 plane).
+        self._planes = {}
+
+        # Buffer in which the layers are composited, which is re-used as long
+        # as the shape of the output does not change.
+        self._buffer = None
+
     def allocate(self, uuid):
         self.layers[uuid] = {'zorder': 0,
                              'visible': True,
@@ -45,6 +56,7 @@ class CompositeArray(object):
 
     def deallocate(self, uuid):
         self.layers.pop(uuid)
+        self._planes.pop(uuid, None)
 
     def set(self, uuid, **kwargs):
         for key, value in kwargs.items():
@@ -75,10 +87,61 @@ class CompositeArray(object):
     def __getitem__(self, item):
         return self()[item]
 
+    def _get_plane(self, uuid, array):
+        """
+        Return the stretched version of ``array`` for a given layer as a
+        float32 array, re-using the previous result if neither the array nor
+        the stretch parameters have changed.
+        """
+
+        layer = self.layers[uuid]
+
+        key = (tuple(layer['clim']), layer['stretch'],
+               layer['contrast'], layer['bias'])
+
+        cached = self._planes.get(uuid)
+
+        if cached is not None:
+            ref, cached_key, plane = cached
+            if cached_key == key and ref is not None and ref() is array:
+                return plane
+            if plane.shape != array.shape:
+                plane = None
+        else:
+            plane = None
+
+        if plane is None:
+            plane = np.empty(array.shape, dtype=np.float32)
+
+        interval = ManualInterval(*layer['clim'])
+        contrast_bias = ContrastBiasStretch(layer['contrast'], layer['bias'])
+        stretch = STRETCHES[layer['stretch']]()
+
+        interval(array, out=plane)
+        contrast_bias(plane, out=plane)
+        stretch(plane, out=plane)
+
+        # We should treat NaN values as zero (post-stretch), which means
+        # that those pixels don't contribute towards the final image.
+        np.copyto(plane, 0, where=np.isnan(plane))
+
+        try:
+            ref = weakref.ref(array)
+        except TypeError:
+            ref = None
+
+        self._planes[uuid] = (ref, key, plane)
+
+        return plane
+
+    def _get_buffer(self, shape):
+        if self._buffer is None or self._buffer.shape != shape:
+            self._buffer = np.empty(shape, dtype=np.float32)
+        return self._buffer
+
     def __call__(self, bounds=None):
 
-        img = None
-        visible_layers = 0
+        planes = []
 
         for uuid in sorted(self.layers, key=lambda x: self.layers[x]['zorder']):
 
@@ -87,9 +150,6 @@ class CompositeArray(object):
             if not layer['visible']:
                 continue
 
-            interval = ManualInterval(*layer['clim'])
-            contrast_bias = ContrastBiasStretch(layer['contrast'], layer['bias'])
-
             if callable(layer['array']):
                 array = layer['array'](bounds=bounds)
             else:
@@ -99,69 +159,79 @@ class CompositeArray(object):
                 continue
 
             if np.isscalar(array):
-                scalar = True
                 array = np.atleast_2d(array)
-            else:
-                scalar = False
 
-            data = STRETCHES[layer['stretch']]()(contrast_bias(interval(array)))
-            data[np.isnan(data)] = 0
+            planes.append((layer, self._get_plane(uuid, array)))
 
-            if isinstance(layer['color'], Colormap):
+        if len(planes) == 0:
+            return None
 
-                if img is None:
-                    img = np.ones(data.shape + (4,))
+        # Scalar layers are broadcast to the shape of the other layers
+        shape = np.broadcast(*[np.broadcast_to(False, data.shape) for _, data in planes[:32]]).shape
+        for _, data in planes[32:]:
+            shape = np.broadcast(np.broadcast_to(False, shape), data).shape
 
-                # Compute colormapped image
-                plane = layer['color'](data)
+        img = self._get_buffer(shape + (4,))
+        rgb = img[..., :3]
 
-                alpha_plane = layer['alpha'] * plane[:, :, 3]
+        # Colormapped layers are composited using traditional alpha
+        # compositing on top of a white background, whereas layers with a
+        # single color are added together on top of a black background.
+        if isinstance(planes[0][0]['color'], Colormap):
+            rgb.fill(1)
+        else:
+            rgb.fill(0)
 
-                # Use traditional alpha compositing
-                plane[:, :, 0] = plane[:, :, 0] * alpha_plane
-                plane[:, :, 1] = plane[:, :, 1] * alpha_plane
-                plane[:, :, 2] = plane[:, :, 2] * alpha_plane
+        index = 0
 
-                img[:, :, 0] *= (1 - alpha_plane)
-                img[:, :, 1] *= (1 - alpha_plane)
-                img[:, :, 2] *= (1 - alpha_plane)
-                img[:, :, 3] = 1
+        while index < len(planes):
 
-            else:
+            layer, data = planes[index]
 
-                if img is None:
-                    img = np.zeros(data.shape + (4,))
+            if isinstance(layer['color'], Colormap):
 
-                # Get color and pre-multiply by alpha values
-                color = COLOR_CONVERTER.to_rgba_array(layer['color'])[0]
-                color *= layer['alpha']
+                # Compute colormapped image
+                plane = layer['color'](data)
 
-                # We should treat NaN values as zero (post-stretch), which means
-                # that those pixels don't contribute towards the final image.
-                reset = np.isnan(data)
-                if np.any(reset):
-                    data[reset] = 0.
+                alpha_plane = layer['alpha'] * plane[..., 3:]
 
-                plane = data[:, :, np.newaxis] * color
-                plane[:, :, 3] = 1
+                rgb *= 1 - alpha_plane
+                rgb += plane[..., :3] * alpha_plane
 
-                visible_layers += 1
+                index += 1
 
-            if scalar:
-                plane = plane[0, 0]
+            else:
 
-            img += plane
+                # Since the contributions of consecutive layers with a single
+                # color are simply added together, we can composite all of
+                # them in a single pass.
+                group = []
+                while (index < len(planes) and
+                       not isinstance(planes[index][0]['color'], Colormap)):
+                    group.append(planes[index])
+                    index += 1
+
+                # Get colors and pre-multiply by alpha values
+                colors = np.array([COLOR_CONVERTER.to_rgba_array(layer['color'])[0, :3] *
+                                   layer['alpha'] for layer, _ in group], dtype=np.float32)
+
+                if len(group) == 1:
+                    rgb += group[0][1][..., np.newaxis] * colors[0]
+                else:
+                    rgb += np.tensordot(np.stack([np.broadcast_to(data, shape)
+                                                  for _, data in group], axis=-1),
+                                        colors, axes=1)
 
-        if img is None:
-            return None
-        else:
-            img = np.clip(img, 0, 1)
+        # Every visible layer sets the alpha of the output to one
+        img[..., 3] = 1
 
-        return img
+        # We always return a new array so that the buffer can be re-used in
+        # subsequent calls without modifying previously returned images.
+        return np.clip(img, 0, 1)
 
     @property
     def dtype(self):
-        return np.float
+        return np.float32
 
     @property
     def ndim(self):
@@ -21,7 +21,7 @@ class TestCompositeArray(object):
         assert self.composite.shape is None
         assert self.composite.size is None
         assert self.composite.ndim == 2  # for now, this is hard-coded
-        assert self.composite.dtype is np.float  # for now, this is hard-coded
+        assert self.composite.dtype is np.float32  # for now, this is hard-coded
 
         self.composite.allocate('a')
         self.composite.set('a', array=self.array1)
@@ -29,7 +29,8 @@ class TestCompositeArray(object):
         assert self.composite.shape == (2, 2)
         assert self.composite.size == 4
         assert self.composite.ndim == 2
-        assert self.composite.dtype is np.float
+        assert self.composite.dtype is np.float32
+        assert self.composite(bounds=self.default_bounds).dtype == np.float32
 
     def test_shape_function(self):
 
@@ -142,3 +143,92 @@ class TestCompositeArray(object):
         self.composite.set('a', array=array, visible=False)
 
         assert self.composite() is None
+
+    def test_mixed_blending(self):
+
+        # Layers with a single color that are consecutive in zorder are
+        # composited together, so check that interleaving them with colormapped
+        # layers gives the same result as compositing the layers one by one.
+
+        self.composite.allocate('a')
+        self.composite.allocate('b')
+        self.composite.allocate('c')
+        self.composite.allocate('d')
+
+        self.composite.set('a', zorder=0, array=self.array1, color=cm.viridis,
+                           clim=(0, 2))
+        self.composite.set('b', zorder=1, array=self.array3, color=(1, 0, 0, 1),
+                           alpha=0.8)
+        self.composite.set('c', zorder=2, array=self.array4, color=(0, 1, 0, 1),
+                           alpha=0.6)
+        self.composite.set('d', zorder=3, array=self.array2, color=cm.gray,
+                           alpha=0.3)
+
+        expected = np.ones((2, 2, 3))
+        expected *= 1 - cm.viridis(self.array1 / 2)[:, :, 3:]
+        expected += cm.viridis(self.array1 / 2)[:, :, :3]
+        expected += self.array3[:, :, np.newaxis] * np.array([0.8, 0, 0])
+        expected += self.array4[:, :, np.newaxis] * np.array([0, 0.6, 0])
+        gray = cm.gray(np.nan_to_num(self.array2))
+        expected *= 1 - 0.3 * gray[:, :, 3:]
+        expected += 0.3 * gray[:, :, :3] * gray[:, :, 3:]
+        expected = np.clip(expected, 0, 1)
+
+        result = self.composite(bounds=self.default_bounds)
+
+        assert_allclose(result[:, :, :3], expected, atol=1e-6)
+        assert_allclose(result[:, :, 3], 1)
+
+    def test_scalar_color_blending(self):
+
+        # Scalar layers should be broadcast to the shape of the other layers,
+        # including when they are composited in a single pass.
+
+        self.composite.allocate('a')
+        self.composite.allocate('b')
+        self.composite.allocate('c')
+
+        self.composite.set('a', zorder=0, visible=True, array=0.5,
+                           color=(1, 0, 0), clim=(0, 1))
+        self.composite.set('b', zorder=1, visible=True, array=self.array2,
+                           color=(0, 1, 0), clim=(0, 1))
+        self.composite.set('c', zorder=2, visible=True, array=self.array3,
+                           color=(0, 0, 1), clim=(0, 1))
+
+        result = self.composite(bounds=self.default_bounds)
+
+        assert result.shape == (2, 2, 4)
+        assert_allclose(result[:, :, 0], 0.5)
+        assert_allclose(result[:, :, 1], np.nan_to_num(self.array2))
+        assert_allclose(result[:, :, 2], self.array3)
+        assert_allclose(result[:, :, 3], 1)
+
+    def test_plane_cache(self):
+
+        self.composite.allocate('a')
+        self.composite.set('a', array=self.array1, color='1.0', clim=(0, 2))
+
+        result1 = self.composite(bounds=self.default_bounds)
+        plane = self.composite._planes['a'][2]
+
+        # The stretched plane is re-used if the array and the stretch
+        # parameters have not changed, and the returned images are
+        # independent of the buffer used for compositing.
+
+        result2 = self.composite(bounds=self.default_bounds)
+        assert self.composite._planes['a'][2] is plane
+        assert result2 is not result1
+        assert_allclose(result1, result2)
+
+        self.composite.set('a', clim=(0, 4))
+        result3 = self.composite(bounds=self.default_bounds)
+        assert_allclose(result3[:, :, 0], self.array1 / 4)
+        assert_allclose(result1[:, :, 0], self.array1 / 2)
+
+        # A different array should not hit the cache
+        self.composite.set('a', array=self.array1 * 2)
+        result4 = self.composite(bounds=self.default_bounds)
+        assert_allclose(result4[:, :, 0], self.array1 / 2)
+
+        self.composite.deallocate('a')
+        assert 'a' not in self.composite._planes
@@ -1,62 +1,93 @@
 import sys
-import time
-import queue
 
-from glue.utils import queue_to_list
-from qtpy.QtCore import Signal, QThread
+from qtpy.QtCore import Signal, QObject
 
+from glue.core.compute import compute_executor, current_job
+from glue.core.exceptions import ComputationCancelled
 
-# For some viewers, we make use of a thread that continuously listens for
-# requests to update the profile and we run these as needed. In future,
-# we should add the ability to interrupt compute jobs if a newer compute
-# job is requested.
+__all__ = ['ComputeWorker']
 
 
-class ComputeWorker(QThread):
+# For some viewers, we run the computations needed to update the layers in the
+# background using the shared compute executor. Each worker submits its jobs
+# with itself as the key, so that requesting a new computation cancels any
+# computation still in progress for the same layer. The signals are emitted
+# from the compute threads but are delivered to the main thread, so they can
+# safely be connected to methods that update the plots.
+
+
+class ComputeWorker(QObject):
 
     compute_start = Signal()
     compute_end = Signal()
     compute_error = Signal(object)
 
-    def __init__(self, function):
+    _finished = Signal(object, object)
+
+    def __init__(self, function, executor=None):
         super(ComputeWorker, self).__init__()
         self.function = function
+        self.executor = executor or compute_executor
+        self.running = False
+        self._job = None
+        self._reset = False
+        self._finished.connect(self._on_finished)
+
+    def submit(self, reset=False):
+        """
+        Request a new computation, superseding any computation in progress.
+        """
+        # If a computation that was meant to reset the cache gets superseded,
+        # the new one needs to do the reset instead.
+        self._reset = self._reset or reset
+        self.running = True
+        self._job = self.executor.submit(self, self._run, self._reset)
+
+    def _run(self, reset):
+        job = current_job()
+        self.compute_start.emit()
+        try:
+            self.function(reset=reset)
+        except ComputationCancelled:
+            return
+        except Exception:
+            error = sys.exc_info()
+        else:
+            error = None
+        self._finished.emit(job, error)
+
+    def _on_finished(self, job, error):
+
+        # Ignore results from computations that have since been superseded
+        if job is not self._job or job.cancelled:
+            return
+
+        self._job = None
+        self._reset = False
         self.running = False
-        self.work_queue = queue.Queue()
-
-    def run(self):
-
-        error = None
-
-        while True:
-
-            time.sleep(1 / 25)
-
-            msgs = queue_to_list(self.work_queue)
-
-            if 'stop' in msgs:
-                return
-
-            elif len(msgs) == 0:
-                # We change this here rather than in the try...except below
-                # to avoid stopping and starting in quick succession.
-                if self.running:
-                    self.running = False
-                    if error is None:
-                        self.compute_end.emit()
-                    else:
-                        self.compute_error.emit(error)
-                        error = None
-                continue
-
-            # If any resets were requested, honor this
-            reset = any(msgs)
 
-            try:
-                self.running = True
-                self.compute_start.emit()
-                self.function(reset=reset)
-            except Exception:
-                error = sys.exc_info()
-            else:
-                error = None
+        if error is None:
+            self.compute_end.emit()
+        else:
+            self.compute_error.emit(error)
+
+    def wait(self):
+        """
+        Wait until the current computation (if any) has finished and its
+        results have been delivered.
+        """
+        from glue.utils.qt import process_events
+        while self.running:
+            if self._job is not None:
+                self._job.wait()
+            process_events()
+
+    def stop(self):
+        """
+        Cancel the current computation (if any).
+        """
+        if self._job is not None:
+            self._job.cancel()
+            self._job = None
+        self._reset = False
+        self.running = False
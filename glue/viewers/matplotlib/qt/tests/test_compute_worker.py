@@ -0,0 +1,84 @@
+import threading
+
+from glue.core.compute import ComputeExecutor, check_cancelled
+
+from ..compute_worker import ComputeWorker
+
+
+class TestComputeWorker(object):
+
+    def setup_method(self, method):
+        self.executor = ComputeExecutor(max_workers=2)
+        self.release = threading.Event()
+        self.calls = []
+        self.results = []
+        self.errors = []
+
+    def teardown_method(self, method):
+        self.release.set()
+        self.executor.shutdown()
+
+    def compute(self, reset=False):
+        self.calls.append(reset)
+        if len(self.calls) == 1:
+            self.release.wait(5)
+            check_cancelled()
+        if reset == 'error':
+            raise ValueError('Invalid')
+
+    def make_worker(self):
+        worker = ComputeWorker(self.compute, executor=self.executor)
+        worker.compute_end.connect(lambda: self.results.append(worker.running))
+        worker.compute_error.connect(self.errors.append)
+        return worker
+
+    def test_supersede(self):
+
+        worker = self.make_worker()
+
+        worker.submit(reset=True)
+        worker.submit()
+        worker.submit()
+
+        assert worker.running
+
+        self.release.set()
+        worker.wait()
+
+        assert not worker.running
+
+        # The first computation was cancelled, and the next ones should have
+        # still done the reset requested by the first one.
+        assert self.calls[0] is True
+        assert all(self.calls[1:])
+
+        # The end of the computation is only signalled once
+        assert self.results == [False]
+        assert self.errors == []
+
+    def test_error(self):
+
+        worker = self.make_worker()
+
+        self.release.set()
+        worker.submit(reset='error')
+        worker.wait()
+
+        assert self.results == []
+        assert len(self.errors) == 1
+        assert self.errors[0][0] is ValueError
+
+    def test_stop(self):
+
+        worker = self.make_worker()
+
+        worker.submit()
+        worker.stop()
+
+        assert not worker.running
+
+        self.release.set()
+        worker.wait()
+
+        assert self.results == []
+        assert self.errors == []
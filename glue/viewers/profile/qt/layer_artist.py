@@ -1,4 +1,3 @@
-import time
 
 from glue.viewers.profile.layer_artist import ProfileLayerArtist
 from glue.viewers.matplotlib.qt.compute_worker import ComputeWorker
@@ -17,21 +16,15 @@ class QThreadedProfileLayerArtist(ProfileLayerArtist):
         self.setup_thread()
 
     def wait(self):
-        # Wait 0.5 seconds to make sure that the computation has properly started
-        time.sleep(0.5)
-        while self._worker.running:
-            time.sleep(1 / 25)
+        if self._worker is not None:
+            self._worker.wait()
         from glue.utils.qt import process_events
         process_events()
 
     def remove(self):
         super(QThreadedProfileLayerArtist, self).remove()
         if self._worker is not None:
-            self._worker.work_queue.put('stop')
-            self._worker.exit()
-            # Need to wait otherwise the thread will be destroyed while still
-            # running, causing a segmentation fault
-            self._worker.wait()
+            self._worker.stop()
             self._worker = None
 
     @property
@@ -43,12 +36,11 @@ class QThreadedProfileLayerArtist(ProfileLayerArtist):
         self._worker.compute_end.connect(self._calculate_profile_postthread)
         self._worker.compute_error.connect(self._calculate_profile_error)
         self._worker.compute_start.connect(self.notify_start_computation)
-        self._worker.start()
 
     @defer_draw
     def _calculate_profile(self, reset=False):
         if self.state.layer is not None and self.state.layer.size > 1e7:
-            self._worker.work_queue.put(reset)
+            self._worker.submit(reset=reset)
         else:
             super(QThreadedProfileLayerArtist, self)._calculate_profile(reset=reset)
 
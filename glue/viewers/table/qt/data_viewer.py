@@ -1,4 +1,6 @@
 import os
+from collections import OrderedDict
+
 import numpy as np
 
 from qtpy.QtCore import Qt
@@ -23,6 +25,60 @@ __all__ = ['TableViewer', 'TableLayerArtist']
 
 COLOR_CONVERTER = ColorConverter()
 
+# The values and colors shown in the table are computed for blocks of rows at
+# a time rather than for individual cells, and the most recently used blocks
+# are cached.
+ROW_BLOCK_SIZE = 1024
+MAX_CACHED_BLOCKS = 256
+
+# The number of columns for which the indices that sort the column are cached
+MAX_CACHED_ARGSORTS = 4
+
+# When sorting columns with at least PARTIAL_SORT_MIN_ROWS rows, we initially
+# only sort the first PARTIAL_SORT_BLOCKS blocks of rows, and only do the full
+# sort if rows beyond these are needed.
+PARTIAL_SORT_MIN_ROWS = 1000000
+PARTIAL_SORT_BLOCKS = 16
+
+
+def _partial_argsort(values, n_rows, ascending=True):
+    """
+    Return a permutation of the indices of ``values`` where the first
+    ``n_rows`` indices are the same as for a full stable argsort (reversed if
+    ``ascending`` is `False`), and the remaining indices are in arbitrary
+    order. Returns `None` if this is not possible for the given values.
+    """
+
+    if values.dtype.kind not in 'biuf' or n_rows >= values.size:
+        return None
+
+    if values.dtype.kind == 'f' and np.isnan(values).any():
+        return None
+
+    # Find the value at the boundary of the rows to sort, and then the
+    # indices of all values strictly before it. Ties at the boundary are
+    # resolved in the same way as for the full stable argsort.
+    if ascending:
+        threshold = np.partition(values, n_rows - 1)[n_rows - 1]
+        selected = np.flatnonzero(values < threshold)
+        equal = np.flatnonzero(values == threshold)
+        equal = equal[:n_rows - selected.size]
+    else:
+        threshold = np.partition(values, values.size - n_rows)[values.size - n_rows]
+        selected = np.flatnonzero(values > threshold)
+        equal = np.flatnonzero(values == threshold)
+        equal = equal[equal.size - (n_rows - selected.size):]
+
+    selected = np.sort(np.hstack([selected, equal]))
+    selected = selected[np.argsort(values[selected], kind='stable')]
+    if not ascending:
+        selected = selected[::-1]
+
+    remaining = np.ones(values.size, dtype=bool)
+    remaining[selected] = False
+
+    return np.hstack([selected, np.flatnonzero(remaining)])
+
 
 class DataTableModel(QtCore.QAbstractTableModel):
 
@@ -33,12 +89,23 @@ class DataTableModel(QtCore.QAbstractTableModel):
         self._table_viewer = table_viewer
         self._data = table_viewer.data
         self.show_coords = False
-        self.order = np.arange(self._data.shape[0])
+        self._values = OrderedDict()
+        self._brushes = OrderedDict()
+        self._masks = {}
+        self._sort_column = None
+        self._sort_ascending = True
+        self._sort_key = None
+        self._argsorts = OrderedDict()
+        self._visible_count = None
+        self._visible_masks = {}
+        self._update_order()
         self._update_visible()
 
     def data_changed(self):
         top_left = self.index(0, 0)
         bottom_right = self.index(self.columnCount(), self.rowCount())
+        self._prune_masks()
+        self._update_order()
         self._update_visible()
         self.dataChanged.emit(top_left, bottom_right)
         self.layoutChanged.emit()
@@ -55,7 +122,24 @@ class DataTableModel(QtCore.QAbstractTableModel):
 
     def rowCount(self, index=None):
         # Qt bug: Crashes on tables bigger than this
-        return min(self.order_visible.size, 71582788)
+        return min(self._order_visible.size, 71582788)
+
+    @property
+    def order(self):
+        """
+        The indices of the rows of the data in the order they are shown.
+        """
+        self._complete_sort()
+        return self._order
+
+    @property
+    def order_visible(self):
+        """
+        The indices of the rows of the data that are shown, in the order they
+        are shown.
+        """
+        self._complete_visible_sort()
+        return self._order_visible
 
     def headerData(self, section, orientation, role):
         if role != Qt.DisplayRole:
@@ -68,7 +152,8 @@ class DataTableModel(QtCore.QAbstractTableModel):
                 column_name += "\n{0}".format(units)
             return column_name
         elif orientation == Qt.Vertical:
-            return str(self.order_visible[section])
+            self._complete_visible_sort(section + 1)
+            return str(self._order_visible[section])
 
     def data(self, index, role):
 
@@ -77,70 +162,284 @@ class DataTableModel(QtCore.QAbstractTableModel):
 
         if role == Qt.DisplayRole:
 
-            c = self.columns[index.column()]
-            idx = self.order_visible[index.row()]
-            comp = self._data[c]
-            if isinstance(comp[idx], bytes):
-                return comp[idx].decode('ascii')
-            else:
-                return str(comp[idx])
+            block, offset = divmod(index.row(), ROW_BLOCK_SIZE)
+            return self._get_values(index.column(), block)[offset]
 
         elif role == Qt.BackgroundRole:
 
-            idx = self.order_visible[index.row()]
-
-            # Find all subsets that this index is part of
-            colors = []
-            for layer_artist in self._table_viewer.layers[::-1]:
-                if isinstance(layer_artist.layer, BaseData):
-                    continue
-                if layer_artist.visible:
-                    subset = layer_artist.layer
-                    try:
-                        if subset.to_mask(view=slice(idx, idx + 1))[0]:
-                            colors.append(subset.style.color)
-                    except IncompatibleAttribute as exc:
-                        # Only disable the layer if enabled, as otherwise we
-                        # will recursively call clear and _refresh, causing
-                        # an infinite loop and performance issues.
-                        if layer_artist.enabled:
-                            layer_artist.disable_invalid_attributes(*exc.args)
-                    else:
-                        layer_artist.enabled = True
-
-            # Blend the colors using alpha blending
-            if len(colors) > 0:
-                color = alpha_blend_colors(colors, additional_alpha=0.5)
-                color = mpl_to_qt_color(color)
-                return QtGui.QBrush(color)
+            block, offset = divmod(index.row(), ROW_BLOCK_SIZE)
+            return self._get_brushes(block)[offset]
+
+    def _block_indices(self, block):
+        start = block * ROW_BLOCK_SIZE
+        self._complete_visible_sort(start + ROW_BLOCK_SIZE)
+        return self._order_visible[start:start + ROW_BLOCK_SIZE]
+
+    def _get_cached(self, cache, key, func, *args):
+        if key in cache:
+            cache.move_to_end(key)
+            return cache[key]
+        value = func(*args)
+        cache[key] = value
+        while len(cache) > MAX_CACHED_BLOCKS:
+            cache.popitem(last=False)
+        return value
+
+    def _get_values(self, column, block):
+        """
+        Return the formatted values for a column in a block of rows.
+        """
+        c = self.columns[column]
+        return self._get_cached(self._values, (c, block), self._compute_values, c, block)
+
+    def _compute_values(self, c, block):
+        values = self._data.get_data(c, view=self._block_indices(block))
+        return [value.decode('ascii') if isinstance(value, bytes) else str(value)
+                for value in values]
+
+    def _get_brushes(self, block):
+        """
+        Return the background brushes for a block of rows.
+        """
+        return self._get_cached(self._brushes, block, self._compute_brushes, block)
+
+    def _compute_brushes(self, block):
+
+        indices = self._block_indices(block)
+
+        # Find which of the rows are part of each subset
+        colors = []
+        members = []
+        for layer_artist in self._table_viewer.layers[::-1]:
+            if isinstance(layer_artist.layer, BaseData):
+                continue
+            if layer_artist.visible:
+                subset = layer_artist.layer
+                try:
+                    mask = self._get_mask(subset)
+                except IncompatibleAttribute as exc:
+                    # Only disable the layer if enabled, as otherwise we
+                    # will recursively call clear and _refresh, causing
+                    # an infinite loop and performance issues.
+                    if layer_artist.enabled:
+                        layer_artist.disable_invalid_attributes(*exc.args)
+                else:
+                    layer_artist.enabled = True
+                    colors.append(subset.style.color)
+                    members.append(mask[indices])
+
+        if len(members) == 0:
+            return [None] * len(indices)
+
+        # Blend the colors using alpha blending - we only need to do this once
+        # for each unique combination of subsets.
+        combinations, inverse = np.unique(np.array(members), axis=1, return_inverse=True)
+        brushes = []
+        for combination in combinations.T:
+            selected = [color for color, member in zip(colors, combination) if member]
+            if len(selected) > 0:
+                color = alpha_blend_colors(selected, additional_alpha=0.5)
+                brushes.append(QtGui.QBrush(mpl_to_qt_color(color)))
+            else:
+                brushes.append(None)
+
+        return [brushes[i] for i in inverse]
+
+    def _get_mask(self, subset):
+        """
+        Return the mask for a subset, re-using the previous mask if neither
+        the subset state nor the data have changed.
+        """
+        data_version = getattr(subset.data, '_data_version', 0)
+        if subset in self._masks:
+            subset_state, version, mask = self._masks[subset]
+            if subset_state is subset.subset_state and version == data_version:
+                return mask
+        mask = subset.to_mask()
+        self._masks[subset] = (subset.subset_state, data_version, mask)
+        return mask
+
+    def invalidate_subset(self, subset):
+        """
+        Discard any cached information about a subset.
+        """
+        self._masks.pop(subset, None)
+        self._brushes.clear()
+
+    def invalidate_styles(self, first_row=0, last_row=None):
+        """
+        Discard the cached row colors, keeping the cached subset masks, and
+        notify views that rows ``first_row`` to ``last_row`` (inclusive) need
+        to be repainted.
+        """
+        self._brushes.clear()
+        if last_row is None:
+            last_row = self.rowCount() - 1
+        top_left = self.index(first_row, 0)
+        bottom_right = self.index(last_row, self.columnCount() - 1)
+        self.dataChanged.emit(top_left, bottom_right)
+
+    def _prune_masks(self):
+        layers = [layer_artist.layer for layer_artist in self._table_viewer.layers]
+        for subset in list(self._masks):
+            if subset not in layers:
+                self._masks.pop(subset)
 
     def sort(self, column, ascending):
-        c = self.columns[column]
-        comp = self._data.get_component(c)
-        self.order = np.argsort(comp.data)
-        if ascending == Qt.DescendingOrder:
-            self.order = self.order[::-1]
+        self._sort_column = self.columns[column]
+        self._sort_ascending = ascending != Qt.DescendingOrder
+        self._update_order()
         self._update_visible()
         self.layoutChanged.emit()
 
+    def _argsort(self, cid):
+        """
+        Return the indices that sort a column, re-using the previous result
+        if the data has not changed.
+        """
+        data_version = getattr(self._data, '_data_version', 0)
+        if cid in self._argsorts and self._argsorts[cid][0] == data_version:
+            self._argsorts.move_to_end(cid)
+            return self._argsorts[cid][1]
+        order = np.argsort(self._data.get_component(cid).data, kind='stable')
+        self._argsorts[cid] = (data_version, order)
+        while len(self._argsorts) > MAX_CACHED_ARGSORTS:
+            self._argsorts.popitem(last=False)
+        return order
+
+    def _update_order(self):
+        """
+        Determine the order of the rows given the current sort column.
+        """
+
+        data_version = getattr(self._data, '_data_version', 0)
+
+        sort_key = self._sort_column, self._sort_ascending, data_version
+        if sort_key == self._sort_key:
+            return
+        self._sort_key = sort_key
+
+        # The number of rows at the start of the order that are sorted, or
+        # `None` if all rows are sorted.
+        self._sorted_rows = None
+
+        cid = self._sort_column
+
+        if cid is None:
+            self._order = np.arange(self._data.shape[0])
+            return
+
+        if cid not in self._argsorts or self._argsorts[cid][0] != data_version:
+            values = self._data.get_component(cid).data
+            if values.size >= PARTIAL_SORT_MIN_ROWS:
+                n_rows = PARTIAL_SORT_BLOCKS * ROW_BLOCK_SIZE
+                order = _partial_argsort(values, n_rows, ascending=self._sort_ascending)
+                if order is not None:
+                    self._order = order
+                    self._sorted_rows = n_rows
+                    return
+
+        order = self._argsort(cid)
+        self._order = order if self._sort_ascending else order[::-1]
+
+    def _complete_sort(self):
+        """
+        Make sure that all rows are sorted.
+        """
+
+        if self._sorted_rows is None:
+            return
+
+        previous = self._order
+
+        order = self._argsort(self._sort_column)
+        self._order = order if self._sort_ascending else order[::-1]
+        self._sorted_rows = None
+
+        # Since the rows that were already sorted don't change, the cached
+        # blocks are still valid.
+        if self._order_visible is previous:
+            self._order_visible = self._order
+
+    def _complete_visible_sort(self, n_rows=None):
+        """
+        Make sure that at least the first ``n_rows`` visible rows (or all
+        visible rows if not specified) are sorted.
+        """
+
+        # If only some rows are visible, these are always fully sorted
+        if self._sorted_rows is None or self._order_visible is not self._order:
+            return
+
+        if n_rows is None or n_rows > self._sorted_rows:
+            self._complete_sort()
+
     def _update_visible(self):
         """
         Given which layers are visible or not, convert order to order_visible.
         """
 
+        self._values.clear()
+        self._brushes.clear()
+
         # First, if the data layer is visible, show all rows
         for layer_artist in self._table_viewer.layers:
             if layer_artist.visible and isinstance(layer_artist.layer, BaseData):
-                self.order_visible = self.order
+                self._order_visible = self._order
                 return
 
         # If not then we need to show only the rows with visible subsets
-        visible = np.zeros(self.order.shape, dtype=bool)
+        visible = self._visible_mask()
+
+        if self._sort_column is None:
+            self._order_visible = np.flatnonzero(visible)
+        elif self._sorted_rows is None:
+            self._order_visible = self._order[visible[self._order]]
+        else:
+            # Rather than completing the sort of all rows, we only sort the
+            # visible rows.
+            indices = np.flatnonzero(visible)
+            values = self._data.get_component(self._sort_column).data[indices]
+            indices = indices[np.argsort(values, kind='stable')]
+            self._order_visible = indices if self._sort_ascending else indices[::-1]
+
+    def _visible_mask(self):
+        """
+        Return a mask of the rows that are in at least one visible subset.
+        """
+
+        masks = {}
         for layer_artist in self._table_viewer.layers:
             if layer_artist.visible:
-                visible |= layer_artist.layer.to_mask()
+                masks[layer_artist.layer] = self._get_mask(layer_artist.layer)
 
-        self.order_visible = self.order[visible]
+        # We keep track of how many visible subsets each row is part of, so
+        # that when a subset is shown, hidden or changed, we only need to
+        # update the count for that subset.
+
+        if len(masks) > 255:
+            self._visible_count = None
+            self._visible_masks = {}
+            visible = np.zeros(self._data.shape, dtype=bool)
+            for mask in masks.values():
+                visible |= mask
+            return visible
+
+        if self._visible_count is None or self._visible_count.shape != self._data.shape:
+            self._visible_count = np.zeros(self._data.shape, dtype=np.uint8)
+            self._visible_masks = {}
+
+        for subset, mask in self._visible_masks.items():
+            if masks.get(subset) is not mask:
+                self._visible_count -= mask
+
+        for subset, mask in masks.items():
+            if self._visible_masks.get(subset) is not mask:
+                self._visible_count += mask
+
+        self._visible_masks = masks
+
+        return self._visible_count > 0
 
 
 class TableLayerArtist(LayerArtist):
@@ -247,7 +546,8 @@ class TableViewer(DataViewer):
 
     def finalize_selection(self, clear=True):
         model = self.ui.table.selectionModel()
-        selected_rows = [self.model.order_visible[x.row()] for x in model.selectedRows()]
+        order_visible = self.model.order_visible
+        selected_rows = [order_visible[x.row()] for x in model.selectedRows()]
         subset_state = ElementSubsetState(indices=selected_rows, data=self.data)
         mode = self.session.edit_subset_mode
         mode.update(self._data, subset_state, focus_data=self.data)
@@ -258,12 +558,37 @@ class TableViewer(DataViewer):
             self.ui.table.clearSelection()
             self.ui.table.blockSignals(False)
 
+    def _update_subset(self, message):
+        if self.model is not None:
+            if message.attribute != 'style':
+                self.model.invalidate_subset(message.subset)
+            elif message.subset in self._layer_artist_container:
+                self._update_styles()
+        super(TableViewer, self)._update_subset(message)
+
+    def _update_styles(self):
+        # Only the rows currently shown need to be repainted straight away,
+        # the others will pick up the new colors when scrolled into view.
+        table = self.ui.table
+        first_row = table.rowAt(0)
+        last_row = table.rowAt(table.viewport().height() - 1)
+        if first_row < 0:
+            first_row = 0
+        if last_row < 0:
+            last_row = None
+        self.model.invalidate_styles(first_row, last_row)
+
     def _on_layers_changed(self, *args):
         for layer_state in self.state.layers:
             if isinstance(layer_state.layer, BaseData):
                 break
         else:
             return
+        # If the data hasn't changed, we keep the existing model so that the
+        # sort order and cached values and masks are preserved.
+        if self.model is not None and layer_state.layer is self.data:
+            self.model.data_changed()
+            return
         self.data = layer_state.layer
         self.setUpdatesEnabled(False)
         self.model = DataTableModel(self)
@@ -1,5 +1,6 @@
 import pytest
 import numpy as np
+from numpy.testing import assert_equal
 from unittest.mock import MagicMock, patch
 
 from qtpy import QtCore, QtGui
@@ -10,7 +11,7 @@ from glue.core import Data, DataCollection
 from glue.utils.qt import qt_to_mpl_color
 from glue.app.qt import GlueApplication
 
-from ..data_viewer import DataTableModel, TableViewer
+from ..data_viewer import DataTableModel, TableViewer, _partial_argsort
 
 from glue.core.edit_subset_mode import AndNotMode, OrMode, ReplaceMode
 
@@ -458,3 +459,203 @@ def test_incompatible_subset():
 
     assert refresh1.call_count == 0
     assert refresh2.call_count == 0
+
+
+def test_row_blocks_and_subset_masks():
+
+    # Check that the values and colors, which are computed for blocks of rows
+    # at a time, are correct across block boundaries and are updated when
+    # subsets change.
+
+    data = Data(a=np.arange(10), label='test')
+    dc = DataCollection([data])
+
+    gapp = GlueApplication(dc)
+
+    viewer = gapp.new_data_viewer(TableViewer)
+    viewer.add_data(data)
+
+    sg = dc.new_subset_group('subset', data.id['a'] > 6)
+    sg.style.color = '#aa0000'
+
+    model = viewer.model
+
+    def check(values, colors):
+        assert model.rowCount() == len(values)
+        for i in range(model.rowCount()):
+            assert model.data(model.index(i, 0), Qt.DisplayRole) == str(values[i])
+            brush = model.data(model.index(i, 0), Qt.BackgroundRole)
+            if colors[i] is None:
+                assert brush is None
+            else:
+                assert qt_to_mpl_color(brush.color()) == colors[i]
+
+    with patch('glue.viewers.table.qt.data_viewer.ROW_BLOCK_SIZE', 3):
+
+        model.data_changed()
+
+        check(range(10), [None] * 7 + ['#aa0000'] * 3)
+
+        subset_cls = type(data.subsets[0])
+        with patch.object(subset_cls, 'to_mask', autospec=True,
+                          side_effect=subset_cls.to_mask) as to_mask:
+            check(range(10), [None] * 7 + ['#aa0000'] * 3)
+            model.data_changed()
+            check(range(10), [None] * 7 + ['#aa0000'] * 3)
+        assert to_mask.call_count == 0
+
+        sg.subset_state = data.id['a'] < 2
+
+        check(range(10), ['#aa0000'] * 2 + [None] * 8)
+
+        # When the data is hidden, only rows in the subset should be shown,
+        # including when the table is sorted.
+
+        viewer.state.layers[0].visible = False
+        model.sort(0, Qt.DescendingOrder)
+
+        check([1, 0], ['#aa0000'] * 2)
+
+
+def test_subset_style_change():
+
+    # Changing the color of a subset should update the row colors without
+    # having to recompute the subset masks.
+
+    data = Data(a=np.arange(10), label='test')
+    dc = DataCollection([data])
+
+    gapp = GlueApplication(dc)
+
+    viewer = gapp.new_data_viewer(TableViewer)
+    viewer.add_data(data)
+
+    sg = dc.new_subset_group('subset', data.id['a'] > 6)
+    sg.style.color = '#aa0000'
+
+    model = viewer.model
+
+    def colors():
+        result = []
+        for i in range(model.rowCount()):
+            brush = model.data(model.index(i, 0), Qt.BackgroundRole)
+            result.append(None if brush is None else qt_to_mpl_color(brush.color()))
+        return result
+
+    assert colors() == [None] * 7 + ['#aa0000'] * 3
+
+    changed = MagicMock()
+    model.dataChanged.connect(changed)
+
+    subset_cls = type(data.subsets[0])
+    with patch.object(subset_cls, 'to_mask', autospec=True,
+                      side_effect=subset_cls.to_mask) as to_mask:
+        sg.style.color = '#0000cc'
+        assert colors() == [None] * 7 + ['#0000cc'] * 3
+    assert to_mask.call_count == 0
+
+    assert changed.call_count > 0
+
+
+@pytest.mark.parametrize('ascending', [True, False])
+def test_partial_argsort(ascending):
+
+    # Use a small range of values so that there are many ties
+
+    values = np.random.RandomState(12345).randint(0, 50, 1000)
+
+    expected = np.argsort(values, kind='stable')
+    if not ascending:
+        expected = expected[::-1]
+
+    for n_rows in [1, 10, 100, 999]:
+        order = _partial_argsort(values, n_rows, ascending=ascending)
+        assert_equal(order[:n_rows], expected[:n_rows])
+        assert_equal(np.sort(order), np.arange(1000))
+
+    assert _partial_argsort(values, 1000, ascending=ascending) is None
+    assert _partial_argsort(values.astype(str), 10, ascending=ascending) is None
+    assert _partial_argsort(np.array([1., np.nan, 3.]), 1, ascending=ascending) is None
+
+
+def test_sort_partial_and_visible_subsets():
+
+    values = np.random.RandomState(12345).randint(0, 20, 40)
+
+    data = Data(a=values, label='test')
+    dc = DataCollection([data])
+
+    gapp = GlueApplication(dc)
+
+    viewer = gapp.new_data_viewer(TableViewer)
+    viewer.add_data(data)
+
+    dc.new_subset_group('subset 1', data.id['a'] > 15)
+    dc.new_subset_group('subset 2', data.id['a'] < 3)
+
+    model = viewer.model
+
+    def shown(n_rows=None):
+        n_rows = model.rowCount() if n_rows is None else n_rows
+        return [int(model.data(model.index(i, 0), Qt.DisplayRole)) for i in range(n_rows)]
+
+    def set_visible(index, visible):
+        # The layer list in the application redraws layer artists when their
+        # visibility is toggled, so we do the same here.
+        viewer.state.layers[index].visible = visible
+        viewer.layers[index].redraw()
+
+    with patch.multiple('glue.viewers.table.qt.data_viewer',
+                        ROW_BLOCK_SIZE=4, PARTIAL_SORT_MIN_ROWS=10,
+                        PARTIAL_SORT_BLOCKS=2):
+
+        model.sort(0, Qt.DescendingOrder)
+
+        # Initially only the first two blocks are sorted
+        assert model._sorted_rows == 8
+        assert shown(8) == sorted(values)[::-1][:8]
+        assert model._sorted_rows == 8
+
+        # Requesting later rows completes the sort
+        assert model.data(model.index(8, 0), Qt.DisplayRole) == str(sorted(values)[::-1][8])
+        assert model._sorted_rows is None
+        assert shown() == sorted(values)[::-1]
+
+        # Sorting a second time re-uses the cached argsort
+        with patch('numpy.argsort') as argsort:
+            model.sort(0, Qt.AscendingOrder)
+            model.sort(0, Qt.DescendingOrder)
+        assert argsort.call_count == 0
+        assert shown() == sorted(values)[::-1]
+
+        model._argsorts.clear()
+        model._sort_key = None
+        model.sort(0, Qt.AscendingOrder)
+        assert model._sorted_rows == 8
+
+        # When the data is hidden, only the visible rows are sorted
+
+        set_visible(0, False)
+        assert model._sorted_rows == 8
+        assert shown() == sorted(values[(values > 15) | (values < 3)])
+
+        # Hiding and showing subsets updates the rows incrementally
+
+        set_visible(1, False)
+        assert shown() == sorted(values[values < 3])
+
+        set_visible(1, True)
+        set_visible(2, False)
+        assert shown() == sorted(values[values > 15])
+
+        dc.subset_groups[0].subset_state = data.id['a'] > 17
+        assert shown() == sorted(values[values > 17])
+
+        assert_equal(model._visible_count, values > 17)
+
+        assert model.order_visible.size == np.sum(values > 17)
+        assert model._sorted_rows == 8
+
+        assert_equal(model.order, np.argsort(values, kind='stable'))
+        assert model._sorted_rows is None
+        assert shown() == sorted(values[values > 17])